@@ -14,6 +14,7 @@
     ],
     "data": [
         "security/ir.model.access.csv",
+        "views/assets.xml",
         #
         "views/l10n_br_di_valor.xml",
         "views/l10n_br_di_pagamento.xml",
@@ -21,6 +22,11 @@
         "views/l10n_br_di_mercadoria.xml",
         "views/l10n_br_di_adicao.xml",
         "views/l10n_br_di_declaracao.xml",
+        "views/l10n_br_di_armazem.xml",
+        "views/l10n_br_di_embalagem.xml",
+        "views/l10n_br_di_declaracao_ee.xml",
+        "views/l10n_br_di_de_para.xml",
+        "views/l10n_br_di_ingestao.xml",
         "views/res_currency.xml",
         #
         "views/account_move_view.xml",
@@ -30,9 +36,13 @@
         "views/res_company.xml",
         #
         "data/res_currency.xml",
+        "data/ir_cron.xml",
         #
         "wizards/l10n_br_di_importa_di_wizard.xml",
     ],
+    "qweb": [
+        "static/src/xml/upload_declaracao.xml",
+    ],
     "demo": [
         "demo/l10n_br_di_valor.xml",
         "demo/l10n_br_di_pagamento.xml",
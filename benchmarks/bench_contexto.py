@@ -0,0 +1,77 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Custo por importação com e sem o XmlContext compartilhado.
+
+Compara um XmlParser novo a cada importação (comportamento anterior) com o
+parser de `utils.parser.get_parser`, tanto na primeira importação de um
+processo recém-criado (worker frio) quanto nas importações seguintes
+(worker quente).
+
+    python benchmarks/bench_contexto.py [--adicoes 50] [--repeticoes 20]
+"""
+
+import argparse
+import io
+import subprocess
+import sys
+import time
+
+import sintetico
+from xsdata.formats.dataclass.parsers import XmlParser
+
+from utils.parser import DEFAULT_HANDLER, HANDLERS, get_parser, iter_declaracoes
+
+MODOS = ("novo", "compartilhado")
+
+
+def importa(conteudo, modo):
+    if modo == "novo":
+        parser = XmlParser(handler=HANDLERS[DEFAULT_HANDLER])
+    else:
+        parser = get_parser()
+    for _di in iter_declaracoes(io.BytesIO(conteudo), parser=parser):
+        pass
+
+
+def cronometra(conteudo, modo):
+    inicio = time.perf_counter()
+    importa(conteudo, modo)
+    return time.perf_counter() - inicio
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument("--adicoes", type=int, default=50)
+    args.add_argument("--repeticoes", type=int, default=20)
+    args.add_argument("--primeira", choices=MODOS, help=argparse.SUPPRESS)
+    opcoes = args.parse_args()
+
+    conteudo = sintetico.gera_lista(adicoes=opcoes.adicoes)
+
+    if opcoes.primeira:
+        print(cronometra(conteudo, opcoes.primeira))
+        return
+
+    print("DI sintética: %d adições, %d bytes" % (opcoes.adicoes, len(conteudo)))
+    print("%-14s %18s %18s" % ("modo", "worker frio (ms)", "worker quente (ms)"))
+    for modo in MODOS:
+        frio = float(
+            subprocess.check_output(
+                [
+                    sys.executable,
+                    __file__,
+                    "--adicoes",
+                    str(opcoes.adicoes),
+                    "--primeira",
+                    modo,
+                ]
+            )
+        )
+        importa(conteudo, modo)
+        quente = min(cronometra(conteudo, modo) for _ in range(opcoes.repeticoes))
+        print("%-14s %18.1f %18.1f" % (modo, frio * 1000, quente * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Importação de DI (XML) x DUIMP (JSON) em declarações do mesmo tamanho.
+
+Cada item da DUIMP vira uma adição com uma mercadoria, então o XML é gerado
+com `--itens` adições de uma mercadoria. Mede o tempo por item e o pico de
+memória (tracemalloc) da leitura, validação e conversão de um arquivo com
+várias declarações, consumidas uma por vez como na importação. A DUIMP é
+medida com ijson (se instalado) e com o decodificador da biblioteca padrão.
+
+    python benchmarks/bench_duimp.py [--declaracoes 10] [--itens 200]
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+import sintetico
+
+from utils import duimp
+from utils.conversao import converte_declaracao
+from utils.parser import iter_declaracoes
+from utils.validacao import verifica_declaracoes
+
+
+def importa_xml(conteudo):
+    verifica_declaracoes(io.BytesIO(conteudo))
+    for di in iter_declaracoes(io.BytesIO(conteudo)):
+        converte_declaracao(di)
+
+
+def importa_duimp(conteudo):
+    for numero, objeto in enumerate(duimp.iter_duimps(io.BytesIO(conteudo)), 1):
+        duimp.converte_duimp(objeto, numero)
+
+
+def mede(funcao, conteudo, repeticoes):
+    tempo = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(conteudo)
+        tempo = min(tempo, time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao(conteudo)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return tempo, pico
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument("--declaracoes", type=int, default=10)
+    args.add_argument("--itens", type=int, default=200)
+    args.add_argument("--repeticoes", type=int, default=3)
+    opcoes = args.parse_args()
+
+    xml = sintetico.gera_lista(opcoes.declaracoes, opcoes.itens, 1)
+    json = sintetico.gera_duimp(opcoes.declaracoes, opcoes.itens)
+    itens = opcoes.declaracoes * opcoes.itens
+    print(
+        "%d declarações x %d itens; XML %.2f MB, JSON %.2f MB"
+        % (opcoes.declaracoes, opcoes.itens, len(xml) / 2**20, len(json) / 2**20)
+    )
+
+    casos = [("DI (XML)", importa_xml, xml)]
+    ijson = duimp.ijson
+    if ijson is not None:
+        casos.append(("DUIMP (ijson %s)" % ijson.backend, importa_duimp, json))
+    casos.append(("DUIMP (json)", None, json))
+
+    print("%24s %14s %12s" % ("formato", "µs por item", "pico (KiB)"))
+    for nome, funcao, conteudo in casos:
+        if funcao is None:
+            duimp.ijson = None
+            funcao = importa_duimp
+        try:
+            tempo, pico = mede(funcao, conteudo, opcoes.repeticoes)
+        finally:
+            duimp.ijson = ijson
+        print("%24s %14.1f %12.1f" % (nome, tempo / itens * 1e6, pico / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Vazão da leitura a partir de str (decode UTF-8 forçado) e de bytes.
+
+O caminho "str" reproduz a importação antiga: o conteúdo é decodificado como
+UTF-8 e entregue ao parser como texto, o que só funciona com xml.etree e
+falha com arquivos ISO-8859-1. O caminho "bytes" entrega o arquivo como está e
+deixa o prólogo XML decidir o encoding.
+
+    python benchmarks/bench_encoding.py [--adicoes 200] [--repeticoes 3]
+"""
+
+import argparse
+import io
+import time
+
+import sintetico
+
+from utils.parser import HANDLER_NATIVE, HANDLERS, get_parser, iter_declaracoes
+
+
+def via_str(conteudo, handler):
+    return iter_declaracoes(io.StringIO(conteudo.decode("utf-8")), handler)
+
+
+def via_bytes(conteudo, handler):
+    return iter_declaracoes(io.BytesIO(conteudo), handler)
+
+
+def cronometra(caminho, conteudo, handler, repeticoes):
+    get_parser(handler)
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _di in caminho(conteudo, handler):
+            pass
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument("--adicoes", type=int, default=200)
+    args.add_argument("--repeticoes", type=int, default=3)
+    opcoes = args.parse_args()
+
+    casos = [("str", via_str, HANDLER_NATIVE)]
+    casos += [("bytes", via_bytes, handler) for handler in sorted(HANDLERS)]
+
+    print("%-12s %-6s %-8s %10s %10s" % ("encoding", "fonte", "handler", "ms", "MB/s"))
+    for encoding in ("UTF-8", "ISO-8859-1"):
+        conteudo = sintetico.gera_lista(adicoes=opcoes.adicoes, encoding=encoding)
+        megas = len(conteudo) / 2**20
+        for fonte, caminho, handler in casos:
+            try:
+                tempo = cronometra(caminho, conteudo, handler, opcoes.repeticoes)
+            except (UnicodeDecodeError, SyntaxError) as erro:
+                print("%-12s %-6s %-8s %21s" % (encoding, fonte, handler, type(erro).__name__))
+                continue
+            print(
+                "%-12s %-6s %-8s %10.1f %10.2f"
+                % (encoding, fonte, handler, tempo * 1000, megas / tempo)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Comparação dos handlers de leitura XML (lxml x xml.etree).
+
+Lê DIs sintéticas com 10, 100 e 1000 adições com cada handler disponível em
+`utils.parser.HANDLERS` e mostra o melhor tempo de algumas repetições.
+
+    python benchmarks/bench_handlers.py [--adicoes 10 100 1000] [--repeticoes 3]
+"""
+
+import argparse
+import io
+import time
+
+import sintetico
+
+from utils.parser import HANDLERS, get_parser, iter_declaracoes
+
+
+def cronometra(conteudo, handler, repeticoes):
+    parser = get_parser(handler)
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _di in iter_declaracoes(io.BytesIO(conteudo), handler, parser):
+            pass
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument("--adicoes", type=int, nargs="+", default=[10, 100, 1000])
+    args.add_argument("--repeticoes", type=int, default=3)
+    opcoes = args.parse_args()
+
+    print("%8s %10s %8s %12s %14s" % ("adições", "MB", "handler", "tempo (ms)", "adições/s"))
+    for adicoes in opcoes.adicoes:
+        conteudo = sintetico.gera_lista(adicoes=adicoes)
+        for handler in sorted(HANDLERS):
+            tempo = cronometra(conteudo, handler, opcoes.repeticoes)
+            print(
+                "%8d %10.2f %8s %12.1f %14.0f"
+                % (adicoes, len(conteudo) / 2**20, handler, tempo * 1000, adicoes / tempo)
+            )
+
+
+if __name__ == "__main__":
+    main()
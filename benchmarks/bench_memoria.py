@@ -0,0 +1,79 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Memória ocupada por uma DI convertida, com e sem `__slots__` nos bindings.
+
+A variante sem slots é obtida carregando `utils/lista_declaracoes.py` uma
+segunda vez sem o decorador `@slotted`. A medição usa tracemalloc e considera
+apenas os objetos que permanecem vivos após a leitura.
+
+    python benchmarks/bench_memoria.py [--adicoes 10 100 1000] [--mercadorias 10]
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+import types
+
+import sintetico
+from xsdata.formats.dataclass.context import XmlContext
+from xsdata.formats.dataclass.parsers import XmlParser
+
+from utils import lista_declaracoes
+
+
+def carrega_sem_slots():
+    with open(lista_declaracoes.__file__, encoding="utf-8") as arquivo:
+        fonte = arquivo.read().replace("@slotted\n", "")
+    modulo = types.ModuleType("lista_declaracoes_sem_slots")
+    sys.modules[modulo.__name__] = modulo
+    exec(compile(fonte, modulo.__name__, "exec"), modulo.__dict__)  # nosec
+    return modulo
+
+
+def mede(modulo, conteudo):
+    context = XmlContext()
+    context.build_recursive(modulo.ListaDeclaracoes)
+    parser = XmlParser(context=context)
+
+    gc.collect()
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    lista = parser.from_bytes(conteudo, modulo.ListaDeclaracoes)
+    gc.collect()
+    ocupado = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+    del lista
+    return ocupado
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument("--adicoes", type=int, nargs="+", default=[10, 100, 1000])
+    args.add_argument("--mercadorias", type=int, default=10)
+    opcoes = args.parse_args()
+
+    variantes = [
+        ("dict", carrega_sem_slots()),
+        ("slots", lista_declaracoes),
+    ]
+    print("%8s %12s %8s %12s" % ("adições", "mercadorias", "modelo", "KiB por DI"))
+    for adicoes in opcoes.adicoes:
+        conteudo = sintetico.gera_lista(
+            adicoes=adicoes, mercadorias=opcoes.mercadorias
+        )
+        for nome, modulo in variantes:
+            print(
+                "%8d %12d %8s %12.1f"
+                % (
+                    adicoes,
+                    adicoes * opcoes.mercadorias,
+                    nome,
+                    mede(modulo, conteudo) / 1024,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
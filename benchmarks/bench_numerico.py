@@ -0,0 +1,119 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Decodificação dos valores de ponto fixo: escalar (int / escala) x NumPy.
+
+A primeira tabela mede apenas `numerico.decodifica_coluna` sobre colunas de
+textos com 15 dígitos; a segunda, a conversão completa de uma declaração
+(`converte_declaracao`) com e sem a decodificação em lote, variando o número
+de mercadorias. Antes de medir, confere que os dois caminhos produzem
+exatamente os mesmos valores.
+
+    python benchmarks/bench_numerico.py [--repeticoes 5]
+"""
+
+import argparse
+import time
+
+import sintetico
+
+from utils import numerico
+from utils.conversao import converte_declaracao
+from utils.parser import iter_declaracoes
+
+# Quantidades (D5), a coluna mais comum nas mercadorias.
+ESCALA = 10**5
+
+
+def melhor_tempo(funcao, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor
+
+
+def coluna(tamanho):
+    return ["%015d" % (i * 7919 + 13) for i in range(tamanho)]
+
+
+def bench_colunas(repeticoes):
+    print("%8s %14s %14s %8s" % ("valores", "escalar ns/v", "numpy ns/v", "ganho"))
+    for tamanho in (10, 64, 100, 1000, 10000, 100000):
+        textos = coluna(tamanho)
+        esperado = numerico.decodifica_escalar(textos, ESCALA)
+        assert numerico._decodifica_numpy(textos, ESCALA) == esperado
+
+        escalar = melhor_tempo(
+            lambda: numerico.decodifica_escalar(textos, ESCALA), repeticoes
+        )
+        vetorizado = melhor_tempo(
+            lambda: numerico._decodifica_numpy(textos, ESCALA), repeticoes
+        )
+        print(
+            "%8d %14.1f %14.1f %7.2fx"
+            % (
+                tamanho,
+                escalar / tamanho * 1e9,
+                vetorizado / tamanho * 1e9,
+                escalar / vetorizado,
+            )
+        )
+
+
+def bench_declaracoes(repeticoes):
+    print()
+    print(
+        "%8s %12s %12s %12s %8s"
+        % ("adições", "mercadorias", "escalar ms", "lote ms", "ganho")
+    )
+    minimo = numerico.MINIMO_VETORIZADO
+    for adicoes, mercadorias in ((5, 3), (50, 10), (200, 10), (500, 20)):
+        conteudo = sintetico.gera_lista(adicoes=adicoes, mercadorias=mercadorias)
+        (di,) = iter_declaracoes(conteudo)
+
+        # Os dois caminhos são alternados a cada repetição para que variações
+        # da máquina afetem ambos igualmente.
+        escalar = lote = float("inf")
+        try:
+            for _ in range(repeticoes):
+                numerico.MINIMO_VETORIZADO = float("inf")
+                esperado = converte_declaracao(di)
+                escalar = min(
+                    escalar, melhor_tempo(lambda: converte_declaracao(di), 1)
+                )
+                numerico.MINIMO_VETORIZADO = minimo
+                assert converte_declaracao(di) == esperado
+                lote = min(lote, melhor_tempo(lambda: converte_declaracao(di), 1))
+        finally:
+            numerico.MINIMO_VETORIZADO = minimo
+
+        print(
+            "%8d %12d %12.2f %12.2f %7.2fx"
+            % (
+                adicoes,
+                adicoes * mercadorias,
+                escalar * 1e3,
+                lote * 1e3,
+                escalar / lote,
+            )
+        )
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument("--repeticoes", type=int, default=5)
+    opcoes = args.parse_args()
+
+    if not numerico.disponivel():
+        print("NumPy não está instalado; apenas o caminho escalar está disponível.")
+        return
+
+    bench_colunas(opcoes.repeticoes)
+    bench_declaracoes(opcoes.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Geração de arquivos "lista" sintéticos para os benchmarks.
+
+Os elementos são derivados dos próprios bindings de `utils.lista_declaracoes`,
+de modo que todo campo mapeado recebe um valor no formato do SISCOMEX:
+inteiros com zeros à esquerda para valores e quantidades e AAAAMMDD para datas.
+
+`gera_duimp` monta o JSON equivalente de DUIMPs a partir da tabela
+`utils.duimp.MAPEAMENTOS_DUIMP`.
+"""
+
+import dataclasses
+import json
+import os
+import sys
+import typing
+from xml.sax.saxutils import escape
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ADDON_DIR not in sys.path:
+    sys.path.insert(0, ADDON_DIR)
+
+from xsdata.models.datatype import XmlPeriod  # noqa: E402
+
+from utils import duimp, lista_declaracoes  # noqa: E402
+
+
+def _tipo(hint):
+    """Retorna (classe, é_lista) a partir da anotação do campo."""
+    origem = getattr(hint, "__origin__", None)
+    if origem in (list, typing.List):
+        return hint.__args__[0], True
+    if origem is typing.Union:
+        args = [a for a in hint.__args__ if a is not type(None)]  # noqa: E721
+        return args[0], False
+    return hint, False
+
+
+def _valor(nome, tipo, seq):
+    if nome.startswith("data") or "Data" in nome:
+        return "20240115"
+    if tipo is XmlPeriod:
+        return "--01"
+    if tipo is int:
+        return str(seq % 1000 + 1)
+    if "nome" in nome.lower() or "descricao" in nome.lower():
+        return escape("%s Importação %05d" % (nome, seq))
+    return "%015d" % (seq * 1234 + 100)
+
+
+def _elemento(clazz, partes, contagens, seq, tag=None):
+    tag = tag or clazz.Meta.name
+    partes.append("<%s>" % tag)
+    hints = typing.get_type_hints(clazz)
+    for campo in dataclasses.fields(clazz):
+        nome = campo.metadata.get("name", campo.name)
+        tipo, lista = _tipo(hints[campo.name])
+        if dataclasses.is_dataclass(tipo):
+            total = contagens.get(campo.name, 1) if lista else 1
+            for i in range(total):
+                _elemento(tipo, partes, contagens, seq + i + 1, nome)
+        else:
+            partes.append("<%s>%s</%s>" % (nome, _valor(nome, tipo, seq), nome))
+    partes.append("</%s>" % tag)
+
+
+def gera_lista(declaracoes=1, adicoes=10, mercadorias=3, encoding="UTF-8"):
+    """
+    Monta um arquivo ListaDeclaracoes com `declaracoes` DIs, cada uma com
+    `adicoes` adições de `mercadorias` mercadorias, e retorna seus bytes.
+    """
+    contagens = {
+        "adicao": adicoes,
+        "mercadoria": mercadorias,
+        "pagamento": 3,
+        "documento_instrucao_despacho": 2,
+    }
+    partes = ['<?xml version="1.0" encoding="%s"?>' % encoding, "<ListaDeclaracoes>"]
+    for i in range(declaracoes):
+        _elemento(
+            lista_declaracoes.DeclaracaoImportacao, partes, contagens, i * 100000
+        )
+    partes.append("</ListaDeclaracoes>")
+    return "".join(partes).encode(encoding)
+
+
+def _valor_duimp(caminho, tipo, seq):
+    if tipo == duimp.NUMERO:
+        return (seq * 1234 + 100) / 100
+    if tipo == duimp.INTEIRO:
+        return seq % 1000 + 1
+    if tipo == duimp.DATA_ISO:
+        return "2024-01-15T10:30:00-03:00"
+    if "nome" in caminho or "descricao" in caminho:
+        return "%s Importação %05d" % (caminho, seq)
+    return "%015d" % (seq * 1234 + 100)
+
+
+def _objeto_duimp(registro, seq):
+    objeto = {}
+    for _campo, tipo, caminho in duimp.MAPEAMENTOS_DUIMP[registro][1]:
+        *pais, ultimo = caminho.split(".")
+        destino = objeto
+        for parte in pais:
+            destino = destino.setdefault(parte, {})
+        destino[ultimo] = _valor_duimp(caminho, tipo, seq)
+    return objeto
+
+
+def _lista_duimp(registro, total, seq):
+    return [_objeto_duimp(registro, seq + i + 1) for i in range(total)]
+
+
+def gera_duimp(declaracoes=1, itens=30):
+    """
+    Monta um arquivo JSON com `declaracoes` DUIMPs de `itens` itens (com um
+    acréscimo e uma dedução cada) e retorna seus bytes.
+    """
+    lista = []
+    for i in range(declaracoes):
+        seq = i * 100000
+        objeto = _objeto_duimp("declaracao", seq)
+        itens_duimp = []
+        for j in range(itens):
+            item = _objeto_duimp("item", seq + j)
+            item.update(_objeto_duimp("mercadoria", seq + j))
+            item["acrescimos"] = _lista_duimp("acrescimo", 1, seq + j)
+            item["deducoes"] = _lista_duimp("deducao", 1, seq + j)
+            itens_duimp.append(item)
+        objeto["itens"] = itens_duimp
+        objeto["documentos"] = _lista_duimp("documento", 2, seq)
+        objeto["pagamentos"] = _lista_duimp("pagamento", 3, seq)
+        objeto.setdefault("carga", {})["embalagens"] = _lista_duimp(
+            "embalagem", 1, seq
+        )
+        lista.append(objeto)
+    return json.dumps(lista, ensure_ascii=False, indent=1).encode("utf-8")
@@ -0,0 +1,80 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import json
+import logging
+
+import psycopg2
+
+from odoo import _, http
+from odoo.exceptions import UserError, ValidationError
+from odoo.http import request
+
+_logger = logging.getLogger(__name__)
+
+# Resposta lida pelo campo de arquivos do formulário, no mesmo formato de
+# /web/binary/upload_attachment.
+RESPOSTA_CALLBACK = """<script language="javascript" type="text/javascript">
+    var win = window.top.window;
+    win.jQuery(win).trigger(%s, %s);
+</script>"""
+
+
+def _json_html(valor):
+    return json.dumps(valor).replace("<", "\\u003c")
+
+
+class DeclaracaoImportacaoController(http.Controller):
+    @http.route(
+        "/declaracao_importacao/upload", type="http", auth="user", methods=["POST"]
+    )
+    def upload(self, callback=None, **kwargs):
+        """
+        Recebe um ou mais arquivos (campo `ufile`, multipart) e os grava como
+        anexos sem carregá-los na memória: o werkzeug guarda o corpo da
+        requisição em um arquivo temporário e `_cria_de_arquivo` o copia em
+        blocos para o filestore.
+
+        É o destino do campo Arquivos do assistente de importação (widget
+        `many2many_binary_declaracao`), que envia `callback` e recebe a resposta
+        no formato de /web/binary/upload_attachment. Sem `callback`, retorna a
+        lista de anexos em JSON, para uso em `importa_lote`.
+
+        Cada arquivo é gravado em seu próprio savepoint: um arquivo que falha
+        (inclusive no banco) é desfeito sozinho e relatado na resposta, sem
+        impedir a gravação dos demais.
+        """
+        attachment_model = request.env["ir.attachment"]
+        anexos = []
+        for ufile in request.httprequest.files.getlist("ufile"):
+            try:
+                with request.env.cr.savepoint():
+                    attachment = attachment_model._cria_de_arquivo(
+                        ufile.filename,
+                        ufile.stream,
+                        {
+                            "res_model": "declaracao_importacao.importa_di.wizard",
+                            "mimetype": ufile.content_type,
+                        },
+                    )
+            except (UserError, ValidationError, psycopg2.Error, OSError):
+                _logger.exception("Erro ao gravar o arquivo %s", ufile.filename)
+                anexos.append(
+                    {"error": _("Não foi possível gravar o arquivo %s") % ufile.filename}
+                )
+                continue
+            anexos.append(
+                {
+                    "id": attachment.id,
+                    "name": attachment.name,
+                    "filename": attachment.name,
+                    "mimetype": attachment.mimetype,
+                    "size": attachment.file_size,
+                }
+            )
+        if callback:
+            return request.make_response(
+                RESPOSTA_CALLBACK % (_json_html(callback), _json_html(anexos))
+            )
+        return request.make_response(
+            json.dumps(anexos), headers=[("Content-Type", "application/json")]
+        )
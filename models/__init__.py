@@ -5,8 +5,15 @@ from . import l10n_br_di_mercadoria
 from . import l10n_br_di_despacho
 from . import l10n_br_di_pagamento
 from . import l10n_br_di_valor
+from . import l10n_br_di_armazem
+from . import l10n_br_di_embalagem
+from . import l10n_br_di_declaracao_ee
+from . import l10n_br_di_ingestao
+from . import l10n_br_di_de_para
 from . import res_currency
+from . import res_partner
 from . import res_company
+from . import ir_attachment
 from . import account_move_line
 # from . import account_move
-#from . import fiscal_document_line
+# from . import fiscal_document_line
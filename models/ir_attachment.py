@@ -0,0 +1,89 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import filecmp
+import hashlib
+import os
+import shutil
+import tempfile
+
+from odoo import _, api, models
+from odoo.exceptions import UserError
+
+# Tamanho dos blocos copiados do arquivo enviado para o filestore.
+TAMANHO_BLOCO = 2**20
+
+
+class IrAttachment(models.Model):
+    _inherit = "ir.attachment"
+
+    @api.model
+    def _cria_de_arquivo(self, nome, stream, vals=None):
+        """
+        Cria um anexo a partir de um fluxo binário sem carregá-lo na memória.
+
+        O conteúdo é copiado em blocos para um arquivo temporário dentro do
+        filestore, calculando o SHA-1 ao mesmo tempo, e depois movido para o
+        caminho definitivo. Com os anexos gravados no banco (parâmetro
+        `ir_attachment.location`) não há como evitar a leitura completa, e o
+        anexo é criado da forma padrão.
+        """
+        vals = dict(vals or {}, name=nome, type="binary")
+        if self._storage() != "file":
+            return self.create(dict(vals, raw=stream.read()))
+
+        diretorio = self._full_path("")
+        os.makedirs(diretorio, exist_ok=True)
+        digest = hashlib.sha1()
+        tamanho = 0
+        with tempfile.NamedTemporaryFile(dir=diretorio, delete=False) as temporario:
+            try:
+                for bloco in iter(lambda: stream.read(TAMANHO_BLOCO), b""):
+                    digest.update(bloco)
+                    tamanho += len(bloco)
+                    temporario.write(bloco)
+            except Exception:
+                os.unlink(temporario.name)
+                raise
+
+        checksum = digest.hexdigest()
+        fname = "%s/%s" % (checksum[:2], checksum)
+        caminho = self._full_path(fname)
+        if os.path.isfile(caminho):
+            iguais = filecmp.cmp(temporario.name, caminho, shallow=False)
+            os.unlink(temporario.name)
+            if not iguais:
+                raise UserError(_("O anexo colide com um arquivo existente."))
+        else:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            shutil.move(temporario.name, caminho)
+            # Como em _file_write: removido pelo GC se a transação for desfeita.
+            self._mark_for_gc(fname)
+
+        return self._cria_no_filestore(vals, fname, checksum, tamanho)
+
+    @api.model
+    def _cria_no_filestore(self, vals, fname, checksum, tamanho):
+        attachment = self.create(dict(vals, store_fname=fname))
+        # create/write descartam checksum e file_size, que o ORM só calcula a
+        # partir do conteúdo em memória.
+        attachment.sudo()._write({"checksum": checksum, "file_size": tamanho})
+        return attachment
+
+    def _copia_para(self, record, campo):
+        """
+        Vincula o conteúdo deste anexo ao campo binário `campo` de `record`,
+        criando um novo anexo que aponta para o mesmo arquivo do filestore.
+        """
+        self.ensure_one()
+        vals = {
+            "name": campo,
+            "res_model": record._name,
+            "res_id": record.id,
+            "res_field": campo,
+            "mimetype": self.mimetype,
+        }
+        if not self.store_fname:
+            return self.sudo().create(dict(vals, raw=self.raw))
+        return self.sudo()._cria_no_filestore(
+            vals, self.store_fname, self.checksum, self.file_size
+        )
@@ -2,11 +2,24 @@
 # Copyright 2024 KMEE
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from odoo import api, fields, models
+from psycopg2 import IntegrityError, errorcodes
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import mute_logger
+
+from ..utils.normalizacao import normaliza_texto
+
 import logging
 _logger = logging.getLogger(__name__)
 
-from .l10n_br_di_declaracao import D2
+
+class ParceiroConcorrente(UserError):
+    """
+    Parceiro gravado por outra importação depois do início desta transação:
+    a restrição única o enxerga, mas a leitura não. A importação deve ser
+    repetida em uma nova transação, como faz a importação da pasta.
+    """
 
 
 class L10nBrDiAdicao(models.Model):
@@ -194,229 +207,195 @@ class L10nBrDiAdicao(models.Model):
     valor_taxa_afrmm = fields.Monetary(currency_field="currency_id")
     valor_outros = fields.Monetary(currency_field="currency_id")
 
-    def _importa_declaracao(self, adicao):
-        mercadorias = []
-        valores = []
+    def _importa_declaracao(self, dados):
+        vals = dict(dados)
 
-        for despacho in adicao.mercadoria:
-            mercadorias.append(
-                self.di_adicao_mercadoria_ids._importa_declaracao(despacho)
-            )
-        if adicao.deducao or adicao.acrescimo:
-            valores = self.di_adicao_valor_ids._importa_declaracao(
-                adicao.acrescimo, adicao.deducao
-            )
+        moeda_venda_id = self._s_currency(vals["condicao_venda_moeda_codigo"])
+        moeda_seguro_id = self._s_currency(vals["seguro_moeda_negociada_codigo"])
+        moeda_frete_id = self._s_currency(vals["frete_moeda_negociada_codigo"])
 
-        moeda_venda_id = self._s_currency(adicao.condicao_venda_moeda_codigo)
-        moeda_seguro_id = self._s_currency(adicao.seguro_moeda_negociada_codigo)
-        moeda_frete_id = self._s_currency(adicao.frete_moeda_negociada_codigo)
-
-        condicao_venda_valor_reais = int(adicao.condicao_venda_valor_reais) / D2
-        condicao_venda_valor_moeda = int(adicao.condicao_venda_valor_moeda) / D2
-
-        if condicao_venda_valor_reais and condicao_venda_valor_moeda:
-            taxa_cambio_venda = condicao_venda_valor_reais / condicao_venda_valor_moeda
-        else:
-            taxa_cambio_venda = 1
-
-        frete_valor_moeda_negociada = int(adicao.frete_valor_moeda_negociada) / D2
-        frete_valor_reais = int(adicao.frete_valor_reais) / D2
-
-        if frete_valor_reais and frete_valor_moeda_negociada:
-            taxa_cambio_frete = frete_valor_reais / frete_valor_moeda_negociada
-        else:
-            taxa_cambio_frete = 1
-
-        seguro_valor_moeda_negociada = int(adicao.seguro_valor_moeda_negociada) / D2
-        seguro_valor_reais = int(adicao.seguro_valor_reais) / D2
-
-        if seguro_valor_reais and seguro_valor_moeda_negociada:
-            taxa_cambio_seguro = seguro_valor_reais / seguro_valor_moeda_negociada
-        else:
-            taxa_cambio_seguro = 1
-
-        vals = {
-            "moeda_venda_id": moeda_venda_id.id if moeda_venda_id else False,
-            "moeda_seguro_id": moeda_seguro_id.id if moeda_seguro_id else False,
-            "moeda_frete_id": moeda_frete_id.id if moeda_frete_id else False,
-            "taxa_cambio_venda": taxa_cambio_venda,
-            "taxa_cambio_seguro": taxa_cambio_seguro,
-            "taxa_cambio_frete": taxa_cambio_frete,
-            "di_adicao_mercadoria_ids": [(0, 0, x) for x in mercadorias],
-            "di_adicao_valor_ids": [(0, 0, x) for x in valores],
-            "valor_total_condicao_venda": int(adicao.valor_total_condicao_venda) / D2,
-            "cide_valor_aliquota_especifica": adicao.cide_valor_aliquota_especifica,
-            "cide_valor_devido": adicao.cide_valor_devido,
-            "cide_valor_recolher": adicao.cide_valor_recolher,
-            "codigo_relacao_comprador_vendedor": adicao.codigo_relacao_comprador_vendedor,
-            "codigo_vinculo_comprador_vendedor": adicao.codigo_vinculo_comprador_vendedor,
-            "cofins_aliquota_ad_valorem": adicao.cofins_aliquota_ad_valorem,
-            "cofins_aliquota_especifica_quantidade_unidade": adicao.cofins_aliquota_especifica_quantidade_unidade,
-            "cofins_aliquota_especifica_valor": adicao.cofins_aliquota_especifica_valor,
-            "cofins_aliquota_reduzida": adicao.cofins_aliquota_reduzida,
-            "cofins_aliquota_valor_devido": adicao.cofins_aliquota_valor_devido,
-            "cofins_aliquota_valor_recolher": adicao.cofins_aliquota_valor_recolher,
-            "condicao_venda_incoterm": adicao.condicao_venda_incoterm,
-            "condicao_venda_local": adicao.condicao_venda_local,
-            "condicao_venda_metodo_valoracao_codigo": adicao.condicao_venda_metodo_valoracao_codigo,
-            "condicao_venda_metodo_valoracao_nome": adicao.condicao_venda_metodo_valoracao_nome,
-            "condicao_venda_moeda_codigo": adicao.condicao_venda_moeda_codigo,
-            "condicao_venda_moeda_nome": adicao.condicao_venda_moeda_nome,
-            "condicao_venda_valor_moeda": condicao_venda_valor_moeda,
-            "condicao_venda_valor_reais": condicao_venda_valor_reais,
-            "dados_cambiais_cobertura_cambial_codigo": adicao.dados_cambiais_cobertura_cambial_codigo,
-            "dados_cambiais_cobertura_cambial_nome": adicao.dados_cambiais_cobertura_cambial_nome,
-            "dados_cambiais_instituicao_financiadora_codigo": adicao.dados_cambiais_instituicao_financiadora_codigo,
-            "dados_cambiais_instituicao_financiadora_nome": adicao.dados_cambiais_instituicao_financiadora_nome,
-            "dados_cambiais_motivo_sem_cobertura_codigo": adicao.dados_cambiais_motivo_sem_cobertura_codigo,
-            "dados_cambiais_motivo_sem_cobertura_nome": adicao.dados_cambiais_motivo_sem_cobertura_nome,
-            "dados_cambiais_valor_real_cambio": adicao.dados_cambiais_valor_real_cambio,
-            "dados_carga_pais_procedencia_codigo": adicao.dados_carga_pais_procedencia_codigo,
-            "dados_carga_urf_entrada_codigo": adicao.dados_carga_urf_entrada_codigo,
-            "dados_carga_via_transporte_codigo": adicao.dados_carga_via_transporte_codigo,
-            "dados_mercadoria_aplicacao": adicao.dados_mercadoria_aplicacao,
-            "dados_mercadoria_codigo_naladi_ncca": adicao.dados_mercadoria_codigo_naladi_ncca,
-            "dados_mercadoria_codigo_naladi_sh": adicao.dados_mercadoria_codigo_naladi_sh,
-            "dados_mercadoria_codigo_ncm": adicao.dados_mercadoria_codigo_ncm,
-            "dados_mercadoria_condicao": adicao.dados_mercadoria_condicao,
-            "dados_mercadoria_medida_estatistica_quantidade": adicao.dados_mercadoria_medida_estatistica_quantidade,
-            "dados_mercadoria_medida_estatistica_unidade": adicao.dados_mercadoria_medida_estatistica_unidade,
-            "dados_mercadoria_nome_ncm": adicao.dados_mercadoria_nome_ncm,
-            "dados_mercadoria_peso_liquido": adicao.dados_mercadoria_peso_liquido,
-            "dcr_coeficiente_reducao": adicao.dcr_coeficiente_reducao,
-            "dcr_identificacao": adicao.dcr_identificacao,
-            "dcr_valor_devido": adicao.dcr_valor_devido,
-            "dcr_valor_dolar": adicao.dcr_valor_dolar,
-            "dcr_valor_real": adicao.dcr_valor_real,
-            "dcr_valor_recolher": adicao.dcr_valor_recolher,
-            "fabricante_cidade": adicao.fabricante_cidade,
-            "fabricante_estado": adicao.fabricante_estado,
-            "fabricante_logradouro": adicao.fabricante_logradouro,
-            "fabricante_nome": adicao.fabricante_nome,
-            "fabricante_numero": adicao.fabricante_numero,
-            "fornecedor_cidade": adicao.fornecedor_cidade,
-            "fornecedor_complemento": adicao.fornecedor_complemento,
-            "fornecedor_estado": adicao.fornecedor_estado,
-            "fornecedor_logradouro": adicao.fornecedor_logradouro,
-            "fornecedor_nome": adicao.fornecedor_nome,
-            "fornecedor_numero": adicao.fornecedor_numero,
-            "frete_moeda_negociada_codigo": adicao.frete_moeda_negociada_codigo,
-            "frete_valor_moeda_negociada": frete_valor_moeda_negociada,
-            "frete_valor_reais": frete_valor_reais,
-            "ii_acordo_tarifario_aladi_codigo": adicao.ii_acordo_tarifario_aladi_codigo,
-            "ii_acordo_tarifario_aladi_nome": adicao.ii_acordo_tarifario_aladi_nome,
-            "ii_acordo_tarifario_ato_legal_ano": adicao.ii_acordo_tarifario_ato_legal_ano,
-            "ii_acordo_tarifario_ato_legal_codigo": adicao.ii_acordo_tarifario_ato_legal_codigo,
-            "ii_acordo_tarifario_ato_legal_ex": adicao.ii_acordo_tarifario_ato_legal_ex,
-            "ii_acordo_tarifario_ato_legal_numero": adicao.ii_acordo_tarifario_ato_legal_numero,
-            "ii_acordo_tarifario_ato_legal_orgao_emissor": adicao.ii_acordo_tarifario_ato_legal_orgao_emissor,
-            "ii_acordo_tarifario_tipo_codigo": adicao.ii_acordo_tarifario_tipo_codigo,
-            "ii_acordo_tarifario_tipo_nome": adicao.ii_acordo_tarifario_tipo_nome,
-            "ii_aliquota_acordo": adicao.ii_aliquota_acordo,
-            "ii_aliquota_ad_valorem": adicao.ii_aliquota_ad_valorem,
-            "ii_aliquota_percentual_reducao": adicao.ii_aliquota_percentual_reducao,
-            "ii_aliquota_reduzida": adicao.ii_aliquota_reduzida,
-            "ii_aliquota_valor_calculado": adicao.ii_aliquota_valor_calculado,
-            "ii_aliquota_valor_devido": adicao.ii_aliquota_valor_devido,
-            "ii_aliquota_valor_recolher": adicao.ii_aliquota_valor_recolher,
-            "ii_aliquota_valor_reduzido": adicao.ii_aliquota_valor_reduzido,
-            "ii_base_calculo": adicao.ii_base_calculo,
-            "ii_fundamento_legal_codigo": adicao.ii_fundamento_legal_codigo,
-            "ii_motivo_admissao_temporaria_codigo": adicao.ii_motivo_admissao_temporaria_codigo,
-            "ii_regime_tributacao_codigo": adicao.ii_regime_tributacao_codigo,
-            "ii_regime_tributacao_nome": adicao.ii_regime_tributacao_nome,
-            "ipi_aliquota_ad_valorem": adicao.ipi_aliquota_ad_valorem,
-            "ipi_aliquota_especifica_capacidade_recipciente": adicao.ipi_aliquota_especifica_capacidade_recipciente,
-            "ipi_aliquota_especifica_quantidade_unidade_medida": adicao.ipi_aliquota_especifica_quantidade_unidade_medida,
-            "ipi_aliquota_especifica_tipo_recipiente_codigo": adicao.ipi_aliquota_especifica_tipo_recipiente_codigo,
-            "ipi_aliquota_especifica_valor_unidade_medida": adicao.ipi_aliquota_especifica_valor_unidade_medida,
-            "ipi_aliquota_nota_complementar_tipi": adicao.ipi_aliquota_nota_complementar_tipi,
-            "ipi_aliquota_reduzida": adicao.ipi_aliquota_reduzida,
-            "ipi_aliquota_valor_devido": adicao.ipi_aliquota_valor_devido,
-            "ipi_aliquota_valor_recolher": adicao.ipi_aliquota_valor_recolher,
-            "ipi_regime_tributacao_codigo": adicao.ipi_regime_tributacao_codigo,
-            "ipi_regime_tributacao_nome": adicao.ipi_regime_tributacao_nome,
-            "numero_adicao": adicao.numero_adicao,
-            "numero_di": adicao.numero_di,
-            "numero_li": adicao.numero_li,
-            "pais_aquisicao_mercadoria_codigo": adicao.pais_aquisicao_mercadoria_codigo,
-            "pais_aquisicao_mercadoria_nome": adicao.pais_aquisicao_mercadoria_nome,
-            "pais_origem_mercadoria_codigo": adicao.pais_origem_mercadoria_codigo,
-            "pais_origem_mercadoria_nome": adicao.pais_origem_mercadoria_nome,
-            "pis_cofins_base_calculo_aliquota_icms": adicao.pis_cofins_base_calculo_aliquota_icms,
-            "pis_cofins_base_calculo_fundamento_legal_codigo": adicao.pis_cofins_base_calculo_fundamento_legal_codigo,
-            "pis_cofins_base_calculo_percentual_reducao": adicao.pis_cofins_base_calculo_percentual_reducao,
-            "pis_cofins_base_calculo_valor": adicao.pis_cofins_base_calculo_valor,
-            "pis_cofins_fundamento_legal_reducao_codigo": adicao.pis_cofins_fundamento_legal_reducao_codigo,
-            "pis_cofins_regime_tributacao_codigo": adicao.pis_cofins_regime_tributacao_codigo,
-            "pis_cofins_regime_tributacao_nome": adicao.pis_cofins_regime_tributacao_nome,
-            "pis_pasep_aliquota_ad_valorem": adicao.pis_pasep_aliquota_ad_valorem,
-            "pis_pasep_aliquota_especifica_quantidade_unidade": adicao.pis_pasep_aliquota_especifica_quantidade_unidade,
-            "pis_pasep_aliquota_especifica_valor": adicao.pis_pasep_aliquota_especifica_valor,
-            "pis_pasep_aliquota_reduzida": adicao.pis_pasep_aliquota_reduzida,
-            "pis_pasep_aliquota_valor_devido": adicao.pis_pasep_aliquota_valor_devido,
-            "pis_pasep_aliquota_valor_recolher": adicao.pis_pasep_aliquota_valor_recolher,
-            "relacao_comprador_vendedor": adicao.relacao_comprador_vendedor,
-            "seguro_moeda_negociada_codigo": adicao.seguro_moeda_negociada_codigo,
-            "seguro_valor_moeda_negociada": seguro_valor_moeda_negociada,
-            "seguro_valor_reais": seguro_valor_reais,
-            "sequencial_retificacao": adicao.sequencial_retificacao,
-            "valor_multa_arecolher": adicao.valor_multa_arecolher,
-            "valor_multa_arecolher_ajustado": adicao.valor_multa_arecolher_ajustado,
-            "valor_reais_frete_internacional": int(
-                adicao.valor_reais_frete_internacional
+        if vals["fabricante_nome"]:
+            manufacturer_id = self._busca_parceiro(
+                vals["fabricante_nome"],
+                vals["fabricante_numero"],
+                vals["fabricante_logradouro"],
+                vals["fabricante_cidade"],
             )
-            / D2,
-            "valor_reais_seguro_internacional": int(
-                adicao.valor_reais_seguro_internacional
-            )
-            / D2,
-            "vinculo_comprador_vendedor": adicao.vinculo_comprador_vendedor,
-        }
-        _logger.info('Vals adicaoo: %s', vals)
-
-        if adicao.fabricante_nome:
-
-            manufacturer_id = self.env["res.partner"].search(
-                [("name", "=", adicao.fabricante_nome)]
-            )
-            if not manufacturer_id:
-                manufacturer_id = self.env["res.partner"].create(
-                    {
-                        "name": adicao.fabricante_nome,
-                        "legal_name": adicao.fabricante_nome,
-                        "street_number": adicao.fabricante_numero,
-                        "street": adicao.fabricante_logradouro,
-                        "city": adicao.fabricante_cidade,
-                    }
-                )
             vals.update(
                 {
                     "fabricante_partner_id": manufacturer_id.id,
                 }
             )
 
-        fornecedor_partner_id = self.env["res.partner"].search(
-            [("name", "=", adicao.fornecedor_nome)]
+        # O fornecedor vem antes das mercadorias, que o usam no de-para de produtos.
+        fornecedor_partner_id = self._busca_parceiro(
+            vals["fornecedor_nome"],
+            vals["fornecedor_numero"],
+            vals["fornecedor_logradouro"],
+            vals["fornecedor_cidade"],
         )
-        if not fornecedor_partner_id:
-            fornecedor_partner_id = self.env["res.partner"].create(
-                {
-                    "name": adicao.fornecedor_nome,
-                    "legal_name": adicao.fornecedor_nome,
-                    "street_number": adicao.fornecedor_numero,
-                    "street": adicao.fornecedor_logradouro,
-                    "city": adicao.fornecedor_cidade,
-                }
-            )
+
         vals.update(
             {
                 "fornecedor_partner_id": fornecedor_partner_id.id,
+                "moeda_venda_id": moeda_venda_id.id if moeda_venda_id else False,
+                "moeda_seguro_id": moeda_seguro_id.id if moeda_seguro_id else False,
+                "moeda_frete_id": moeda_frete_id.id if moeda_frete_id else False,
+                "di_adicao_mercadoria_ids": [
+                    (
+                        0,
+                        0,
+                        self.di_adicao_mercadoria_ids._importa_declaracao(
+                            x, fornecedor_partner_id.id
+                        ),
+                    )
+                    for x in dados["di_adicao_mercadoria_ids"]
+                ],
+                "di_adicao_valor_ids": [
+                    (0, 0, self.di_adicao_valor_ids._importa_declaracao(x))
+                    for x in dados["di_adicao_valor_ids"]
+                ],
             }
         )
-
         return vals
 
+    def _parceiros_adicoes(self, adicoes):
+        """
+        (nome, número, logradouro, cidade) do fabricante e do fornecedor de cada
+        adição convertida, na ordem do arquivo.
+        """
+        for dados in adicoes:
+            for prefixo in ("fabricante", "fornecedor"):
+                yield (
+                    dados[prefixo + "_nome"],
+                    dados[prefixo + "_numero"],
+                    dados[prefixo + "_logradouro"],
+                    dados[prefixo + "_cidade"],
+                )
+
+    def _busca_parceiros(self, parceiros):
+        """
+        Resolve de uma só vez os parceiros (nome, número, logradouro, cidade)
+        informados, pela chave `normaliza_texto(nome)`: as chaves ainda fora do
+        cache do lote são buscadas de uma vez pelo campo indexado
+        `di_nome_normalizado` e, para os parceiros cadastrados manualmente, pelo
+        nome exato. As que não existem são criadas por `_cria_parceiros`, com o
+        endereço da primeira ocorrência. Na pré-visualização os nomes novos são
+        apenas anotados. Retorna {nome: res.partner}.
+
+        A chave é única no banco inteiro, por isso é buscada sem regras de
+        acesso e incluindo os parceiros arquivados (`_parceiros_por_chave`): um
+        parceiro importado que foi arquivado, ou que o usuário não enxerga, é
+        reaproveitado como está, em vez de a criação esbarrar na restrição
+        única a cada importação.
+        """
+        partner_model = self.env["res.partner"]
+        cache = self._cache_lote("res.partner")
+        chaves = {}
+        faltantes = {}
+        for nome, numero, logradouro, cidade in parceiros:
+            if not nome or nome in chaves:
+                continue
+            chave = chaves[nome] = normaliza_texto(nome)
+            if chave and chave not in cache and chave not in faltantes:
+                faltantes[chave] = {
+                    "name": nome,
+                    "legal_name": nome,
+                    "street_number": numero,
+                    "street": logradouro,
+                    "city": cidade,
+                    "di_nome_normalizado": chave,
+                }
+
+        if faltantes:
+            for chave, partner_id in self._parceiros_por_chave(faltantes).items():
+                cache[chave] = [partner_id]
+                del faltantes[chave]
+
+        if faltantes:
+            nomes = [nome for nome, chave in chaves.items() if chave in faltantes]
+            for partner in partner_model.search_read(
+                [("name", "in", nomes)], ["name"]
+            ):
+                chave = normaliza_texto(partner["name"])
+                if chave in faltantes:
+                    cache[chave] = [partner["id"]]
+                    del faltantes[chave]
+
+        if faltantes:
+            previa = self._previa()
+            if previa is not None:
+                previa["parceiros"].update(x["name"] for x in faltantes.values())
+                cache.update((chave, []) for chave in faltantes)
+            else:
+                cache.update(self._cria_parceiros(faltantes))
+
+        return {
+            nome: partner_model.browse(cache.get(chave, []))
+            for nome, chave in chaves.items()
+        }
+
+    def _parceiros_por_chave(self, chaves):
+        """
+        {chave: id} dos parceiros com `di_nome_normalizado` em `chaves`, lidos
+        como superusuário e incluindo os arquivados, como a restrição única os
+        enxerga.
+        """
+        return {
+            partner["di_nome_normalizado"]: partner["id"]
+            for partner in self.env["res.partner"]
+            .sudo()
+            .with_context(active_test=False)
+            .search_read(
+                [("di_nome_normalizado", "in", list(chaves))], ["di_nome_normalizado"]
+            )
+        }
+
+    def _cria_parceiros(self, faltantes):
+        """
+        Cria os parceiros {chave: vals} em um único `create` e retorna
+        {chave: ids}. Se outra importação gravou alguma das chaves ao mesmo
+        tempo, a restrição única de `di_nome_normalizado` rejeita o lote; cada
+        parceiro é então criado em separado e, nas chaves repetidas, fica o
+        parceiro existente. Se nem a leitura sem regras de acesso e com os
+        arquivados o encontra, ele foi gravado por outra transação depois do
+        início desta (o Odoo usa REPEATABLE READ): levanta
+        `ParceiroConcorrente`, pedindo que a importação seja repetida.
+        """
+        partner_model = self.env["res.partner"]
+        try:
+            with self.env.cr.savepoint(), mute_logger("odoo.sql_db"):
+                novos = partner_model.create(list(faltantes.values()))
+            return {chave: [x] for chave, x in zip(faltantes, novos.ids)}
+        except IntegrityError as erro:
+            if erro.pgcode != errorcodes.UNIQUE_VIOLATION:
+                raise
+
+        ids = {}
+        for chave, vals in faltantes.items():
+            try:
+                with self.env.cr.savepoint(), mute_logger("odoo.sql_db"):
+                    ids[chave] = partner_model.create(vals).ids
+            except IntegrityError as erro:
+                if erro.pgcode != errorcodes.UNIQUE_VIOLATION:
+                    raise
+                existente = self._parceiros_por_chave([chave]).get(chave)
+                if not existente:
+                    raise ParceiroConcorrente(
+                        _(
+                            "O parceiro %s foi criado por outra importação ao "
+                            "mesmo tempo. Importe o arquivo novamente."
+                        )
+                        % vals["name"]
+                    ) from None
+                ids[chave] = [existente]
+        return ids
+
+    def _busca_parceiro(self, nome, numero, logradouro, cidade):
+        if not nome:
+            return self.env["res.partner"]
+        return self._busca_parceiros([(nome, numero, logradouro, cidade)])[nome]
+
     def calcular_declaracao(self):
         for record in self:
             valor_deducao = 0
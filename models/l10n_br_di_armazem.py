@@ -0,0 +1,36 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Este módulo define o modelo `L10nBrDiArmazem`, que representa os armazéns informados
+em uma Declaração de Importação (DI) no Odoo.
+
+Classes:
+    - L10nBrDiArmazem: Um modelo Odoo que armazena o armazém de uma Declaração de Importação.
+
+Campos:
+    - declaracao_id: Campo Many2one que vincula o armazém à declaração de importação correspondente.
+    - nome_armazem: Campo Char que armazena o nome do armazém.
+
+Conversão:
+    - O campo `nome_armazem` é extraído do XML por `utils.conversao.converte_armazem` e gravado
+      diretamente pela declaração, junto com as adições, pois o armazém não tem campos relacionais.
+"""
+
+from odoo import fields, models
+
+
+class L10nBrDiArmazem(models.Model):
+
+    _name = "declaracao_importacao.armazem"
+    _description = "Declaração de Importação Armazém"
+    _rec_name = "nome_armazem"
+
+    declaracao_id = fields.Many2one(
+        "declaracao_importacao.declaracao",
+        string="Declaração",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    nome_armazem = fields.Char(string="Armazém", index=True)
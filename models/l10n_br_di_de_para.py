@@ -0,0 +1,181 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Este módulo define o modelo `L10nBrDiDePara`, que guarda os produtos já associados
+às mercadorias de cada fornecedor.
+
+Classes:
+    - L10nBrDiDePara: Um modelo Odoo que relaciona (fornecedor, descrição, unidade) de uma
+      mercadoria ao produto escolhido pelo usuário.
+
+Campos:
+    - fornecedor_partner_id: Campo Many2one com o fornecedor da adição.
+    - descricao_mercadoria: Campo Char com a última descrição original associada.
+    - descricao_normalizada: Campo Char com a descrição normalizada por `utils.normalizacao`.
+    - unidade_medida: Campo Char com a unidade de medida normalizada.
+    - product_id: Campo Many2one com o produto associado.
+    - uom_id: Campo Many2one com a unidade de medida do produto.
+
+Métodos:
+    - _mapa_fornecedor(fornecedor_id): Retorna {(descrição, unidade): (produto, unidade do produto)}
+      de um fornecedor.
+    - _aprende(mercadorias): Grava a associação das mercadorias que têm produto.
+    - _atualiza(novos): Grava o produto das associações que já existem.
+    - _cria(novos): Cria as associações que ainda não existem.
+
+Detalhamento dos métodos:
+    - _mapa_fornecedor: Lê em uma única consulta, pelo índice único, todas as associações do
+      fornecedor cujo produto continua ativo e disponível para a empresa; a importação guarda o
+      dicionário no cache do lote e consulta cada mercadoria nele antes de procurar no catálogo.
+      Uma associação com produto arquivado ou de outra empresa é ignorada, e a mercadoria segue
+      para a busca no catálogo.
+    - _aprende: Chamado quando o usuário informa o produto na tela de-para. Atualiza as chaves
+      existentes e cria as demais em um único `create`; se outra pessoa gravou alguma das chaves
+      ao mesmo tempo, cria uma a uma e atualiza as repetidas.
+"""
+
+from psycopg2 import IntegrityError, errorcodes
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import mute_logger
+
+from ..utils.normalizacao import normaliza_texto
+
+
+class L10nBrDiDePara(models.Model):
+
+    _name = "declaracao_importacao.de_para"
+    _description = "Declaração de Importação De-Para de Produtos"
+    _rec_name = "descricao_mercadoria"
+    _order = "fornecedor_partner_id, descricao_normalizada"
+
+    fornecedor_partner_id = fields.Many2one(
+        "res.partner",
+        string="Fornecedor",
+        required=True,
+        ondelete="cascade",
+    )
+    descricao_mercadoria = fields.Char(string="Descrição")
+    descricao_normalizada = fields.Char(required=True, readonly=True)
+    unidade_medida = fields.Char(string="Uom", required=True, readonly=True)
+    product_id = fields.Many2one(
+        "product.product",
+        string="Product",
+        required=True,
+        ondelete="cascade",
+    )
+    uom_id = fields.Many2one(related="product_id.uom_id")
+
+    _sql_constraints = [
+        (
+            "chave_uniq",
+            "unique(fornecedor_partner_id, descricao_normalizada, unidade_medida)",
+            "A mercadoria já está associada a um produto para este fornecedor.",
+        )
+    ]
+
+    @api.model
+    def _chave(self, descricao, unidade):
+        return normaliza_texto(descricao), normaliza_texto(unidade)
+
+    @api.model
+    def _mapa_fornecedor(self, fornecedor_id):
+        return {
+            (x["descricao_normalizada"], x["unidade_medida"]): (
+                x["product_id"][0],
+                x["uom_id"] and x["uom_id"][0],
+            )
+            for x in self.search_read(
+                [
+                    ("fornecedor_partner_id", "=", fornecedor_id),
+                    ("product_id.active", "=", True),
+                    ("product_id.company_id", "in", [False, self.env.company.id]),
+                ],
+                ["descricao_normalizada", "unidade_medida", "product_id", "uom_id"],
+            )
+        }
+
+    @api.model
+    def _aprende(self, mercadorias):
+        novos = {}
+        for mercadoria in mercadorias:
+            fornecedor = mercadoria.adicao_id.fornecedor_partner_id
+            descricao, unidade = self._chave(
+                mercadoria.descricao_mercadoria, mercadoria.unidade_medida
+            )
+            if not (mercadoria.product_id and fornecedor and descricao and unidade):
+                continue
+            novos[(fornecedor.id, descricao, unidade)] = {
+                "fornecedor_partner_id": fornecedor.id,
+                "descricao_mercadoria": mercadoria.descricao_mercadoria,
+                "descricao_normalizada": descricao,
+                "unidade_medida": unidade,
+                "product_id": mercadoria.product_id.id,
+            }
+        if not novos:
+            return
+
+        self._atualiza(novos)
+        if novos:
+            self._cria(novos)
+
+    def _atualiza(self, novos):
+        """Grava o produto das chaves de `novos` que já existem, retirando-as."""
+        existentes = self.search(
+            [
+                ("fornecedor_partner_id", "in", list({x[0] for x in novos})),
+                ("descricao_normalizada", "in", list({x[1] for x in novos})),
+            ]
+        )
+        for de_para in existentes:
+            vals = novos.pop(
+                (
+                    de_para.fornecedor_partner_id.id,
+                    de_para.descricao_normalizada,
+                    de_para.unidade_medida,
+                ),
+                None,
+            )
+            if vals and de_para.product_id.id != vals["product_id"]:
+                de_para.write(
+                    {
+                        "product_id": vals["product_id"],
+                        "descricao_mercadoria": vals["descricao_mercadoria"],
+                    }
+                )
+
+    def _cria(self, novos):
+        """
+        Cria as associações {chave: vals} em um único `create`. Se outra pessoa
+        gravou alguma das chaves ao mesmo tempo, a restrição única rejeita o
+        lote; cada associação é então criada em separado e as chaves repetidas
+        são atualizadas. Se a associação da outra pessoa ainda não é visível
+        nesta transação, pede que o produto seja informado de novo.
+        """
+        try:
+            with self.env.cr.savepoint(), mute_logger("odoo.sql_db"):
+                self.create(list(novos.values()))
+            return
+        except IntegrityError as erro:
+            if erro.pgcode != errorcodes.UNIQUE_VIOLATION:
+                raise
+
+        for chave, vals in novos.items():
+            try:
+                with self.env.cr.savepoint(), mute_logger("odoo.sql_db"):
+                    self.create(vals)
+                continue
+            except IntegrityError as erro:
+                if erro.pgcode != errorcodes.UNIQUE_VIOLATION:
+                    raise
+            repetido = {chave: vals}
+            self._atualiza(repetido)
+            if repetido:
+                raise UserError(
+                    _(
+                        "A mercadoria %s foi associada a um produto por outra "
+                        "pessoa ao mesmo tempo. Informe o produto novamente."
+                    )
+                    % vals["descricao_mercadoria"]
+                ) from None
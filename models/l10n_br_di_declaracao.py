@@ -2,26 +2,69 @@
 # Copyright 2024 KMEE
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 import base64
-from datetime import datetime
+import importlib.util
+import io
+import multiprocessing
+import os
+import site
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from xsdata.exceptions import ConverterError, ParserError, XmlContextError
+
 from odoo.fields import Date
-from xsdata.formats.dataclass.parsers import XmlParser
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
 from odoo.tests.common import Form
 
-from ..utils.lista_declaracoes import ListaDeclaracoes
+from ..utils.cache import cache_declaracoes
+from ..utils.checksum import checksum_arquivo
+from ..utils.conversao import (  # noqa: F401
+    D2,
+    D3,
+    D4,
+    D5,
+    D7,
+    c_data,
+    converte_arquivo,
+    converte_declaracao,
+)
+from ..utils.duimp import VERSAO_MAPEAMENTO, eh_duimp, iter_arquivo_duimp
+from ..utils.parser import iter_declaracoes
+from ..utils.validacao import DeclaracaoInvalida, valida_declaracoes
 import logging
 _logger = logging.getLogger(__name__)
 
-D7 = 10**7
-D5 = 10**5
-D4 = 10**4
-D3 = 10**3
-D2 = 10**2
-
-
-def c_data(data):
-    return datetime.strptime(str(data), "%Y%m%d").date()
+# Módulo executado pelos processos de leitura de `importa_lote` (ver
+# scripts/declaracao_importacao_leitura.py). Os processos importam o módulo
+# pelo nome, com a pasta no sys.path acrescentada pelo `initializer` do pool.
+PASTA_LEITURA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"
+)
+MODULO_LEITURA = "declaracao_importacao_leitura"
+
+_lock_leitura = threading.Lock()
+
+
+def _modulo_leitura():
+    """
+    Carrega o módulo de leitura pelo caminho do arquivo, sem alterar o sys.path
+    deste processo, e o registra em sys.modules com o nome usado pelos
+    processos de leitura: é por esse nome que a função enviada ao pool é
+    serializada.
+    """
+    with _lock_leitura:
+        modulo = sys.modules.get(MODULO_LEITURA)
+        if modulo is None:
+            spec = importlib.util.spec_from_file_location(
+                MODULO_LEITURA, os.path.join(PASTA_LEITURA, MODULO_LEITURA + ".py")
+            )
+            modulo = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(modulo)
+            sys.modules[MODULO_LEITURA] = modulo
+        return modulo
 
 
 def process_icms_data(self, icms_data):
@@ -58,6 +101,14 @@ class L10nBrDiDeclaracao(models.Model):
         attachment=True,
     )
 
+    arquivo_checksum = fields.Char(
+        index=True,
+        readonly=True,
+        copy=False,
+        help="SHA-256 do conteúdo do arquivo, usado para não importar o mesmo "
+        "arquivo duas vezes.",
+    )
+
     @api.model
     def _default_fiscal_operation(self):
         return self.env.company.import_trade_fiscal_operation_id
@@ -125,6 +176,9 @@ class L10nBrDiDeclaracao(models.Model):
     di_mercadoria_ids = fields.One2many("declaracao_importacao.mercadoria", "declaracao_id")
     di_pagamento_ids = fields.One2many("declaracao_importacao.pagamento", "declaracao_id")
     di_valor_ids = fields.One2many("declaracao_importacao.valor", "declaracao_id")
+    di_armazem_ids = fields.One2many("declaracao_importacao.armazem", "declaracao_id")
+    di_embalagem_ids = fields.One2many("declaracao_importacao.embalagem", "declaracao_id")
+    di_declaracao_ee_ids = fields.One2many("declaracao_importacao.declaracao_ee", "declaracao_id")
 
     # Campos do arquivo XML
 
@@ -238,166 +292,432 @@ class L10nBrDiDeclaracao(models.Model):
 
     informacao_complementar = fields.Text()
 
-    def importa_declaracao(self, arquivo=False):
-        if self.arquivo_declaracao:
-            arquivo = self.arquivo_declaracao
+    def _arquivo_declaracao_attachment(self):
+        if not self:
+            return self.env["ir.attachment"]
+        return (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_id", "=", self.id),
+                    ("res_field", "=", "arquivo_declaracao"),
+                ],
+                limit=1,
+            )
+        )
+
+    @contextmanager
+    def _abre_arquivo_declaracao(self, arquivo=False):
+        """
+        Abre o XML da declaração como um fluxo de bytes para o parser.
+
+        `arquivo` pode ser um ir.attachment (arquivos enviados pelo assistente ou
+        por `/declaracao_importacao/upload`) ou o conteúdo em base64; sem ele, é
+        usado o arquivo já gravado no registro. Quando o arquivo está no
+        filestore ele é lido diretamente do disco, sem passar pelo base64 do
+        campo binário. Anexos gravados no banco e arquivos recebidos em base64
+        são decodificados uma única vez.
+        """
+        if isinstance(arquivo, models.BaseModel):
+            attachment = arquivo
+        else:
+            attachment = self._arquivo_declaracao_attachment()
+        if attachment.store_fname:
+            with open(attachment._full_path(attachment.store_fname), "rb") as stream:
+                yield stream
+        elif attachment:
+            yield io.BytesIO(attachment.raw)
+        elif arquivo:
+            yield io.BytesIO(base64.b64decode(arquivo))
+        else:
+            raise UserError(_("Nenhum arquivo de declaração informado"))
+
+    @api.model
+    def _nome_arquivo(self, arquivo):
+        """Nome do anexo, para as mensagens de erro; None para base64."""
+        return arquivo.name if isinstance(arquivo, models.BaseModel) else None
+
+    def _busca_por_checksum(self, checksum):
+        return self.search(
+            [
+                ("arquivo_checksum", "=", checksum),
+                ("company_id", "=", self.env.company.id),
+            ]
+        )
 
-        file_content = base64.b64decode(arquivo)
-        parser = XmlParser()
-        declaration_list = parser.from_string(
-            file_content.decode("utf-8"), ListaDeclaracoes
+    # Quantidade máxima de erros de validação exibidos na mensagem.
+    _limite_erros_validacao = 50
+
+    def _erro_validacao(self, erros, nome=None):
+        linhas = erros[: self._limite_erros_validacao]
+        if len(erros) > len(linhas):
+            linhas.append(_("... e mais %d erro(s)") % (len(erros) - len(linhas)))
+        if nome:
+            return UserError(
+                _("O arquivo %s contém erros:\n%s") % (nome, "\n".join(linhas))
+            )
+        return UserError(
+            _("O arquivo da declaração contém erros:\n%s") % "\n".join(linhas)
         )
-        vals = self._importa_declaracao(declaration_list)
 
+    def _valida_arquivo(self, stream, nome=None):
+        """Confere o arquivo inteiro antes da conversão e volta ao início."""
+        erros = valida_declaracoes(stream, handler=self.env.company.di_xml_handler)
+        if erros:
+            raise self._erro_validacao(erros, nome)
+        stream.seek(0)
+
+    def _converte_xml(self, stream, nome=None):
+        """
+        Converte as declarações do XML já validado. Um erro que o xsdata ainda
+        encontre ao montar uma declaração vira um erro de validação que cita o
+        arquivo e a declaração, como os de `valida_declaracoes`.
+        """
+        numero = 0
+        try:
+            for numero, di in enumerate(
+                iter_declaracoes(stream, handler=self.env.company.di_xml_handler), 1
+            ):
+                yield converte_declaracao(di)
+        except (ParserError, XmlContextError, ConverterError) as erro:
+            raise self._erro_validacao(
+                [_("Declaração %d: %s") % (numero + 1, erro)], nome
+            ) from None
+
+    def _chave_cache(self, checksum):
+        """
+        Chave do cache de declarações convertidas: o hash do conteúdo, o leitor
+        XML da empresa e a versão das tabelas de mapeamento.
+        """
+        return checksum, self.env.company.di_xml_handler, VERSAO_MAPEAMENTO
+
+    def _iter_dados_arquivo(self, stream, checksum, nome=None):
+        """
+        Declarações do arquivo já convertidas, vindas do cache quando o mesmo
+        conteúdo já foi lido por este processo. Arquivos lidos do XML são
+        validados antes de qualquer busca ou gravação no banco, e os JSON de
+        DUIMP também, por `iter_arquivo_duimp`; nos dois casos as declarações
+        são convertidas uma por vez, durante a gravação.
+        """
+        chave = self._chave_cache(checksum)
+        declaracoes = cache_declaracoes.get(chave)
+        if declaracoes is not None:
+            return declaracoes
+
+        if eh_duimp(stream):
+            try:
+                declaracoes = iter_arquivo_duimp(stream)
+            except DeclaracaoInvalida as erro:
+                raise self._erro_validacao(erro.erros, nome) from None
+            return cache_declaracoes.grava(chave, declaracoes)
+
+        self._valida_arquivo(stream, nome)
+        return cache_declaracoes.grava(chave, self._converte_xml(stream, nome))
+
+    def _grava_declaracoes(self, declaracoes, arquivo, checksum):
+        """
+        Cria (ou, em um registro existente, atualiza) as declarações a partir dos
+        dicionários gerados por `converte_declaracao`.
+        """
+        declaracoes = iter(declaracoes)
         if self:
+            dados = next(declaracoes, None)
+            if dados is None:
+                raise UserError(_("Nenhuma declaração de importação encontrada"))
+            if next(declaracoes, None) is not None:
+                raise UserError(
+                    _(
+                        "O arquivo contém mais de uma declaração de importação, "
+                        "utilize o assistente de importação."
+                    )
+                )
+            vals = self._importa_declaracao(dados)
+            vals["arquivo_checksum"] = checksum
+
             self.di_adicao_ids.unlink()
             self.di_despacho_ids.unlink()
             self.di_pagamento_ids.unlink()
+            self.di_armazem_ids.unlink()
+            self.di_embalagem_ids.unlink()
+            self.di_declaracao_ee_ids.unlink()
             self.update(vals)
             self.calcular_declaracao()
-        else:
-            vals["arquivo_declaracao"] = arquivo
-            res = self.create(vals)
-            res.calcular_declaracao()
+            return self
+
+        anexo = isinstance(arquivo, models.BaseModel)
+        res = self.browse()
+        for dados in declaracoes:
+            vals = self._importa_declaracao(dados)
+            vals["arquivo_checksum"] = checksum
+            if not anexo:
+                vals["arquivo_declaracao"] = arquivo
+            declaracao = self.create(vals)
+            if anexo:
+                # Novo anexo apontando para o mesmo arquivo, sem copiar o conteúdo.
+                arquivo._copia_para(declaracao, "arquivo_declaracao")
+            res |= declaracao
+        if not res:
+            raise UserError(_("Nenhuma declaração de importação encontrada"))
+        res.calcular_declaracao()
+        return res
 
-            return res
+    def importa_declaracao(self, arquivo=False):
+        # Um cache do lote para o arquivo inteiro: moedas, parceiros e o índice
+        # de produtos são resolvidos uma vez para todas as suas declarações.
+        if self.env.context.get("di_cache_lote") is None:
+            return self.with_context(di_cache_lote={}).importa_declaracao(arquivo)
+        with self._abre_arquivo_declaracao(arquivo) as stream:
+            checksum = checksum_arquivo(stream)
+            stream.seek(0)
+
+            if not self:
+                existentes = self._busca_por_checksum(checksum)
+                if existentes:
+                    _logger.info(
+                        "Arquivo já importado nas declarações %s", existentes.ids
+                    )
+                    return existentes
+
+            return self._grava_declaracoes(
+                self._iter_dados_arquivo(
+                    stream, checksum, self._nome_arquivo(arquivo)
+                ),
+                arquivo,
+                checksum,
+            )
 
-    def _importa_declaracao(self, declaracoes):
+    def previa_declaracao(self, arquivo=False):
         """
-        uma função que só pode ser usada aqui, que recebe declaracoes
-        di recebe o metodo declaracao_importacao do arquivo recebido (declaracoes)
-        o arquivo recebido na verdade é o declaration_list tratado pela classse ListaDeclaracoes
-        ListaDeclaracoes é um mapeamento que recebe a classe inteira declaracaoImportacao DeclaracaoImportacao
+        Simula `importa_declaracao` sem gravar nada no banco.
+
+        O arquivo é validado e convertido, moedas, parceiros e produtos são
+        buscados e os cálculos de `calcular_declaracao` rodam sobre registros
+        em memória (`new`). Parceiros que a importação criaria, produtos e
+        moedas não encontrados são apenas anotados. Retorna o resumo montado
+        por `_resumo_previa`.
         """
-        if not declaracoes.declaracao_importacao:
+        previa = {"parceiros": set(), "produtos": set(), "moedas": set()}
+        simulacao = self.with_context(di_cache_lote={}, di_previa=previa)
+        padroes = simulacao.default_get(
+            ["company_id", "currency_id", "dolar_currency_id"]
+        )
+        declaracoes = simulacao.browse()
+        with simulacao._abre_arquivo_declaracao(arquivo) as stream:
+            checksum = checksum_arquivo(stream)
+            stream.seek(0)
+            for dados in simulacao._iter_dados_arquivo(
+                stream, checksum, self._nome_arquivo(arquivo)
+            ):
+                vals = simulacao._importa_declaracao(dados)
+                declaracoes |= simulacao.new(dict(padroes, **vals))
+        if not declaracoes:
             raise UserError(_("Nenhuma declaração de importação encontrada"))
+        declaracoes.calcular_declaracao()
+        existentes = self.browse() if self else self._busca_por_checksum(checksum)
+        return simulacao._resumo_previa(declaracoes, previa, existentes)
 
-        di = declaracoes.declaracao_importacao
-
-        insurance_currency_id = self._s_currency(di.seguro_moeda_negociada_codigo)
-        freight_currency_id = self._s_currency(di.frete_moeda_negociada_codigo)
+    @api.model
+    def _resumo_previa(self, declaracoes, previa, existentes):
+        resumo = []
+        for declaracao in declaracoes:
+            mercadorias = declaracao.di_adicao_ids.mapped("di_adicao_mercadoria_ids")
+            resumo.append(
+                {
+                    "numero_di": declaracao.numero_di,
+                    "adicoes": len(declaracao.di_adicao_ids),
+                    "mercadorias": len(mercadorias),
+                    "valor_subtotal": sum(mercadorias.mapped("amount_subtotal_brl")),
+                    "valor_outros": sum(declaracao.di_adicao_ids.mapped("valor_outros")),
+                    "valor_total": sum(mercadorias.mapped("amount_total")),
+                }
+            )
+        return {
+            "declaracoes": resumo,
+            "valor_total": sum(x["valor_total"] for x in resumo),
+            "produtos_nao_encontrados": sorted(previa["produtos"]),
+            "parceiros_novos": sorted(previa["parceiros"]),
+            "moedas_nao_encontradas": sorted(previa["moedas"]),
+            "ja_importadas": existentes.ids,
+        }
 
-        adicoes = []
-        despachos = []
-        pagamentos = []
+    @api.model
+    def _processos_leitura(self):
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("declaracao_importacao.processos_leitura", 0)
+        )
 
-        for adicao in di.adicao:
-            adicoes.append(self.di_adicao_ids._importa_declaracao(adicao))
-        for despacho in di.documento_instrucao_despacho:
-            despachos.append(self.di_despacho_ids._importa_declaracao(despacho))
-        for pagamento in di.pagamento:
-            pagamentos.append(self.di_pagamento_ids._importa_declaracao(pagamento))
+    @api.model
+    def _fonte_leitura(self, arquivo):
+        """
+        O que enviar aos processos de leitura: o caminho no filestore, quando o
+        arquivo é um anexo gravado em disco, ou o conteúdo em bytes.
+        """
+        if isinstance(arquivo, models.BaseModel):
+            if arquivo.store_fname:
+                return arquivo._full_path(arquivo.store_fname)
+            return arquivo.raw
+        return base64.b64decode(arquivo)
 
-        # Fornecedor: adicao.fornecedorNome
+    @api.model
+    def importa_lote(self, arquivos):
+        """
+        Importa vários arquivos (ir.attachment ou base64) em uma única passada.
+
+        Todos os arquivos compartilham o mesmo `di_cache_lote`, de modo que cada
+        moeda, parceiro e produto é buscado uma única vez para o lote inteiro.
+
+        Com o parâmetro de sistema `declaracao_importacao.processos_leitura` maior
+        que 1, a leitura e a conversão do XML (`converte_arquivo`) rodam em um pool
+        com esse número de processos; o processo do Odoo fica apenas com as buscas
+        e a criação dos registros. Os processos são criados com spawn, e não com
+        fork, para não herdarem o registro, a conexão com o banco, os locks de log
+        e as threads do worker: recebem apenas o caminho do arquivo no filestore
+        (ou o seu conteúdo) e o handler XML, e executam
+        `scripts/declaracao_importacao_leitura.py`, que não depende do Odoo. O
+        sys.path deste processo não é alterado: a pasta do script é passada aos
+        processos de leitura pelo `initializer` do pool.
+
+        Cada arquivo é validado antes de ser convertido; um arquivo inválido, ou
+        que não pôde ser lido, interrompe o lote com uma mensagem que cita o
+        arquivo, e nada é gravado.
+        """
+        lote = self.with_context(di_cache_lote={})
+        processos = self._processos_leitura()
+        result_ids = []
+
+        if processos < 2:
+            for arquivo in arquivos:
+                result_ids.extend(lote.importa_declaracao(arquivo).ids)
+            return self.browse(result_ids)
+
+        pendentes = []
+        checksums = set()
+        for posicao, arquivo in enumerate(arquivos, 1):
+            with lote._abre_arquivo_declaracao(arquivo) as stream:
+                checksum = checksum_arquivo(stream)
+            if checksum in checksums:
+                continue
+            checksums.add(checksum)
+            existentes = lote._busca_por_checksum(checksum)
+            if existentes:
+                result_ids.extend(existentes.ids)
+                continue
+            declaracoes = cache_declaracoes.get(lote._chave_cache(checksum))
+            if declaracoes is not None:
+                result_ids.extend(
+                    lote._grava_declaracoes(declaracoes, arquivo, checksum).ids
+                )
+                continue
+            nome = (
+                arquivo.name
+                if isinstance(arquivo, models.BaseModel)
+                else _("arquivo %d do lote") % posicao
+            )
+            pendentes.append((arquivo, checksum, nome, lote._fonte_leitura(arquivo)))
+        if not pendentes:
+            return self.browse(result_ids)
+
+        handler = self.env.company.di_xml_handler
+        leitura = _modulo_leitura()
+        with ProcessPoolExecutor(
+            max_workers=processos,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=site.addsitedir,
+            initargs=(PASTA_LEITURA,),
+        ) as pool:
+            futuros = [
+                pool.submit(leitura.converte, fonte, handler)
+                for _arquivo, _checksum, _nome, fonte in pendentes
+            ]
+            try:
+                for (arquivo, checksum, nome, _fonte), futuro in zip(
+                    pendentes, futuros
+                ):
+                    try:
+                        situacao, resultado = futuro.result()
+                    except Exception as erro:
+                        # Processo de leitura encerrado (BrokenProcessPool...).
+                        situacao, resultado = leitura.ERRO, repr(erro)
+                    if situacao == leitura.INVALIDO:
+                        raise self._erro_validacao(resultado, nome)
+                    if situacao == leitura.ERRO:
+                        raise UserError(
+                            _("Não foi possível ler o arquivo %s:\n%s")
+                            % (nome, resultado)
+                        )
+                    result_ids.extend(
+                        lote._grava_declaracoes(
+                            cache_declaracoes.grava(
+                                lote._chave_cache(checksum), resultado
+                            ),
+                            arquivo,
+                            checksum,
+                        ).ids
+                    )
+            except Exception:
+                for futuro in futuros:
+                    futuro.cancel()
+                raise
+        return self.browse(result_ids)
+
+    def _importa_declaracao(self, dados):
+        """
+        Completa os valores de uma declaração convertida por `converte_declaracao`
+        com as moedas, parceiros e produtos do banco, devolvendo o dicionário pronto
+        para create/update, com as adições, despachos, pagamentos, armazéns,
+        embalagens e declarações estrangeiras como comandos (0, 0, vals).
+
+        Os fabricantes e fornecedores de todas as adições são resolvidos antes,
+        de uma só vez, e as adições os encontram no cache do lote; fora de um
+        lote ou de `importa_declaracao`, é aberto um cache só para esta
+        declaração.
+        """
+        if self.env.context.get("di_cache_lote") is None:
+            return self.with_context(di_cache_lote={})._importa_declaracao(dados)
 
-        vals = {
-            "di_adicao_ids": [(0, 0, x) for x in adicoes],
-            "di_despacho_ids": [(0, 0, x) for x in despachos],
-            "di_pagamento_ids": [(0, 0, x) for x in pagamentos],
-            #
-            "insurance_currency_id": (
-                insurance_currency_id.id if insurance_currency_id else False
-            ),
-            "freight_currency_id": (
-                freight_currency_id.id if freight_currency_id else False
-            ),
-            "numero_di": di.numero_di,
-            "data_registro": c_data(di.data_registro),
-            "data_desembaraco": c_data(di.data_desembaraco),
-            "carga_data_chegada": c_data(di.carga_data_chegada),
-            "armazenamento_recinto_aduaneiro_codigo": di.armazenamento_recinto_aduaneiro_codigo,
-            "armazenamento_recinto_aduaneiro_nome": di.armazenamento_recinto_aduaneiro_nome,
-            "armazenamento_setor": di.armazenamento_setor,
-            "canal_selecao_parametrizada": di.canal_selecao_parametrizada,
-            "caracterizacao_operacao_codigo_tipo": di.caracterizacao_operacao_codigo_tipo,
-            "caracterizacao_operacao_descricao_tipo": di.caracterizacao_operacao_descricao_tipo,
-            "carga_numero_agente": di.carga_numero_agente,
-            "carga_pais_procedencia_codigo": di.carga_pais_procedencia_codigo,
-            "carga_pais_procedencia_nome": di.carga_pais_procedencia_nome,
-            "carga_peso_bruto": int(di.carga_peso_bruto) / D7,
-            "carga_peso_liquido": int(di.carga_peso_liquido) / D7,
-            "carga_urf_entrada_codigo": di.carga_urf_entrada_codigo,
-            "carga_urf_entrada_nome": di.carga_urf_entrada_nome,
-            "conhecimento_carga_embarque_data": c_data(
-                di.conhecimento_carga_embarque_data
+        adicao_model = self.di_adicao_ids
+        adicao_model._busca_parceiros(
+            adicao_model._parceiros_adicoes(dados["di_adicao_ids"])
+        )
+        vals = dict(dados)
+
+        insurance_currency_id = self._s_currency(vals["seguro_moeda_negociada_codigo"])
+        freight_currency_id = self._s_currency(vals["frete_moeda_negociada_codigo"])
+
+        vals.update(
+            {
+                "di_adicao_ids": [
+                    (0, 0, adicao_model._importa_declaracao(x))
+                    for x in dados["di_adicao_ids"]
+                ],
+                "di_despacho_ids": [(0, 0, x) for x in dados["di_despacho_ids"]],
+                "di_pagamento_ids": [(0, 0, x) for x in dados["di_pagamento_ids"]],
+                "di_armazem_ids": [(0, 0, x) for x in dados["di_armazem_ids"]],
+                "di_embalagem_ids": [(0, 0, x) for x in dados["di_embalagem_ids"]],
+                "di_declaracao_ee_ids": [
+                    (0, 0, x) for x in dados["di_declaracao_ee_ids"]
+                ],
+                "insurance_currency_id": (
+                    insurance_currency_id.id if insurance_currency_id else False
+                ),
+                "freight_currency_id": (
+                    freight_currency_id.id if freight_currency_id else False
+                ),
+            }
+        )
+        _logger.debug(
+            "Declaração %s: %d adição(ões), %d mercadoria(s)",
+            vals.get("numero_di"),
+            len(vals["di_adicao_ids"]),
+            sum(
+                len(adicao["di_adicao_mercadoria_ids"])
+                for _op, _id, adicao in vals["di_adicao_ids"]
             ),
-            "conhecimento_carga_embarque_local": di.conhecimento_carga_embarque_local,
-            "conhecimento_carga_id": di.conhecimento_carga_id,
-            "conhecimento_carga_tipo_codigo": di.conhecimento_carga_tipo_codigo,
-            "conhecimento_carga_tipo_nome": di.conhecimento_carga_tipo_nome,
-            "conhecimento_carga_utilizacao": di.conhecimento_carga_utilizacao,
-            "conhecimento_carga_utilizacao_nome": di.conhecimento_carga_utilizacao_nome,
-            "documento_chegada_carga_codigo_tipo": di.documento_chegada_carga_codigo_tipo,
-            "documento_chegada_carga_nome": di.documento_chegada_carga_nome,
-            "documento_chegada_carga_numero": di.documento_chegada_carga_numero,
-            "frete_moeda_negociada_codigo": di.frete_moeda_negociada_codigo,
-            "frete_moeda_negociada_nome": di.frete_moeda_negociada_nome,
-            "frete_collect": int(di.frete_collect) / D2,
-            "frete_em_territorio_nacional": int(di.frete_em_territorio_nacional) / D2,
-            "frete_prepaid": int(di.frete_prepaid) / D2,
-            "frete_total_dolares": int(di.frete_total_dolares) / D2,
-            "frete_total_moeda": int(di.frete_total_moeda) / D2,
-            "frete_total_reais": int(di.frete_total_reais) / D2,
-            "icms": di.icms,
-
-
-            "agencia_icms": di.icms.agencia_icms,
-            "banco_icms": di.icms.banco_icms,
-            "codigo_tipo_recolhimento_icms": di.icms.codigo_tipo_recolhimento_icms,
-            "cpf_responsavel_registro": di.icms.cpf_responsavel_registro,
-            "data_pagamento_icms": di.icms.data_pagamento_icms,
-            "data_registro_icms": di.icms.data_registro_icms,
-            "hora_registro_icms": di.icms.hora_registro_icms,
-            "nome_tipo_recolhimento_icms": di.icms.nome_tipo_recolhimento_icms,
-            "numero_sequencial_icms":di.icms.numero_sequencial_icms,
-            "uf_icms": di.icms.uf_icms,
-            "valor_total_icms": di.icms.valor_total_icms,
-
-            "importador_codigo_tipo": di.importador_codigo_tipo,
-            "importador_cpf_representante_legal": di.importador_cpf_representante_legal,
-            "importador_endereco_bairro": di.importador_endereco_bairro,
-            "importador_endereco_cep": di.importador_endereco_cep,
-            "importador_endereco_complemento": di.importador_endereco_complemento,
-            "importador_endereco_logradouro": di.importador_endereco_logradouro,
-            "importador_endereco_municipio": di.importador_endereco_municipio,
-            "importador_endereco_numero": di.importador_endereco_numero,
-            "importador_endereco_uf": di.importador_endereco_uf,
-            "importador_nome": di.importador_nome,
-            "importador_nome_representante_legal": di.importador_nome_representante_legal,
-            "importador_numero": di.importador_numero,
-            "importador_numero_telefone": di.importador_numero_telefone,
-            "informacao_complementar": di.informacao_complementar,
-            "local_descarga_total_dolares": int(di.local_descarga_total_dolares) / D2,
-            "local_descarga_total_reais": int(di.local_descarga_total_reais) / D2,
-            "local_embarque_total_dolares": int(di.local_embarque_total_dolares) / D2,
-            "local_embarque_total_reais": int(di.local_embarque_total_reais) / D2,
-            "modalidade_despacho_codigo": di.modalidade_despacho_codigo,
-            "modalidade_despacho_nome": di.modalidade_despacho_nome,
-            "operacao_fundap": di.operacao_fundap,
-            "seguro_moeda_negociada_codigo": di.seguro_moeda_negociada_codigo,
-            "seguro_moeda_negociada_nome": di.seguro_moeda_negociada_nome,
-            "seguro_total_dolares": int(di.seguro_total_dolares) / D2,
-            "seguro_total_moeda_negociada": int(di.seguro_total_moeda_negociada) / D2,
-            "seguro_total_reais": int(di.seguro_total_reais) / D2,
-            "sequencial_retificacao": di.sequencial_retificacao,
-            "situacao_entrega_carga": di.situacao_entrega_carga,
-            "tipo_declaracao_codigo": di.tipo_declaracao_codigo,
-            "tipo_declaracao_nome": di.tipo_declaracao_nome,
-            "total_adicoes": int(di.total_adicoes) / D2,
-            "urf_despacho_codigo": di.urf_despacho_codigo,
-            "urf_despacho_nome": di.urf_despacho_nome,
-            "valor_total_multa_arecolher_ajustado": int(
-                di.valor_total_multa_arecolher_ajustado
-            )
-            / D2,
-            "via_transporte_codigo": di.via_transporte_codigo,
-            "via_transporte_multimodal": di.via_transporte_multimodal,
-            "via_transporte_nome": di.via_transporte_nome,
-            "via_transporte_nome_transportador": di.via_transporte_nome_transportador,
-            "via_transporte_numero_veiculo": di.via_transporte_numero_veiculo,
-            "via_transporte_pais_transportador_codigo": di.via_transporte_pais_transportador_codigo,
-        }
-        _logger.info('Vals declaracao: %s', vals)
+        )
         return vals
 
     def calcular_declaracao(self):
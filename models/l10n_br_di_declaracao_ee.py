@@ -0,0 +1,43 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Este módulo define o modelo `L10nBrDiDeclaracaoEe`, que representa as declarações
+estrangeiras (declaração de exportação do país de procedência) vinculadas a uma
+Declaração de Importação (DI) no Odoo.
+
+Classes:
+    - L10nBrDiDeclaracaoEe: Um modelo Odoo que armazena o número e a faixa da declaração estrangeira.
+
+Campos:
+    - declaracao_id: Campo Many2one que vincula o registro à declaração de importação correspondente.
+    - numero_declaracao_estrangeira: Campo Char que armazena o número da declaração estrangeira.
+    - faixa_inicial: Campo Char que armazena o início da faixa, como informado no XML.
+    - faixa_final: Campo Char que armazena o fim da faixa, como informado no XML.
+
+Conversão:
+    - Os campos são extraídos do XML por `utils.conversao.converte_declaracao_ee` e gravados
+      diretamente pela declaração, junto com as adições.
+"""
+
+from odoo import fields, models
+
+
+class L10nBrDiDeclaracaoEe(models.Model):
+
+    _name = "declaracao_importacao.declaracao_ee"
+    _description = "Declaração de Importação Declaração Estrangeira"
+    _rec_name = "numero_declaracao_estrangeira"
+
+    declaracao_id = fields.Many2one(
+        "declaracao_importacao.declaracao",
+        string="Declaração",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    numero_declaracao_estrangeira = fields.Char(
+        string="Declaração Estrangeira", index=True
+    )
+    faixa_inicial = fields.Char()
+    faixa_final = fields.Char()
@@ -14,14 +14,10 @@ Campos:
     - nome_documento_despacho: Campo Char que armazena o nome do documento de despacho.
     - numero_documento_despacho: Campo Char que armazena o número do documento de despacho.
 
-Métodos:
-    - _importa_declaracao(despacho): Método que recebe um objeto de despacho e retorna um dicionário com as
-      informações formatadas para importação.
-
-Detalhamento dos métodos:
-    - _importa_declaracao: Extrai os dados do objeto de despacho recebido e formata os campos 
-      `codigo_tipo_documento_despacho`, `nome_documento_despacho` e `numero_documento_despacho` 
-      para serem utilizados no sistema Odoo.
+Conversão:
+    - Os campos `codigo_tipo_documento_despacho`, `nome_documento_despacho` e
+      `numero_documento_despacho` são extraídos do XML por `utils.conversao.converte_despacho`
+      e gravados diretamente pela declaração, pois o despacho não tem campos relacionais.
 
 Uso:
     Este modelo é utilizado para armazenar e manipular as informações relacionadas ao despacho
@@ -44,10 +40,3 @@ class L10nBrDespacho(models.Model):
     codigo_tipo_documento_despacho = fields.Char()
     nome_documento_despacho = fields.Char()
     numero_documento_despacho = fields.Char()
-
-    def _importa_declaracao(self, despacho):
-        return {
-            "codigo_tipo_documento_despacho": despacho.codigo_tipo_documento_despacho,
-            "nome_documento_despacho": despacho.nome_documento_despacho,
-            "numero_documento_despacho": despacho.numero_documento_despacho,
-        }
@@ -0,0 +1,40 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Este módulo define o modelo `L10nBrDiEmbalagem`, que representa as embalagens (volumes) da
+carga de uma Declaração de Importação (DI) no Odoo.
+
+Classes:
+    - L10nBrDiEmbalagem: Um modelo Odoo que armazena o tipo e a quantidade de volumes da carga.
+
+Campos:
+    - declaracao_id: Campo Many2one que vincula a embalagem à declaração de importação correspondente.
+    - codigo_tipo_embalagem: Campo Char que armazena o código do tipo de embalagem no SISCOMEX.
+    - nome_embalagem: Campo Char que armazena o nome do tipo de embalagem.
+    - quantidade_volume: Campo Integer que armazena a quantidade de volumes.
+
+Conversão:
+    - Os campos são extraídos do XML por `utils.conversao.converte_embalagem` e gravados
+      diretamente pela declaração, junto com as adições.
+"""
+
+from odoo import fields, models
+
+
+class L10nBrDiEmbalagem(models.Model):
+
+    _name = "declaracao_importacao.embalagem"
+    _description = "Declaração de Importação Embalagem"
+    _rec_name = "nome_embalagem"
+
+    declaracao_id = fields.Many2one(
+        "declaracao_importacao.declaracao",
+        string="Declaração",
+        required=True,
+        ondelete="cascade",
+        index=True,
+    )
+
+    codigo_tipo_embalagem = fields.Char(index=True)
+    nome_embalagem = fields.Char(string="Embalagem")
+    quantidade_volume = fields.Integer(string="Volumes")
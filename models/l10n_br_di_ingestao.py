@@ -0,0 +1,227 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Importação automática dos arquivos deixados em uma pasta pelo despachante.
+
+A ação agendada "Declaração de Importação: importar pasta" chama
+`cron_importa_pasta`, que lê até `declaracao_importacao.pasta_lote` arquivos
+.xml (DI) ou .json (DUIMP) da pasta `declaracao_importacao.pasta_entrada`
+(parâmetros de sistema), do mais antigo para o mais novo, e importa cada um
+em sua própria transação: um arquivo com erro não desfaz os anteriores. Um
+arquivo que falha por conflito com uma importação simultânea (o mesmo parceiro
+criado pelas duas) é tentado mais uma vez.
+Arquivos importados vão para a pasta de processados e os com erro para a
+pasta de erros, acompanhados de um `.erro.txt` com a mensagem.
+
+Cada execução que encontra arquivos grava um registro `L10nBrDiIngestao` com
+os totais e a vazão (arquivos por minuto e MB/s) da rodada.
+"""
+
+import logging
+import os
+import shutil
+import time
+
+import psycopg2
+from psycopg2 import errorcodes
+
+from odoo import api, fields, models
+from odoo.service.model import PG_CONCURRENCY_ERRORS_TO_RETRY
+
+from .l10n_br_di_adicao import ParceiroConcorrente
+
+_logger = logging.getLogger(__name__)
+
+PARAMETRO_ENTRADA = "declaracao_importacao.pasta_entrada"
+PARAMETRO_PROCESSADOS = "declaracao_importacao.pasta_processados"
+PARAMETRO_ERROS = "declaracao_importacao.pasta_erros"
+PARAMETRO_LOTE = "declaracao_importacao.pasta_lote"
+
+LOTE_PADRAO = 100
+
+# XML de DI e JSON de DUIMP.
+EXTENSOES = (".xml", ".json")
+
+# Arquivos modificados há menos tempo que isso (s) podem ainda estar sendo
+# copiados para a pasta e ficam para a próxima execução.
+IDADE_MINIMA = 60
+
+# Um arquivo que esbarra em um parceiro criado ao mesmo tempo por outra
+# importação é importado de novo, já enxergando esse parceiro.
+TENTATIVAS = 2
+
+
+class L10nBrDiIngestao(models.Model):
+
+    _name = "declaracao_importacao.ingestao"
+    _description = "Importação de Pasta de Declarações"
+    _order = "data_inicio desc"
+    _rec_name = "data_inicio"
+
+    data_inicio = fields.Datetime(string="Início", readonly=True)
+    pasta = fields.Char(readonly=True)
+    duracao = fields.Float(string="Duração (s)", readonly=True)
+    arquivos = fields.Integer(string="Arquivos importados", readonly=True)
+    arquivos_erro = fields.Integer(string="Arquivos com erro", readonly=True)
+    declaracoes = fields.Integer(string="Declarações", readonly=True)
+    tamanho = fields.Float(string="Volume (MB)", digits=(12, 3), readonly=True)
+    arquivos_por_minuto = fields.Float(
+        compute="_compute_vazao", store=True, digits=(12, 1)
+    )
+    megabytes_por_segundo = fields.Float(
+        string="MB/s", compute="_compute_vazao", store=True, digits=(12, 3)
+    )
+    mensagens = fields.Text(readonly=True)
+
+    @api.depends("duracao", "arquivos", "arquivos_erro", "tamanho")
+    def _compute_vazao(self):
+        for record in self:
+            if record.duracao:
+                total = record.arquivos + record.arquivos_erro
+                record.arquivos_por_minuto = total * 60 / record.duracao
+                record.megabytes_por_segundo = record.tamanho / record.duracao
+            else:
+                record.arquivos_por_minuto = 0
+                record.megabytes_por_segundo = 0
+
+    @api.model
+    def _parametro(self, chave, padrao=False):
+        return self.env["ir.config_parameter"].sudo().get_param(chave, padrao)
+
+    @api.model
+    def _pastas(self):
+        """Pastas de entrada, processados e erros, ou None sem configuração."""
+        entrada = self._parametro(PARAMETRO_ENTRADA)
+        if not entrada:
+            return None
+        processados = self._parametro(PARAMETRO_PROCESSADOS) or os.path.join(
+            entrada, "processados"
+        )
+        erros = self._parametro(PARAMETRO_ERROS) or os.path.join(entrada, "erros")
+        for pasta in (processados, erros):
+            os.makedirs(pasta, exist_ok=True)
+        return entrada, processados, erros
+
+    @api.model
+    def _arquivos_prontos(self, entrada, limite):
+        limite_mtime = time.time() - IDADE_MINIMA
+        prontos = []
+        with os.scandir(entrada) as itens:
+            for item in itens:
+                if not item.is_file() or not item.name.lower().endswith(EXTENSOES):
+                    continue
+                mtime = item.stat().st_mtime
+                if mtime <= limite_mtime:
+                    prontos.append((mtime, item.path))
+        prontos.sort()
+        return [caminho for _mtime, caminho in prontos[:limite]]
+
+    @api.model
+    def _move(self, caminho, pasta, erro=None):
+        destino = os.path.join(pasta, os.path.basename(caminho))
+        if os.path.exists(destino):
+            base, extensao = os.path.splitext(destino)
+            destino = "%s-%s%s" % (base, time.strftime("%Y%m%d%H%M%S"), extensao)
+        shutil.move(caminho, destino)
+        if erro:
+            with open(destino + ".erro.txt", "w", encoding="utf-8") as arquivo:
+                arquivo.write(erro)
+
+    @api.model
+    def _commit(self):
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+
+    @api.model
+    def _conflito_concorrente(self, erro):
+        if isinstance(erro, ParceiroConcorrente):
+            return True
+        return isinstance(erro, psycopg2.Error) and (
+            erro.pgcode == errorcodes.UNIQUE_VIOLATION
+            or erro.pgcode in PG_CONCURRENCY_ERRORS_TO_RETRY
+        )
+
+    @api.model
+    def _importa_arquivo(self, declaracao_model, caminho):
+        with open(caminho, "rb") as stream:
+            anexo = self.env["ir.attachment"]._cria_de_arquivo(
+                os.path.basename(caminho), stream
+            )
+        declaracoes = declaracao_model.importa_declaracao(anexo)
+        # As declarações criadas têm seus próprios anexos para o mesmo arquivo.
+        anexo.unlink()
+        return declaracoes
+
+    @api.model
+    def cron_importa_pasta(self):
+        pastas = self._pastas()
+        if not pastas:
+            _logger.info("Parâmetro %s não configurado", PARAMETRO_ENTRADA)
+            return self.browse()
+        entrada, processados, pasta_erros = pastas
+        limite = int(self._parametro(PARAMETRO_LOTE, LOTE_PADRAO))
+
+        caminhos = self._arquivos_prontos(entrada, limite)
+        if not caminhos:
+            return self.browse()
+
+        data_inicio = fields.Datetime.now()
+        inicio = time.perf_counter()
+        declaracao_model = self.env["declaracao_importacao.declaracao"]
+        lote = declaracao_model.with_context(di_cache_lote={})
+        arquivos = arquivos_erro = declaracoes = tamanho = 0
+        mensagens = []
+
+        for caminho in caminhos:
+            nome = os.path.basename(caminho)
+            tamanho_arquivo = os.path.getsize(caminho)
+            for tentativa in range(1, TENTATIVAS + 1):
+                try:
+                    declaracoes += len(self._importa_arquivo(lote, caminho))
+                    self._commit()
+                    erro = None
+                    break
+                except Exception as excecao:
+                    erro = excecao
+                    self.env.cr.rollback()
+                    self.env.clear()
+                    # O cache do lote pode apontar para registros desfeitos.
+                    lote = declaracao_model.with_context(di_cache_lote={})
+                    if tentativa == TENTATIVAS or not self._conflito_concorrente(erro):
+                        break
+                    _logger.info(
+                        "Conflito com outra importação em %s, repetindo", caminho
+                    )
+            if erro is not None:
+                _logger.error("Erro ao importar %s", caminho, exc_info=erro)
+                mensagem = erro.args[0] if erro.args else repr(erro)
+                mensagens.append("%s: %s" % (nome, mensagem))
+                arquivos_erro += 1
+                self._move(caminho, pasta_erros, str(mensagem))
+                continue
+
+            arquivos += 1
+            tamanho += tamanho_arquivo
+            self._move(caminho, processados)
+
+        ingestao = self.create(
+            {
+                "data_inicio": data_inicio,
+                "pasta": entrada,
+                "duracao": time.perf_counter() - inicio,
+                "arquivos": arquivos,
+                "arquivos_erro": arquivos_erro,
+                "declaracoes": declaracoes,
+                "tamanho": tamanho / 2**20,
+                "mensagens": "\n\n".join(mensagens),
+            }
+        )
+        self._commit()
+        _logger.info(
+            "Pasta %s: %d arquivo(s) importado(s), %d com erro, %.1f arquivos/min",
+            entrada,
+            arquivos,
+            arquivos_erro,
+            ingestao.arquivos_por_minuto,
+        )
+        return ingestao
@@ -1,11 +1,11 @@
 # Copyright 2024 KMEE
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 """
-Este módulo define o modelo `L10nBrDiMercadoria`, que representa as mercadorias associadas 
+Este módulo define o modelo `L10nBrDiMercadoria`, que representa as mercadorias associadas
 a uma Declaração de Importação (DI) no Odoo.
 
 Classes:
-    - L10nBrDiMercadoria: Um modelo Odoo que armazena e manipula dados sobre as mercadorias 
+    - L10nBrDiMercadoria: Um modelo Odoo que armazena e manipula dados sobre as mercadorias
       incluídas na Declaração de Importação.
 
 Campos:
@@ -31,38 +31,58 @@ Campos:
     - amount_afrmm: Campo Monetary que armazena o valor do AFRMM (Adicional ao Frete para Renovação da Marinha Mercante).
 
 Métodos:
-    - _compute_totals: Método que calcula os valores totais da mercadoria, como preço unitário, subtotal, 
+    - _compute_totals: Método que calcula os valores totais da mercadoria, como preço unitário, subtotal,
       adições, deduções e valor final.
-    - _importa_declaracao(mercadoria): Método que importa as informações de uma mercadoria a partir de um 
-      objeto de declaração e retorna um dicionário com os valores formatados.
-    - _match_product_unit(vals, descricao_mercadoria, unidade_medida): Método para buscar o produto 
-      correspondente à mercadoria, preenchendo automaticamente os campos `product_id` e `uom_id` com base 
-      em declarações anteriores.
+    - _importa_declaracao(dados, fornecedor_id): Método que recebe os valores de uma mercadoria já
+      convertidos por `utils.conversao.converte_mercadoria` e os completa com o produto correspondente.
+    - _produto_aprendido(fornecedor_id, descricao_mercadoria, unidade_medida): Retorna o produto já
+      associado pelo usuário à mesma mercadoria do fornecedor (`declaracao_importacao.de_para`).
+    - _indice_produtos(): Retorna o índice de palavras do catálogo de produtos (`utils.correspondencia`)
+      e a unidade de medida de cada produto.
+    - _assinatura_produtos(): Retorna a assinatura do catálogo que invalida o índice guardado.
+    - _match_product_unit(vals, descricao_mercadoria, unidade_medida, fornecedor_id): Método para buscar o produto
+      correspondente à mercadoria, preenchendo automaticamente os campos `product_id` e `uom_id`.
 
 Detalhamento dos métodos:
-    - _compute_totals: Recalcula diversos campos monetários para a mercadoria, incluindo o valor unitário 
+    - _compute_totals: Recalcula diversos campos monetários para a mercadoria, incluindo o valor unitário
       ajustado pela taxa de câmbio, adições/deduções e o valor total da mercadoria.
-    - _importa_declaracao: Extrai dados da mercadoria importada e faz a correspondência dos valores de acordo 
-      com a formatação exigida.
-    - _match_product_unit: Realiza uma pesquisa nas últimas declarações para tentar encontrar e associar 
-      automaticamente o produto e a unidade de medida correspondentes.
+    - _importa_declaracao: Copia os valores convertidos da mercadoria e faz a correspondência com o produto
+      por meio de `_match_product_unit`.
+    - _indice_produtos: Lê o id, o nome e a unidade dos produtos ativos da empresa em uma única consulta e monta
+      o índice invertido, guardado no processo (`correspondencia.cache_indices`) por banco, empresa e idioma.
+      Cada lote ou, fora dele, cada arquivo confere apenas a assinatura do catálogo; o catálogo só é lido
+      de novo quando algum produto foi criado, alterado, arquivado ou excluído.
+    - _assinatura_produtos: Quantidade, maior id e data da última alteração dos produtos e modelos de
+      produto, em uma única consulta agregada.
+    - _produto_aprendido: Lê uma única vez por lote as associações de cada fornecedor e responde cada
+      mercadoria pelo dicionário, sem consulta.
+    - _match_product_unit: Usa primeiro o produto aprendido em declarações anteriores do fornecedor.
+      Sem ele, procura no índice o produto com nome mais parecido com a descrição, sem consultar o
+      banco por mercadoria, e o associa, com a sua unidade de medida, se a nota alcançar o
+      parâmetro de sistema `declaracao_importacao.limiar_produto` (padrão 0,5).
+    - write: Quando o produto é informado na tela de-para (contexto `di_aprende_produto`), grava a
+      associação em `declaracao_importacao.de_para`.
 
 Uso:
-    Este modelo é utilizado para armazenar e manipular as mercadorias que fazem parte do processo de 
-    Declaração de Importação, incluindo cálculos de valores em moeda local e outras informações necessárias 
+    Este modelo é utilizado para armazenar e manipular as mercadorias que fazem parte do processo de
+    Declaração de Importação, incluindo cálculos de valores em moeda local e outras informações necessárias
     para o registro correto da DI.
 """
 
 from odoo import fields, models
+
+from ..utils.correspondencia import LIMIAR, IndiceProdutos, cache_indices
+
 import logging
 _logger = logging.getLogger(__name__)
 
-from .l10n_br_di_declaracao import D5, D7
+PARAMETRO_LIMIAR = "declaracao_importacao.limiar_produto"
 
 
 class L10nBrDiMercadoria(models.Model):
 
     _name = "declaracao_importacao.mercadoria"
+    _inherit = "declaracao_importacao.mixin"
     _description = "Declaração de Importação Mercadoria"
 
     # @api.depends("product_qty", "price_unit", "currency_rate", "import_addition_id")
@@ -164,37 +184,119 @@ class L10nBrDiMercadoria(models.Model):
 
     amount_afrmm = fields.Monetary(string="vAFRMM")
 
+    def _assinatura_produtos(self):
+        for model in ("product.template", "product.product"):
+            self.env[model].flush()
+        self.env.cr.execute(
+            """
+            SELECT count(*), max(p.id), max(GREATEST(p.write_date, t.write_date))
+              FROM product_product p
+              JOIN product_template t ON t.id = p.product_tmpl_id
+            """
+        )
+        return self.env.cr.fetchone()
+
+    def _monta_indice_produtos(self):
+        # Lido como superusuário: o índice é compartilhado pelos usuários da
+        # empresa, e não deve depender das regras de acesso de quem o montou.
+        company_id = self.env.company.id
+        produtos = (
+            self.env["product.product"]
+            .sudo()
+            .with_company(company_id)
+            .search_read(
+                [("company_id", "in", [False, company_id])], ["name", "uom_id"]
+            )
+        )
+        return (
+            IndiceProdutos((x["id"], x["name"]) for x in produtos),
+            {x["id"]: x["uom_id"] and x["uom_id"][0] for x in produtos},
+        )
+
+    def _indice_produtos(self):
+        """
+        Índice de palavras dos produtos ativos da empresa e a unidade de cada
+        produto. O índice é guardado no processo e montado de novo apenas
+        quando a assinatura do catálogo muda. A assinatura é conferida uma vez
+        por lote (`importa_lote`, a importação da pasta) ou por arquivo
+        (`importa_declaracao`, `previa_declaracao`), que guardam o índice no
+        cache do lote, e não a cada declaração.
+        """
+        cache = self._cache_lote("declaracao_importacao.indice_produtos")
+        if "indice" not in cache:
+            cache["indice"] = cache_indices.get(
+                (self.env.cr.dbname, self.env.company.id, self.env.lang),
+                self._assinatura_produtos(),
+                self._monta_indice_produtos,
+            )
+        return cache["indice"]
+
+    def _limiar_produto(self):
+        return float(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(PARAMETRO_LIMIAR, LIMIAR)
+        )
+
+    def _produto_aprendido(self, fornecedor_id, descricao_mercadoria, unidade_medida):
+        """
+        (produto, unidade) já associados à mercadoria do fornecedor, ou None se
+        não há associação ou se o produto foi arquivado ou é de outra empresa.
+        """
+        if not fornecedor_id:
+            return None
+        de_para_model = self.env["declaracao_importacao.de_para"]
+        cache = self._cache_lote("declaracao_importacao.de_para")
+        if fornecedor_id not in cache:
+            cache[fornecedor_id] = de_para_model._mapa_fornecedor(fornecedor_id)
+        return cache[fornecedor_id].get(
+            de_para_model._chave(descricao_mercadoria, unidade_medida)
+        )
+
+    def _match_product_unit(
+        self, vals, descricao_mercadoria, unidade_medida, fornecedor_id=False
+    ):
+        aprendido = self._produto_aprendido(
+            fornecedor_id, descricao_mercadoria, unidade_medida
+        )
+        if aprendido:
+            vals['product_id'], vals['uom_id'] = aprendido
+            return vals
 
-    def _match_product_unit(self, vals, descricao_mercadoria, unidade_medida):
         # Busca o produto no Odoo com base na descrição da mercadoria
-        produto = self.env['product.product'].search([('name', 'ilike', descricao_mercadoria)], limit=1)
-        
-        if produto:
-            vals['product_id'] = produto.id
-            vals['uom_id'] = produto.uom_id.id
+        cache = self._cache_lote("product.product")
+        indice, uoms = self._indice_produtos()
+        if descricao_mercadoria not in cache:
+            cache[descricao_mercadoria] = indice.melhor(
+                descricao_mercadoria, self._limiar_produto()
+            )
+        produto_id = cache[descricao_mercadoria]
+
+        if produto_id:
+            vals['product_id'] = produto_id
+            vals['uom_id'] = uoms[produto_id]
         else:
             # Caso o produto não seja encontrado, lança um aviso ou registra no log
             _logger.warning(f"Produto não encontrado para a descrição: {descricao_mercadoria}")
+            previa = self._previa()
+            if previa is not None:
+                previa["produtos"].add(descricao_mercadoria)
 
         return vals
 
-
-    def _importa_declaracao(self, mercadoria):
-        vals = {
-            "numero_sequencial_item": int(mercadoria.numero_sequencial_item),
-            "descricao_mercadoria": mercadoria.descricao_mercadoria,
-            "quantidade": int(mercadoria.quantidade) / D5,
-            "unidade_medida": mercadoria.unidade_medida,
-            "valor_unitario": int(mercadoria.valor_unitario) / D7,
-
-        }
+    def _importa_declaracao(self, dados, fornecedor_id=False):
+        vals = dict(dados)
         self._match_product_unit(
             vals,
-            mercadoria.descricao_mercadoria,
-            mercadoria.unidade_medida,
+            vals["descricao_mercadoria"],
+            vals["unidade_medida"],
+            fornecedor_id,
         )
         return vals
-    
-    
 
-        # TODO: Implementar a busca do produto
+    def write(self, vals):
+        res = super().write(vals)
+        # Produto informado na tela de-para: lembrado para as próximas declarações.
+        if vals.get("product_id") and self.env.context.get("di_aprende_produto"):
+            self.env["declaracao_importacao.de_para"]._aprende(self)
+        return res
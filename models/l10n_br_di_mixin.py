@@ -10,12 +10,24 @@ Classes:
       integração com a DI.
 
 Métodos:
+    - _cache_lote(nome): Retorna o dicionário de memoização compartilhado pela importação
+      em lote corrente.
+    - _previa(): Retorna o dicionário da pré-visualização corrente, ou None.
     - _s_currency(siscomex_code): Retorna a moeda correspondente ao código SISCOMEX fornecido.
 
 Detalhamento dos métodos:
-    - _s_currency: Este método realiza uma busca no modelo `res.currency` para localizar
-      a moeda que corresponde ao código SISCOMEX (Sistema Integrado de Comércio Exterior) 
-      informado como parâmetro. Ele retorna o primeiro registro encontrado, se houver.
+    - _cache_lote: Durante uma importação em lote (`importa_lote`) o contexto carrega a
+      chave `di_cache_lote`, um dicionário compartilhado por todos os arquivos do lote.
+      Cada tipo de busca (parceiros, produtos) usa um espaço próprio dentro dele.
+      Fora de um lote é retornado um dicionário novo, ou seja, nada é memorizado.
+    - _previa: Na pré-visualização (`previa_declaracao`) o contexto carrega a chave
+      `di_previa`, onde as buscas anotam o que não foi encontrado (moedas, produtos) ou
+      o que seria criado (parceiros), em vez de gravar no banco.
+    - _s_currency: Este método localiza a moeda que corresponde ao código SISCOMEX
+      (Sistema Integrado de Comércio Exterior) informado como parâmetro, ou nenhuma se o
+      código estiver vazio. A busca é feita por `res.currency._id_por_siscomex_code`, que
+      guarda o resultado no cache do registro: cada código é buscado no banco uma única
+      vez, até que o código SISCOMEX de alguma moeda seja alterado.
 
     Uso:
     Este mixin pode ser utilizado por outros modelos que necessitam realizar operações
@@ -31,8 +43,21 @@ class L10nBrDiMixin(models.AbstractModel):
     _name = "declaracao_importacao.mixin"
     _description = "Declaração Importação Mixin"
 
+    def _cache_lote(self, nome):
+        cache = self.env.context.get("di_cache_lote")
+        if cache is None:
+            return {}
+        return cache.setdefault(nome, {})
+
+    def _previa(self):
+        return self.env.context.get("di_previa")
+
     def _s_currency(self, siscomex_code):
-        return self.env["res.currency"].search(
-            [("siscomex_code", "=", siscomex_code)],
-            limit=1,
-        )
+        currency_model = self.env["res.currency"]
+        if not siscomex_code:
+            return currency_model
+        currency_id = currency_model._id_por_siscomex_code(str(siscomex_code))
+        previa = self._previa()
+        if previa is not None and not currency_id:
+            previa["moedas"].add(siscomex_code)
+        return currency_model.browse(currency_id)
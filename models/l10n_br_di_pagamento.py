@@ -24,14 +24,11 @@ Campos:
     - valor_multa: Campo Monetary que armazena o valor da multa.
     - valor_receita: Campo Monetary que armazena o valor da receita.
 
-Métodos:
-    - _importa_declaracao(pagamento): Este método recebe um objeto de pagamento e retorna
-      um dicionário com as informações do pagamento formatadas para importação.
-
-Detalhamento dos métodos:
-    - _importa_declaracao: Utiliza o objeto de pagamento recebido e converte seus valores,
-      aplicando divisões pelos fatores necessários (D2) para os campos monetários. Também
-      formata a data de pagamento usando a função `c_data`, importada de outro módulo.
+Conversão:
+    - Os valores de cada pagamento são extraídos do XML por `utils.conversao.converte_pagamento`,
+      que aplica as divisões pelos fatores necessários (D2) aos campos monetários e formata a
+      data de pagamento com `c_data`. Como o pagamento não tem campos relacionais a resolver,
+      o dicionário convertido é gravado diretamente pela declaração.
 
 Uso:
     Este modelo é utilizado para armazenar e manipular as informações de pagamento que
@@ -41,8 +38,6 @@ Uso:
 
 from odoo import fields, models
 
-from .l10n_br_di_declaracao import D2, c_data
-
 
 class L10nBrDiPagamento(models.Model):
 
@@ -70,18 +65,3 @@ class L10nBrDiPagamento(models.Model):
     valor_juros_encargos = fields.Monetary()
     valor_multa = fields.Monetary()
     valor_receita = fields.Monetary()
-
-    def _importa_declaracao(self, pagamento):
-        return {
-            "agencia_pagamento": pagamento.agencia_pagamento,
-            "banco_pagamento": pagamento.banco_pagamento,
-            "codigo_receita": pagamento.codigo_receita,
-            "codigo_tipo_pagamento": pagamento.codigo_tipo_pagamento,
-            "conta_pagamento": pagamento.conta_pagamento,
-            "data_pagamento": c_data(pagamento.data_pagamento),
-            "nome_tipo_pagamento": pagamento.nome_tipo_pagamento,
-            "numero_retificacao": pagamento.numero_retificacao,
-            "valor_juros_encargos": int(pagamento.valor_juros_encargos) / D2,
-            "valor_multa": int(pagamento.valor_multa) / D2,
-            "valor_receita": int(pagamento.valor_receita) / D2,
-        }
@@ -3,8 +3,6 @@
 
 from odoo import fields, models
 
-from .l10n_br_di_declaracao import D2
-
 
 class L10nBrDiValor(models.Model):
     """
@@ -28,10 +26,9 @@ class L10nBrDiValor(models.Model):
         - moeda_taxa (Float): Taxa de câmbio da moeda negociada para a moeda da empresa.
 
     Métodos:
-        - _importa_declaracao(acrescimo, deducao): Importa adições e deduções a partir
-          de um objeto de declaração, convertendo valores e calculando taxas de câmbio.
+        - _importa_declaracao(dados): Completa um acréscimo ou dedução já convertido por
+          `utils.conversao.converte_valores` com a moeda negociada correspondente.
     """
-        
 
     _name = "declaracao_importacao.valor"
     _inherit = "declaracao_importacao.mixin"
@@ -60,57 +57,10 @@ class L10nBrDiValor(models.Model):
 
     moeda_taxa = fields.Float()
 
-    def _importa_declaracao(self, acrescimo, deducao):
-        acrescimo_deducao = []
-
-        if acrescimo:
-            amount_reais = int(acrescimo.valor_reais) / D2
-            amount_currency = int(acrescimo.valor_moeda_negociada) / D2
-
-            trade_currency_id = self._s_currency(acrescimo.moeda_negociada_codigo)
-            if amount_currency and amount_reais:
-                currency_rate = amount_reais / amount_currency
-            else:
-                currency_rate = False
-
-            acrescimo_deducao.append(
-                {
-                    "codigo": acrescimo.codigo_acrescimo,
-                    "denominacao": acrescimo.denominacao,
-                    "moeda_negociada_codigo": acrescimo.moeda_negociada_codigo,
-                    "moeda_negociada_nome": acrescimo.moeda_negociada_nome,
-                    "valor": amount_reais,
-                    "valor_moeda_negociada": amount_currency,
-                    "moeda_taxa": currency_rate,
-                    "moeda_negociada_id": trade_currency_id.id
-                    if trade_currency_id
-                    else False,
-                }
-            )
-
-        if deducao:
-            amount_reais = int(deducao.valor_reais) / D2 * -1
-            amount_currency = int(deducao.valor_moeda_negociada) / D2 * -1
-
-            trade_currency_id = self._s_currency(deducao.moeda_negociada_codigo)
-            if amount_currency and amount_reais:
-                currency_rate = amount_reais / amount_currency
-            else:
-                currency_rate = False
-
-            acrescimo_deducao.append(
-                {
-                    "codigo": deducao.codigo_deducao,
-                    "denominacao": deducao.denominacao,
-                    "moeda_negociada_codigo": deducao.moeda_negociada_codigo,
-                    "moeda_negociada_nome": deducao.moeda_negociada_nome,
-                    "valor": amount_reais,
-                    "valor_moeda_negociada": amount_currency,
-                    "moeda_taxa": currency_rate,
-                    "moeda_negociada_id": trade_currency_id.id
-                    if trade_currency_id
-                    else False,
-                }
-            )
-
-        return acrescimo_deducao
+    def _importa_declaracao(self, dados):
+        vals = dict(dados)
+        trade_currency_id = self._s_currency(vals["moeda_negociada_codigo"])
+        vals["moeda_negociada_id"] = (
+            trade_currency_id.id if trade_currency_id else False
+        )
+        return vals
@@ -3,6 +3,8 @@
 
 from odoo import fields, models
 
+from ..utils.parser import DEFAULT_HANDLER, HANDLER_LXML, HANDLER_NATIVE
+
 
 class ResCompany(models.Model):
     _inherit = "res.company"
@@ -11,3 +13,14 @@ class ResCompany(models.Model):
         comodel_name="l10n_br_fiscal.operation",
         domain=[("state", "=", "approved")],
     )
+
+    di_xml_handler = fields.Selection(
+        selection=[
+            (HANDLER_LXML, "lxml"),
+            (HANDLER_NATIVE, "Python (xml.etree)"),
+        ],
+        string="Leitor XML da DI",
+        default=DEFAULT_HANDLER,
+        help="Biblioteca usada para ler os arquivos XML do SISCOMEX. "
+        "Sem o lxml instalado a leitura usa sempre xml.etree.",
+    )
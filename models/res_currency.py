@@ -1,7 +1,7 @@
 # Copyright (C) 2024-Today - KMEE (<https://kmee.com.br>).
 # @author Luis Felipe Mileo <mileo@kmee.com.br>
 
-from odoo import fields, models
+from odoo import api, fields, models, tools
 
 
 class ResCurrency(models.Model):
@@ -9,3 +9,40 @@ class ResCurrency(models.Model):
     _inherit = "res.currency"
 
     siscomex_code = fields.Char()
+
+    @api.model
+    @tools.ormcache("siscomex_code")
+    def _id_por_siscomex_code(self, siscomex_code):
+        """
+        Id da moeda ativa com o código SISCOMEX informado, ou False.
+
+        O resultado fica no cache do registro (`ormcache`), compartilhado por
+        todas as transações, e é descartado sempre que uma moeda com código é
+        criada ou tem o código, ou o estado ativo, alterado.
+        """
+        return (
+            self.sudo()
+            .with_context(active_test=True)
+            .search([("siscomex_code", "=", siscomex_code)], limit=1)
+            .id
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        currencies = super().create(vals_list)
+        if any(vals.get("siscomex_code") for vals in vals_list):
+            self.clear_caches()
+        return currencies
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "siscomex_code" in vals or "active" in vals:
+            self.clear_caches()
+        return res
+
+    def unlink(self):
+        codigos = any(self.mapped("siscomex_code"))
+        res = super().unlink()
+        if codigos:
+            self.clear_caches()
+        return res
@@ -0,0 +1,27 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import fields, models
+
+
+class ResPartner(models.Model):
+
+    _inherit = "res.partner"
+
+    di_nome_normalizado = fields.Char(
+        string="Nome normalizado (DI)",
+        copy=False,
+        readonly=True,
+        help="Chave do fabricante ou fornecedor criado pela importação de "
+        "declarações (nome sem acentos, pontuação e diferença de maiúsculas). "
+        "É única, de modo que importações simultâneas não duplicam o parceiro. "
+        "Fica vazia nos parceiros cadastrados de outra forma.",
+    )
+
+    _sql_constraints = [
+        (
+            "di_nome_normalizado_uniq",
+            "unique(di_nome_normalizado)",
+            "Já existe um parceiro importado de declarações com este nome.",
+        )
+    ]
@@ -0,0 +1,94 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Converte arquivos XML de DI ou JSON de DUIMP em JSON Lines ou CSV, sem o Odoo.
+
+Usa a mesma leitura, validação e conversão da importação do módulo
+(`utils.conversao.converte_arquivo`); basta um Python com xsdata (e, opcionalmente,
+lxml, NumPy e ijson). Cada arquivo é validado por inteiro: arquivos com erros são
+listados na saída de erros e ignorados, e o código de saída passa a ser 1.
+
+    python scripts/converte_declaracoes.py DI.xml [...] --nivel mercadoria \\
+        --formato csv --saida mercadorias.csv [--processos 4]
+
+Níveis: completo (só jsonl), declaracao, adicao, mercadoria, valor (acréscimos e
+deduções), despacho, pagamento, armazem, embalagem e declaracao_ee.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ADDON_DIR not in sys.path:
+    sys.path.insert(0, ADDON_DIR)
+
+from utils.conversao import converte_arquivo  # noqa: E402
+from utils.exportacao import FORMATOS, NIVEIS, escritor, linhas  # noqa: E402
+from utils.parser import HANDLERS  # noqa: E402
+from utils.validacao import DeclaracaoInvalida  # noqa: E402
+
+
+def _converte(caminho, handler):
+    try:
+        return converte_arquivo(caminho, handler), None
+    except DeclaracaoInvalida as erro:
+        return None, erro.erros
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    args.add_argument("arquivos", nargs="+", help="arquivos XML de DI ou JSON de DUIMP")
+    args.add_argument("--nivel", choices=NIVEIS, default="mercadoria")
+    args.add_argument("--formato", choices=FORMATOS, default="jsonl")
+    args.add_argument("--saida", help="arquivo de saída (padrão: saída padrão)")
+    args.add_argument("--handler", choices=sorted(HANDLERS))
+    args.add_argument(
+        "--processos",
+        type=int,
+        default=1,
+        help="processos de leitura e conversão (padrão: 1)",
+    )
+    opcoes = args.parse_args(argv)
+    if opcoes.nivel == "completo" and opcoes.formato == "csv":
+        args.error("o nível completo só pode ser exportado em jsonl")
+
+    handlers = [opcoes.handler] * len(opcoes.arquivos)
+    if opcoes.processos > 1:
+        pool = ProcessPoolExecutor(max_workers=opcoes.processos)
+        resultados = pool.map(_converte, opcoes.arquivos, handlers)
+    else:
+        pool = None
+        resultados = map(_converte, opcoes.arquivos, handlers)
+
+    saida = (
+        open(opcoes.saida, "w", encoding="utf-8", newline="")
+        if opcoes.saida
+        else sys.stdout
+    )
+    status = 0
+    try:
+        destino = escritor(opcoes.formato, saida)
+        for caminho, (declaracoes, erros) in zip(opcoes.arquivos, resultados):
+            if erros:
+                status = 1
+                print("%s:" % caminho, file=sys.stderr)
+                for erro in erros:
+                    print("  %s" % erro, file=sys.stderr)
+                continue
+            for declaracao in declaracoes:
+                for linha in linhas(declaracao, opcoes.nivel):
+                    destino.escreve(linha)
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+        if pool is not None:
+            pool.shutdown()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
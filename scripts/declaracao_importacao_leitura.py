@@ -0,0 +1,67 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Função executada pelos processos de leitura de `importa_lote`.
+
+Os processos são criados com spawn: começam de um interpretador limpo, sem o
+registro, os cursores e as threads do worker do Odoo. A pasta `scripts` é
+acrescentada ao sys.path apenas do processo de leitura, pelo `initializer` do
+pool, e este módulo é importado pelo nome. O processo do Odoo carrega o mesmo
+módulo pelo caminho do arquivo, sem alterar o próprio sys.path.
+
+O módulo não depende do Odoo. O pacote `utils` do addon é carregado pelo
+caminho, com o nome `declaracao_importacao_utils` (`PACOTE_UTILS`), e não como
+um pacote `utils` de primeiro nível, que colidiria com qualquer outro `utils`
+do sys.path.
+
+`converte` recebe apenas o caminho do arquivo no filestore (ou o conteúdo em
+bytes) e o handler XML, e nunca levanta exceção: devolve uma tupla que o
+processo do Odoo sabe desempacotar sem importar nada deste lado.
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACOTE_UTILS = "declaracao_importacao_utils"
+
+OK = "ok"
+INVALIDO = "invalido"
+ERRO = "erro"
+
+
+def carrega_utils(submodulo):
+    """Submódulo do pacote `utils` do addon, carregado como `PACOTE_UTILS`."""
+    if PACOTE_UTILS not in sys.modules:
+        pasta = os.path.join(ADDON_DIR, "utils")
+        spec = importlib.util.spec_from_file_location(
+            PACOTE_UTILS,
+            os.path.join(pasta, "__init__.py"),
+            submodule_search_locations=[pasta],
+        )
+        pacote = importlib.util.module_from_spec(spec)
+        sys.modules[PACOTE_UTILS] = pacote
+        try:
+            spec.loader.exec_module(pacote)
+        except BaseException:
+            del sys.modules[PACOTE_UTILS]
+            raise
+    return importlib.import_module("%s.%s" % (PACOTE_UTILS, submodulo))
+
+
+def converte(fonte, handler):
+    """
+    (OK, declarações), (INVALIDO, erros de validação) ou (ERRO, mensagem).
+    """
+    try:
+        conversao = carrega_utils("conversao")
+        validacao = carrega_utils("validacao")
+
+        try:
+            return OK, conversao.converte_arquivo(fonte, handler)
+        except validacao.DeclaracaoInvalida as erro:
+            return INVALIDO, list(erro.erros)
+    except Exception as erro:
+        return ERRO, "%s: %s" % (type(erro).__name__, erro)
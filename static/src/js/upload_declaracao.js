@@ -0,0 +1,21 @@
+odoo.define("declaracao_importacao.upload_declaracao", function (require) {
+    "use strict";
+
+    /**
+     * Campo de arquivos do assistente de importação: igual ao many2many_binary,
+     * mas envia os arquivos para /declaracao_importacao/upload, que os grava no
+     * filestore em blocos em vez de carregá-los na memória em base64.
+     */
+    var fieldRegistry = require("web.field_registry");
+    var relationalFields = require("web.relational_fields");
+
+    var FieldArquivosDeclaracao = relationalFields.FieldMany2ManyBinaryMultiFiles.extend(
+        {
+            template: "declaracao_importacao.FieldArquivosDeclaracao",
+        }
+    );
+
+    fieldRegistry.add("many2many_binary_declaracao", FieldArquivosDeclaracao);
+
+    return FieldArquivosDeclaracao;
+});
@@ -0,0 +1,11 @@
+from . import test_conversao
+from . import test_validacao
+from . import test_parceiros
+from . import test_de_para
+from . import test_mapeamento
+from . import test_numerico
+from . import test_cache
+from . import test_duimp
+from . import test_parser
+from . import test_exportacao
+from . import test_correspondencia
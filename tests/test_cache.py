@@ -0,0 +1,86 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tests.common import TransactionCase
+
+from ..utils.cache import CacheDeclaracoes
+from ..utils.duimp import VERSAO_MAPEAMENTO
+from ..utils.parser import HANDLER_LXML, HANDLER_NATIVE
+
+
+def declaracoes(numero_di, total=3):
+    return [
+        {"numero_di": numero_di, "di_adicao_ids": [{"numero_adicao": "%03d" % i}]}
+        for i in range(1, total + 1)
+    ]
+
+
+class TestCache(TransactionCase):
+    def grava(self, cache, chave, dados):
+        """Consome a gravação até o fim, como a importação."""
+        return list(cache.grava(chave, iter(dados)))
+
+    def test_grava_e_le(self):
+        cache = CacheDeclaracoes()
+        dados = declaracoes("2400000001")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(self.grava(cache, "a", dados), dados)
+        self.assertIn("a", cache)
+        self.assertEqual(list(cache.get("a")), dados)
+        # Cada leitura começa do início.
+        self.assertEqual(list(cache.get("a")), dados)
+
+    def test_iteracao_interrompida(self):
+        """Nada é guardado se o consumidor não chega ao fim das declarações."""
+        cache = CacheDeclaracoes()
+        gerador = cache.grava("a", iter(declaracoes("2400000001")))
+        next(gerador)
+        gerador.close()
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.total, 0)
+
+    def test_descarta_mais_antigo(self):
+        dados = declaracoes("2400000001", 50)
+        tamanho = CacheDeclaracoes()
+        self.grava(tamanho, "a", dados)
+        cache = CacheDeclaracoes(limite=tamanho.total * 2)
+        self.grava(cache, "a", dados)
+        self.grava(cache, "b", dados)
+        # A leitura de "a" a torna a mais recente: "b" sai no lugar dela.
+        list(cache.get("a"))
+        self.grava(cache, "c", dados)
+        self.assertEqual(
+            ("a" in cache, "b" in cache, "c" in cache), (True, False, True)
+        )
+        self.assertLessEqual(cache.total, cache.limite)
+
+    def test_acima_do_limite(self):
+        cache = CacheDeclaracoes(limite=64)
+        dados = declaracoes("2400000001", 50)
+        self.assertEqual(self.grava(cache, "a", dados), dados)
+        self.assertNotIn("a", cache)
+        self.assertEqual(len(cache), 0)
+
+    def test_invalida(self):
+        cache = CacheDeclaracoes()
+        self.grava(cache, "a", declaracoes("2400000001"))
+        self.grava(cache, "b", declaracoes("2400000002"))
+        cache.invalida("a")
+        self.assertEqual(("a" in cache, "b" in cache), (False, True))
+        cache.invalida()
+        self.assertEqual((len(cache), cache.total), (0, 0))
+
+    def test_chave(self):
+        """O mesmo conteúdo lido por outro leitor XML ocupa outra entrada."""
+        declaracao = self.env["declaracao_importacao.declaracao"]
+        company = self.env.company
+        company.di_xml_handler = HANDLER_NATIVE
+        chave = declaracao._chave_cache("abc")
+        self.assertEqual(chave, ("abc", HANDLER_NATIVE, VERSAO_MAPEAMENTO))
+        company.di_xml_handler = HANDLER_LXML
+        self.assertNotEqual(declaracao._chave_cache("abc"), chave)
+
+        cache = CacheDeclaracoes()
+        self.grava(cache, chave, declaracoes("2400000001"))
+        self.assertIsNone(cache.get(("abc", HANDLER_NATIVE, "versao-anterior")))
+        self.assertIsNotNone(cache.get(chave))
@@ -0,0 +1,29 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import os
+
+from odoo.tests.common import TransactionCase
+
+from ..utils.conversao import converte_arquivo
+from ..utils.parser import HANDLERS
+
+
+def caminho_dados(nome):
+    return os.path.join(os.path.dirname(__file__), "data", nome)
+
+
+class TestConversao(TransactionCase):
+    def test_elementos_repetidos(self):
+        """Todos os armazéns, embalagens e declarações estrangeiras da DI."""
+        for handler in HANDLERS:
+            with self.subTest(handler=handler):
+                (dados,) = converte_arquivo(
+                    caminho_dados("di_elementos_repetidos.xml"), handler
+                )
+                self.assertEqual(
+                    [x["nome_armazem"] for x in dados["di_armazem_ids"]],
+                    ["nomeArmazem Importação 00002", "nomeArmazem Importação 00003"],
+                )
+                self.assertEqual(len(dados["di_embalagem_ids"]), 2)
+                self.assertEqual(len(dados["di_declaracao_ee_ids"]), 2)
@@ -0,0 +1,72 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tests.common import TransactionCase
+
+from ..utils.correspondencia import CacheIndices, IndiceProdutos
+
+PRODUTOS = [
+    (1, "Parafuso sextavado aço inox M6X20"),
+    (2, "Parafuso sextavado aço inox M8X30"),
+    (3, "Arruela lisa aço inox M6"),
+    (4, "Porca sextavada aço inox M6"),
+    (5, "Parafuso sextavado aço inox M6X20"),
+    (6, ""),
+]
+
+
+class TestCorrespondencia(TransactionCase):
+    def setUp(self):
+        super().setUp()
+        self.indice = IndiceProdutos(PRODUTOS)
+
+    def test_melhor(self):
+        self.assertEqual(len(self.indice), 5)
+        self.assertEqual(self.indice.melhor("PARAFUSO SEXTAVADO M8X30 ACO INOX"), 2)
+        self.assertEqual(self.indice.melhor("arruela lisa m6"), 3)
+
+    def test_empate(self):
+        """Entre nomes iguais fica o produto mais antigo."""
+        self.assertEqual(self.indice.melhor("Parafuso sextavado aço inox M6X20"), 1)
+
+    def test_limiar(self):
+        self.assertFalse(self.indice.melhor("Arruela de pressão M10"))
+        self.assertEqual(self.indice.melhor("Arruela de pressão M10", limiar=0.1), 3)
+        self.assertFalse(self.indice.melhor("Rolamento 6204"))
+        self.assertFalse(self.indice.melhor("  --  "))
+
+    def test_palavras_frequentes(self):
+        """Palavras presentes em boa parte do catálogo não geram candidatos."""
+        produtos = [(i, "Peça genérica %d" % i) for i in range(1, 121)]
+        indice = IndiceProdutos(produtos + [(200, "Peça especial ZX9")])
+        self.assertFalse(indice.melhor("Peça genérica", limiar=0.0))
+        self.assertEqual(indice.melhor("Peça ZX9"), 200)
+
+
+class TestCacheIndices(TransactionCase):
+    def test_assinatura(self):
+        """O índice só é montado de novo quando a assinatura do catálogo muda."""
+        cache = CacheIndices()
+        montagens = []
+
+        def monta():
+            montagens.append(1)
+            return len(montagens)
+
+        self.assertEqual(cache.get("a", (10, "2024-01-01"), monta), 1)
+        self.assertEqual(cache.get("a", (10, "2024-01-01"), monta), 1)
+        self.assertEqual(cache.get("a", (11, "2024-01-02"), monta), 2)
+        self.assertEqual(len(montagens), 2)
+        cache.invalida()
+        self.assertEqual(cache.get("a", (11, "2024-01-02"), monta), 3)
+
+    def test_descarta_mais_antigo(self):
+        cache = CacheIndices(maximo=2)
+        cache.get("a", 1, lambda: "a")
+        cache.get("b", 1, lambda: "b")
+        cache.get("a", 1, lambda: "outro")
+        cache.get("c", 1, lambda: "c")
+        self.assertEqual(len(cache), 2)
+        # "b" foi o usado há mais tempo e é montado de novo.
+        self.assertEqual(cache.get("b", 1, lambda: "b2"), "b2")
+        self.assertEqual(cache.get("c", 1, lambda: "outro"), "c")
@@ -0,0 +1,46 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tests.common import TransactionCase
+
+
+class TestDePara(TransactionCase):
+    def setUp(self):
+        super().setUp()
+        self.de_para_model = self.env["declaracao_importacao.de_para"]
+        self.fornecedor = self.env["res.partner"].create({"name": "Fornecedor De-Para"})
+        self.produto = self.env["product.product"].create({"name": "Parafuso M6X20"})
+        descricao, unidade = self.de_para_model._chave("Parafuso m6x20", "pç")
+        self.chave = (descricao, unidade)
+        self.de_para_model.create(
+            {
+                "fornecedor_partner_id": self.fornecedor.id,
+                "descricao_mercadoria": "Parafuso m6x20",
+                "descricao_normalizada": descricao,
+                "unidade_medida": unidade,
+                "product_id": self.produto.id,
+            }
+        )
+
+    def test_produto_aprendido(self):
+        mapa = self.de_para_model._mapa_fornecedor(self.fornecedor.id)
+        self.assertEqual(mapa[self.chave][0], self.produto.id)
+
+    def test_produto_arquivado(self):
+        self.produto.active = False
+        self.assertNotIn(
+            self.chave, self.de_para_model._mapa_fornecedor(self.fornecedor.id)
+        )
+
+    def test_produto_de_outra_empresa(self):
+        empresa = self.env["res.company"].create({"name": "Outra Empresa De-Para"})
+        self.produto.product_tmpl_id.write(
+            {
+                "company_id": empresa.id,
+                "taxes_id": [(5, 0, 0)],
+                "supplier_taxes_id": [(5, 0, 0)],
+            }
+        )
+        self.assertNotIn(
+            self.chave, self.de_para_model._mapa_fornecedor(self.fornecedor.id)
+        )
@@ -0,0 +1,101 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import io
+import json
+from datetime import date
+from unittest import mock
+
+from odoo.tests.common import TransactionCase
+
+from ..utils import duimp
+from ..utils.conversao import converte_arquivo
+from ..utils.validacao import DeclaracaoInvalida
+from .test_conversao import caminho_dados
+
+
+class TestDuimp(TransactionCase):
+    def setUp(self):
+        super().setUp()
+        with open(caminho_dados("duimp.json"), "rb") as arquivo:
+            self.json = arquivo.read()
+
+    def test_converte(self):
+        primeira, segunda = duimp.converte_arquivo_duimp(self.json)
+        self.assertEqual(primeira["numero_di"], "24BR00000012345")
+        self.assertEqual(primeira["data_registro"], date(2024, 3, 5))
+        self.assertEqual(primeira["carga_peso_bruto"], 1520.5)
+        self.assertEqual(primeira["total_adicoes"], 2)
+        self.assertEqual(
+            [x["quantidade_volume"] for x in primeira["di_embalagem_ids"]], [40, 2]
+        )
+        adicao = primeira["di_adicao_ids"][0]
+        self.assertEqual(adicao["numero_di"], "24BR00000012345")
+        (mercadoria,) = adicao["di_adicao_mercadoria_ids"]
+        self.assertEqual(mercadoria["numero_sequencial_item"], 1)
+        self.assertEqual(mercadoria["valor_unitario"], 0.12)
+        self.assertEqual(len(adicao["di_adicao_valor_ids"]), 2)
+        # Os campos ausentes do JSON ficam vazios.
+        self.assertIsNone(segunda["data_desembaraco"])
+        self.assertEqual(segunda["di_embalagem_ids"], [])
+
+    def test_mesmas_chaves_do_xml(self):
+        """A DUIMP é importada pelo mesmo caminho que a DI em XML."""
+        (di,) = converte_arquivo(caminho_dados("di_elementos_repetidos.xml"))
+        (dados, _segunda) = converte_arquivo(self.json)
+        self.assertEqual(set(dados), set(di))
+        self.assertEqual(
+            set(dados["di_adicao_ids"][0]), set(di["di_adicao_ids"][0])
+        )
+
+    def test_leitura_incremental(self):
+        """
+        O gerador devolve o mesmo que a conversão do arquivo inteiro, com o
+        ijson ou com o decodificador da biblioteca padrão lendo blocos
+        pequenos, que cortam nomes e números ao meio.
+        """
+        esperado = duimp.converte_arquivo_duimp(self.json)
+        leitores = {"ijson": {}, "biblioteca padrão": {"ijson": None}}
+        if duimp.ijson is None:
+            del leitores["ijson"]
+        for leitor, atributos in leitores.items():
+            for bloco in (7, 64, duimp.TAMANHO_BLOCO):
+                with self.subTest(leitor=leitor, bloco=bloco), mock.patch.multiple(
+                    duimp, TAMANHO_BLOCO=bloco, **atributos
+                ):
+                    declaracoes = duimp.iter_arquivo_duimp(io.BytesIO(self.json))
+                    self.assertEqual(next(declaracoes), esperado[0])
+                    self.assertEqual(list(declaracoes), esperado[1:])
+
+    def test_objeto_unico(self):
+        (esperado, _segunda) = duimp.converte_arquivo_duimp(self.json)
+        objeto = json.dumps(json.loads(self.json)[0]).encode()
+        self.assertTrue(duimp.eh_duimp(objeto))
+        self.assertEqual(list(duimp.iter_arquivo_duimp(io.BytesIO(objeto))), [esperado])
+
+    def test_erros(self):
+        """Todos os erros do arquivo são relatados antes da primeira DUIMP."""
+        declaracoes = json.loads(self.json)
+        declaracoes[0]["itens"][1]["mercadoria"]["quantidadeComercial"] = "muitas"
+        declaracoes[1]["identificacao"]["dataRegistro"] = "06/03/2024"
+        with self.assertRaises(DeclaracaoInvalida) as erro:
+            duimp.iter_arquivo_duimp(io.BytesIO(json.dumps(declaracoes).encode()))
+        self.assertEqual(
+            erro.exception.erros,
+            [
+                "DUIMP 1, item 2: campo mercadoria.quantidadeComercial com valor "
+                "não numérico ('muitas')",
+                "DUIMP 2: campo identificacao.dataRegistro com data inválida "
+                "('06/03/2024')",
+            ],
+        )
+
+    def test_json_mal_formado(self):
+        for leitor in ("ijson", None):
+            with self.subTest(leitor=leitor), mock.patch.object(
+                duimp, "ijson", duimp.ijson if leitor else None
+            ):
+                with self.assertRaises(DeclaracaoInvalida) as erro:
+                    duimp.iter_arquivo_duimp(io.BytesIO(self.json[:-40]))
+                (mensagem,) = erro.exception.erros
+                self.assertTrue(mensagem.startswith("JSON mal formado"), mensagem)
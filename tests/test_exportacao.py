@@ -0,0 +1,94 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import csv
+import io
+import json
+from datetime import date
+
+from odoo.tests.common import TransactionCase
+
+from ..utils.conversao import converte_arquivo
+from ..utils.exportacao import NIVEIS, escritor, linhas
+from .test_conversao import caminho_dados
+
+
+class TestExportacao(TransactionCase):
+    def setUp(self):
+        super().setUp()
+        (self.declaracao,) = converte_arquivo(
+            caminho_dados("di_elementos_repetidos.xml")
+        )
+
+    def test_niveis(self):
+        """Uma linha por registro do nível, só com escalares e as chaves do pai."""
+        declaracao = self.declaracao
+        adicoes = declaracao["di_adicao_ids"]
+        contagens = {
+            "completo": 1,
+            "declaracao": 1,
+            "adicao": len(adicoes),
+            "mercadoria": sum(len(a["di_adicao_mercadoria_ids"]) for a in adicoes),
+            "valor": sum(len(a["di_adicao_valor_ids"]) for a in adicoes),
+            "despacho": len(declaracao["di_despacho_ids"]),
+            "pagamento": len(declaracao["di_pagamento_ids"]),
+            "armazem": 2,
+            "embalagem": 2,
+            "declaracao_ee": 2,
+        }
+        self.assertEqual(set(contagens), set(NIVEIS))
+        for nivel, total in contagens.items():
+            with self.subTest(nivel=nivel):
+                resultado = list(linhas(declaracao, nivel))
+                self.assertEqual(len(resultado), total)
+                if nivel == "completo":
+                    self.assertIs(resultado[0], declaracao)
+                    continue
+                for linha in resultado:
+                    self.assertFalse(
+                        [k for k, v in linha.items() if isinstance(v, list)]
+                    )
+                    self.assertEqual(next(iter(linha)), "numero_di")
+                if nivel not in ("declaracao", "adicao"):
+                    # Na adição e na declaração o número é o do próprio registro.
+                    self.assertEqual(
+                        {linha["numero_di"] for linha in resultado},
+                        {declaracao["numero_di"]},
+                    )
+                if nivel in ("mercadoria", "valor"):
+                    self.assertEqual(
+                        resultado[0]["numero_adicao"], adicoes[0]["numero_adicao"]
+                    )
+
+    def test_jsonl(self):
+        saida = io.StringIO()
+        saida_escritor = escritor("jsonl", saida)
+        for linha in linhas(self.declaracao, "completo"):
+            saida_escritor.escreve(linha)
+        (texto,) = saida.getvalue().splitlines()
+        dados = json.loads(texto)
+        self.assertEqual(
+            dados["data_registro"], self.declaracao["data_registro"].isoformat()
+        )
+        self.assertEqual(
+            [x["nome_armazem"] for x in dados["di_armazem_ids"]],
+            ["nomeArmazem Importação 00002", "nomeArmazem Importação 00003"],
+        )
+
+    def test_csv(self):
+        saida = io.StringIO()
+        saida_escritor = escritor("csv", saida)
+        registros = [
+            {"numero_di": "2", "data": date(2024, 1, 15), "valor": 1.5, "vazio": False},
+            {"numero_di": "2", "data": None, "valor": 0.0, "vazio": "x"},
+        ]
+        for linha in registros:
+            saida_escritor.escreve(linha)
+        self.assertEqual(
+            list(csv.reader(io.StringIO(saida.getvalue()))),
+            [
+                ["numero_di", "data", "valor", "vazio"],
+                ["2", "2024-01-15", "1.5", ""],
+                ["2", "", "0.0", "x"],
+            ],
+        )
@@ -0,0 +1,111 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from operator import attrgetter
+
+from odoo.tests.common import TransactionCase
+
+from ..utils import mapeamento, numerico
+from ..utils.lista_declaracoes import Mercadoria
+from ..utils.parser import iter_declaracoes
+from .test_conversao import caminho_dados
+
+REFERENCIA = {
+    mapeamento.TEXTO: lambda valor: valor,
+    mapeamento.STR: str,
+    mapeamento.INTEIRO: int,
+    mapeamento.DATA: mapeamento.c_data,
+    mapeamento.NUMERO_DI: mapeamento.c_numero_di,
+}
+
+
+def converte_referencia(classe, obj):
+    """A tabela de `MAPEAMENTOS` aplicada campo a campo, sem código gerado."""
+    dados = {}
+    for campo, tipo, origem in mapeamento.entradas(classe):
+        valor = attrgetter(origem)(obj)
+        if isinstance(tipo, int):
+            dados[campo] = int(valor) / tipo
+        else:
+            dados[campo] = REFERENCIA[tipo](valor)
+    return dados
+
+
+def objetos(obj):
+    """(classe, objeto) de todos os registros mapeados abaixo de `obj`."""
+    yield type(obj), obj
+    for nome in mapeamento.FILHOS.get(type(obj), ()):
+        filhos = getattr(obj, nome)
+        # Acréscimo e dedução são elementos únicos da adição.
+        if not isinstance(filhos, list):
+            filhos = [] if filhos is None else [filhos]
+        for filho in filhos:
+            yield from objetos(filho)
+
+
+def mercadoria(numero):
+    return Mercadoria(
+        descricao_mercadoria="PARAFUSO M6X20 %d" % numero,
+        numero_sequencial_item="%02d" % (numero % 100),
+        quantidade="%014d" % (numero * 12345),
+        unidade_medida="UN",
+        valor_unitario="%020d" % (numero * 9876543),
+    )
+
+
+class TestMapeamento(TransactionCase):
+    def setUp(self):
+        super().setUp()
+        self.declaracoes = list(
+            iter_declaracoes(caminho_dados("di_elementos_repetidos.xml"))
+        )
+
+    def test_compila(self):
+        """O código gerado converte cada registro exatamente como a tabela."""
+        conferidas = set()
+        for di in self.declaracoes:
+            for classe, obj in objetos(di):
+                with self.subTest(classe=classe.__name__):
+                    dados = mapeamento.compila(classe)(obj)
+                    self.assertEqual(dados, converte_referencia(classe, obj))
+                    self.assertEqual(
+                        list(dados),
+                        [campo for campo, _t, _o in mapeamento.entradas(classe)],
+                    )
+                conferidas.add(classe)
+        self.assertEqual(conferidas, set(mapeamento.MAPEAMENTOS))
+
+    def test_compila_lote(self):
+        """Listas grandes (colunas em NumPy) e pequenas dão o mesmo resultado."""
+        converte = mapeamento.compila_lote(Mercadoria)
+        for total in (3, numerico.MINIMO_VETORIZADO + 5):
+            with self.subTest(total=total):
+                lote = [mercadoria(numero) for numero in range(1, total + 1)]
+                self.assertEqual(
+                    converte(lote),
+                    [converte_referencia(Mercadoria, obj) for obj in lote],
+                )
+
+    def test_atributo_inexistente(self):
+        tabela = mapeamento.MAPEAMENTOS[Mercadoria]
+        mapeamento.MAPEAMENTOS[Mercadoria] = tabela + (("nao_existe", mapeamento.D2),)
+        try:
+            with self.assertRaises(ValueError):
+                mapeamento.compila(Mercadoria)
+        finally:
+            mapeamento.MAPEAMENTOS[Mercadoria] = tabela
+
+    def test_versao(self):
+        """Qualquer alteração da tabela muda a versão usada no cache."""
+        original = mapeamento.versao(mapeamento.MAPEAMENTOS, mapeamento.FILHOS)
+        self.assertEqual(
+            original, mapeamento.versao(mapeamento.MAPEAMENTOS, mapeamento.FILHOS)
+        )
+        alterada = dict(mapeamento.MAPEAMENTOS)
+        alterada[Mercadoria] = tuple(
+            ("quantidade", mapeamento.D7)
+            if entrada == ("quantidade", mapeamento.D5)
+            else entrada
+            for entrada in alterada[Mercadoria]
+        )
+        self.assertNotEqual(original, mapeamento.versao(alterada, mapeamento.FILHOS))
@@ -0,0 +1,64 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import random
+from unittest import skipUnless
+
+from odoo.tests.common import TransactionCase
+
+from ..utils import numerico
+from ..utils.mapeamento import D2, D5, D7
+
+
+@skipUnless(numerico.disponivel(), "NumPy não instalado")
+class TestNumerico(TransactionCase):
+    def setUp(self):
+        super().setUp()
+        self.random = random.Random(42)
+
+    def coluna(self, largura, total=numerico.MINIMO_VETORIZADO):
+        return [
+            "%0*d" % (largura, self.random.randrange(10**largura))
+            for _i in range(total)
+        ]
+
+    def test_igual_escalar(self):
+        """A decodificação em NumPy é idêntica a `int(texto) / escala`."""
+        for largura in (1, 7, 15):
+            for escala in (None, D2, D5, D7):
+                with self.subTest(largura=largura, escala=escala):
+                    textos = self.coluna(largura)
+                    valores = numerico._decodifica_numpy(textos, escala)
+                    self.assertIsNotNone(valores)
+                    self.assertEqual(
+                        valores, numerico.decodifica_escalar(textos, escala)
+                    )
+                    self.assertEqual(
+                        [type(v) for v in valores],
+                        [int if escala is None else float] * len(textos),
+                    )
+
+    def test_colunas_irregulares(self):
+        """Colunas fora do formato fixo seguem pelo caminho escalar."""
+        base = self.coluna(15)
+        casos = {
+            "larguras diferentes": base[:-1] + ["12"],
+            "sinal": base[:-1] + ["-" + base[-1][1:]],
+            "espaços": base[:-1] + [" " + base[-1][1:]],
+            "mais de 15 dígitos": self.coluna(20),
+            "não ASCII": base[:-1] + ["١" * 15],
+        }
+        for caso, textos in casos.items():
+            with self.subTest(caso=caso):
+                self.assertIsNone(numerico._decodifica_numpy(textos, D2))
+                self.assertEqual(
+                    numerico.decodifica_coluna(textos, D2),
+                    numerico.decodifica_escalar(textos, D2),
+                )
+
+    def test_coluna_pequena(self):
+        textos = self.coluna(15, numerico.MINIMO_VETORIZADO - 1)
+        self.assertEqual(
+            numerico.decodifica_coluna(textos, D7),
+            numerico.decodifica_escalar(textos, D7),
+        )
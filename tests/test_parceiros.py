@@ -0,0 +1,31 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tests.common import TransactionCase
+
+
+class TestParceiros(TransactionCase):
+    def setUp(self):
+        super().setUp()
+        self.adicao_model = self.env["declaracao_importacao.adicao"]
+
+    def _importa(self, nome):
+        lote = self.adicao_model.with_context(di_cache_lote={})
+        return lote._busca_parceiro(nome, "100", "Rua das Flores", "Curitiba")
+
+    def test_cria_uma_vez(self):
+        parceiro = self._importa("Açme  Ltda.")
+        self.assertEqual(parceiro.di_nome_normalizado, "ACME LTDA")
+        self.assertEqual(self._importa("ACME LTDA"), parceiro)
+
+    def test_parceiro_arquivado(self):
+        """O parceiro importado e depois arquivado é reaproveitado."""
+        parceiro = self._importa("Fornecedor Arquivado S.A.")
+        parceiro.active = False
+        self.assertEqual(self._importa("Fornecedor Arquivado S.A."), parceiro)
+        self.assertEqual(
+            self.env["res.partner"]
+            .with_context(active_test=False)
+            .search_count([("di_nome_normalizado", "=", "FORNECEDOR ARQUIVADO S A")]),
+            1,
+        )
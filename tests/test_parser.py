@@ -0,0 +1,68 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tests.common import TransactionCase
+
+from ..utils.lista_declaracoes import ListaDeclaracoes
+from ..utils.parser import HANDLERS, get_parser, iter_declaracoes
+from .test_conversao import caminho_dados
+
+
+class TestParser(TransactionCase):
+    def setUp(self):
+        super().setUp()
+        with open(caminho_dados("di_elementos_repetidos.xml"), "rb") as arquivo:
+            xml = arquivo.read()
+        inicio = xml.index(b"<declaracaoImportacao>")
+        fim = xml.index(b"</ListaDeclaracoes>")
+        declaracao = xml[inicio:fim]
+        # Três declarações com números diferentes no mesmo arquivo.
+        self.xml = (
+            xml[:inicio]
+            + b"".join(
+                declaracao.replace(
+                    b"    <numeroDI>2</numeroDI>", b"    <numeroDI>%d</numeroDI>" % n
+                )
+                for n in (2, 3, 4)
+            )
+            + xml[fim:]
+        )
+
+    def test_igual_ao_documento_inteiro(self):
+        """A leitura incremental dá o mesmo que ler a lista de uma vez."""
+        for handler in HANDLERS:
+            with self.subTest(handler=handler):
+                lista = get_parser(handler).from_bytes(self.xml, ListaDeclaracoes)
+                declaracoes = list(iter_declaracoes(self.xml, handler))
+                self.assertEqual(declaracoes, lista.declaracao_importacao)
+                self.assertEqual([di.numero_di for di in declaracoes], [2, 3, 4])
+
+    def test_origens(self):
+        """Caminho, bytes e fluxo binário são lidos da mesma forma."""
+        caminho = caminho_dados("di_elementos_repetidos.xml")
+        with open(caminho, "rb") as arquivo:
+            esperado = list(iter_declaracoes(arquivo.read()))
+        self.assertEqual(list(iter_declaracoes(caminho)), esperado)
+        with open(caminho, "rb") as arquivo:
+            self.assertEqual(list(iter_declaracoes(arquivo)), esperado)
+
+    def test_encoding_do_prologo(self):
+        latin1 = self.xml.decode("utf-8").encode("iso-8859-1")
+        latin1 = latin1.replace(b"encoding='UTF-8'", b"encoding='ISO-8859-1'", 1)
+        for handler in HANDLERS:
+            with self.subTest(handler=handler):
+                self.assertEqual(
+                    list(iter_declaracoes(latin1, handler)),
+                    list(iter_declaracoes(self.xml, handler)),
+                )
+
+    def test_uma_declaracao_por_vez(self):
+        """Cada declaração é entregue antes de o restante do arquivo ser lido."""
+        truncado = self.xml[: self.xml.rindex(b"<declaracaoImportacao>") + 40]
+        for handler in HANDLERS:
+            with self.subTest(handler=handler):
+                declaracoes = iter_declaracoes(truncado, handler)
+                self.assertEqual(next(declaracoes).numero_di, 2)
+                self.assertEqual(next(declaracoes).numero_di, 3)
+                with self.assertRaises(SyntaxError):
+                    next(declaracoes)
@@ -0,0 +1,76 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tests.common import TransactionCase
+
+from ..utils.parser import HANDLERS
+from ..utils.validacao import (
+    DeclaracaoInvalida,
+    valida_declaracoes,
+    verifica_declaracoes,
+)
+from .test_conversao import caminho_dados
+
+
+class TestValidacao(TransactionCase):
+    def setUp(self):
+        super().setUp()
+        with open(caminho_dados("di_elementos_repetidos.xml"), "rb") as arquivo:
+            self.xml = arquivo.read()
+
+    def test_arquivo_valido(self):
+        for handler in HANDLERS:
+            with self.subTest(handler=handler):
+                self.assertEqual(valida_declaracoes(self.xml, handler), [])
+
+    def test_estrutura(self):
+        """Elementos que o binding rejeitaria são relatados antes da conversão."""
+        xml = (
+            self.xml.replace(b"<nomeArmazem>", b"<desconhecido/><nomeArmazem>", 1)
+            .replace(b"<freteCollect>", b"<freteCollect>S</freteCollect><freteCollect>", 1)
+            .replace(b"<codigoAcrescimo>", b"<codigoAcrescimo><filho/>", 1)
+        )
+        for handler in HANDLERS:
+            with self.subTest(handler=handler):
+                self.assertEqual(
+                    valida_declaracoes(xml, handler),
+                    [
+                        "Declaração 1, adição 1, acréscimo 1: elemento filho não "
+                        "previsto em codigoAcrescimo",
+                        "Declaração 1: elemento desconhecido não previsto em armazem",
+                        "Declaração 1: elemento freteCollect repetido em "
+                        "declaracaoImportacao",
+                    ],
+                )
+
+    def test_valores(self):
+        """Números, datas e campos obrigatórios, com a posição de cada erro."""
+        xml = (
+            self.xml.replace(b"<quantidade>000000000003802<", b"<quantidade>38,02<", 1)
+            .replace(b"<dataRegistro>20240115<", b"<dataRegistro>15/01/2024<", 1)
+            .replace(b"<valorUnitario>", b"<ignorado>", 1)
+            .replace(b"</valorUnitario>", b"</ignorado>", 1)
+        )
+        for handler in HANDLERS:
+            with self.subTest(handler=handler):
+                with self.assertRaises(DeclaracaoInvalida) as erro:
+                    verifica_declaracoes(xml, handler)
+                self.assertEqual(
+                    erro.exception.erros,
+                    [
+                        "Declaração 1, adição 1, mercadoria 1: elemento ignorado não "
+                        "previsto em mercadoria",
+                        "Declaração 1, adição 1, mercadoria 1: campo valorUnitario "
+                        "ausente",
+                        "Declaração 1, adição 1, mercadoria 1: campo quantidade não "
+                        "numérico ('38,02')",
+                        "Declaração 1: campo dataRegistro com data inválida "
+                        "('15/01/2024')",
+                    ],
+                )
+
+    def test_xml_mal_formado(self):
+        for handler in HANDLERS:
+            with self.subTest(handler=handler):
+                (erro,) = valida_declaracoes(self.xml[:-30], handler)
+                self.assertTrue(erro.startswith("XML mal formado: "), erro)
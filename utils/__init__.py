@@ -1 +1,12 @@
 from . import lista_declaracoes
+from . import numerico
+from . import mapeamento
+from . import parser
+from . import checksum
+from . import conversao
+from . import cache
+from . import validacao
+from . import exportacao
+from . import duimp
+from . import normalizacao
+from . import correspondencia
@@ -0,0 +1,104 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Cache das declarações convertidas, indexado pelo hash do conteúdo do arquivo,
+pelo leitor XML e pela versão das tabelas de mapeamento (`_chave_cache` do
+modelo de declaração).
+
+Reimportar um arquivo cujo conteúdo não mudou não precisa ler o XML de novo:
+os dicionários gerados por `conversao.converte_declaracao` ficam guardados
+como uma sequência de pickles comprimida com gzip, que é gravada e lida de
+forma incremental, uma declaração por vez.
+
+O cache é do processo (cada worker do Odoo tem o seu), limitado em bytes
+comprimidos e descarta primeiro as entradas usadas há mais tempo. Arquivos
+cujas declarações comprimidas não caberiam no limite não são guardados.
+"""
+
+import gzip
+import io
+import pickle
+import threading
+from collections import OrderedDict
+
+LIMITE_PADRAO = 64 * 2**20
+
+
+class CacheDeclaracoes:
+    def __init__(self, limite=LIMITE_PADRAO):
+        self.limite = limite
+        self._itens = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, chave):
+        return chave in self._itens
+
+    def __len__(self):
+        return len(self._itens)
+
+    @property
+    def total(self):
+        """Bytes comprimidos ocupados pelas entradas."""
+        return self._total
+
+    def get(self, chave):
+        """Retorna um iterador sobre as declarações guardadas, ou None."""
+        with self._lock:
+            blob = self._itens.get(chave)
+            if blob is None:
+                return None
+            self._itens.move_to_end(chave)
+        return self._carrega(blob)
+
+    def grava(self, chave, declaracoes):
+        """
+        Repassa `declaracoes` e, ao fim da iteração, guarda o que foi repassado.
+
+        Se o consumidor interromper a iteração, ou se o conteúdo comprimido
+        passar do limite, nada é guardado.
+        """
+        buffer = io.BytesIO()
+        arquivo = gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=1)
+        for dados in declaracoes:
+            if arquivo is not None:
+                pickle.dump(dados, arquivo, pickle.HIGHEST_PROTOCOL)
+                if buffer.tell() > self.limite:
+                    arquivo = None
+            yield dados
+
+        if arquivo is not None:
+            arquivo.close()
+            self._adiciona(chave, buffer.getvalue())
+
+    def invalida(self, chave=None):
+        with self._lock:
+            if chave is None:
+                self._itens.clear()
+                self._total = 0
+            elif chave in self._itens:
+                self._total -= len(self._itens.pop(chave))
+
+    def _adiciona(self, chave, blob):
+        if len(blob) > self.limite:
+            return
+        with self._lock:
+            if chave in self._itens:
+                self._total -= len(self._itens.pop(chave))
+            while self._itens and self._total + len(blob) > self.limite:
+                _chave, antigo = self._itens.popitem(last=False)
+                self._total -= len(antigo)
+            self._itens[chave] = blob
+            self._total += len(blob)
+
+    @staticmethod
+    def _carrega(blob):
+        with gzip.GzipFile(fileobj=io.BytesIO(blob), mode="rb") as arquivo:
+            while True:
+                try:
+                    yield pickle.load(arquivo)
+                except EOFError:
+                    return
+
+
+cache_declaracoes = CacheDeclaracoes()
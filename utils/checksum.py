@@ -0,0 +1,23 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Checksum do conteúdo de um arquivo de declaração.
+
+O hash é calculado sobre os bytes do arquivo, sem nenhuma normalização: remover
+espaços ou linhas também alteraria o texto dos campos de várias linhas (como
+`informacaoComplementar`), e dois arquivos com conteúdo diferente passariam a
+ser tratados como o mesmo. O arquivo é lido em blocos, sem carregá-lo inteiro
+na memória.
+"""
+
+import hashlib
+
+BLOCO = 2**16
+
+
+def checksum_arquivo(stream):
+    """Retorna o SHA-256 hexadecimal dos bytes de `stream`."""
+    digest = hashlib.sha256()
+    for bloco in iter(lambda: stream.read(BLOCO), b""):
+        digest.update(bloco)
+    return digest.hexdigest()
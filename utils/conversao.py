@@ -0,0 +1,174 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Conversão das declarações lidas do XML em dicionários de valores.
+
+As funções deste módulo não dependem do ORM: recebem os objetos de
+`lista_declaracoes` e devolvem dicionários simples (str, int, float, date e
+listas), prontos para serem serializados ou enviados entre processos. Os
+campos relacionais (moedas, parceiros e produtos) não são resolvidos aqui; os
+modelos completam os valores a partir dos códigos e nomes presentes nos
+dicionários, em `_importa_declaracao`.
+
+Os filhos de cada registro ficam nas chaves dos campos One2many
+correspondentes (`di_adicao_ids`, `di_adicao_mercadoria_ids`...), como listas
+de dicionários.
+
+Os campos copiados de cada elemento e a escala dos valores numéricos (inteiros
+com zeros à esquerda e casas decimais implícitas: D2 para valores monetários,
+D5 para quantidades e D7 para pesos e valores unitários) estão na tabela de
+`mapeamento`; aqui ficam apenas os filhos e os valores calculados, como as
+taxas de câmbio.
+"""
+
+from itertools import islice
+
+from .lista_declaracoes import (
+    Acrescimo,
+    Adicao,
+    Armazem,
+    DeclaracaoEe,
+    DeclaracaoImportacao,
+    Deducao,
+    DocumentoInstrucaoDespacho,
+    Embalagem,
+    Mercadoria,
+    Pagamento,
+)
+from .mapeamento import (  # noqa: F401
+    D2,
+    D3,
+    D4,
+    D5,
+    D7,
+    c_data,
+    compila,
+    compila_lote,
+)
+from .parser import iter_declaracoes
+from .validacao import verifica_declaracoes
+
+converte_mercadoria = compila(Mercadoria)
+converte_mercadorias = compila_lote(Mercadoria)
+converte_despacho = compila(DocumentoInstrucaoDespacho)
+converte_pagamento = compila(Pagamento)
+converte_armazem = compila(Armazem)
+converte_embalagem = compila(Embalagem)
+converte_declaracao_ee = compila(DeclaracaoEe)
+_converte_acrescimo = compila(Acrescimo)
+_converte_deducao = compila(Deducao)
+_converte_adicao = compila(Adicao)
+_converte_declaracao = compila(DeclaracaoImportacao)
+
+
+def _completa_valor(dados):
+    if dados["valor_moeda_negociada"] and dados["valor"]:
+        dados["moeda_taxa"] = dados["valor"] / dados["valor_moeda_negociada"]
+    else:
+        dados["moeda_taxa"] = False
+    return dados
+
+
+def completa_acrescimo(dados):
+    return _completa_valor(dados)
+
+
+def completa_deducao(dados):
+    """Deduções são gravadas com valores negativos."""
+    for campo in ("valor", "valor_moeda_negociada"):
+        if dados[campo] is not None:
+            dados[campo] = -dados[campo]
+    return _completa_valor(dados)
+
+
+def converte_valores(acrescimo, deducao):
+    """Acréscimo e dedução da adição; deduções ficam com valores negativos."""
+    acrescimo_deducao = []
+    if acrescimo:
+        acrescimo_deducao.append(completa_acrescimo(_converte_acrescimo(acrescimo)))
+    if deducao:
+        acrescimo_deducao.append(completa_deducao(_converte_deducao(deducao)))
+    return acrescimo_deducao
+
+
+def _taxa_cambio(valor_reais, valor_moeda):
+    if valor_reais and valor_moeda:
+        return valor_reais / valor_moeda
+    return 1
+
+
+def completa_adicao(dados, mercadorias, valores):
+    """Taxas de câmbio calculadas e filhos de uma adição já convertida."""
+    dados["taxa_cambio_venda"] = _taxa_cambio(
+        dados["condicao_venda_valor_reais"], dados["condicao_venda_valor_moeda"]
+    )
+    dados["taxa_cambio_frete"] = _taxa_cambio(
+        dados["frete_valor_reais"], dados["frete_valor_moeda_negociada"]
+    )
+    dados["taxa_cambio_seguro"] = _taxa_cambio(
+        dados["seguro_valor_reais"], dados["seguro_valor_moeda_negociada"]
+    )
+    dados["di_adicao_mercadoria_ids"] = mercadorias
+    dados["di_adicao_valor_ids"] = valores
+    return dados
+
+
+def converte_adicao(adicao):
+    return completa_adicao(
+        _converte_adicao(adicao),
+        converte_mercadorias(adicao.mercadoria),
+        converte_valores(adicao.acrescimo, adicao.deducao),
+    )
+
+
+def converte_declaracao(di):
+    """
+    As mercadorias de todas as adições são convertidas em um único lote
+    (`compila_lote`), com os valores numéricos decodificados por coluna.
+    """
+    dados = _converte_declaracao(di)
+    mercadorias = iter(
+        converte_mercadorias([x for adicao in di.adicao for x in adicao.mercadoria])
+    )
+    dados["di_adicao_ids"] = [
+        completa_adicao(
+            vals,
+            list(islice(mercadorias, len(adicao.mercadoria))),
+            converte_valores(adicao.acrescimo, adicao.deducao),
+        )
+        for adicao, vals in zip(di.adicao, map(_converte_adicao, di.adicao))
+    ]
+    dados["di_despacho_ids"] = [
+        converte_despacho(x) for x in di.documento_instrucao_despacho
+    ]
+    dados["di_pagamento_ids"] = [converte_pagamento(x) for x in di.pagamento]
+    dados["di_armazem_ids"] = [converte_armazem(x) for x in di.armazem]
+    dados["di_embalagem_ids"] = [converte_embalagem(x) for x in di.embalagem]
+    dados["di_declaracao_ee_ids"] = [
+        converte_declaracao_ee(x) for x in di.declaracao_ee
+    ]
+    return dados
+
+
+def converte_arquivo(source, handler=None):
+    """
+    Lê e converte todas as declarações de `source`.
+
+    Função de módulo, sem estado, para poder ser executada em processos
+    separados (`importa_lote`): recebe os bytes do arquivo e devolve uma lista
+    de dicionários que pode ser serializada com pickle. O arquivo é validado
+    antes (`validacao.verifica_declaracoes`), levantando `DeclaracaoInvalida`
+    com todos os erros encontrados. Arquivos JSON de DUIMP são lidos por
+    `duimp.converte_arquivo_duimp`.
+    """
+    # `duimp` usa as funções deste módulo e por isso é importado só aqui.
+    from . import duimp
+
+    if duimp.eh_duimp(source):
+        return duimp.converte_arquivo_duimp(source)
+
+    verifica_declaracoes(source, handler=handler)
+    return [
+        converte_declaracao(di)
+        for di in iter_declaracoes(source, handler=handler)
+    ]
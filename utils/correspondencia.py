@@ -0,0 +1,145 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Correspondência entre as descrições das mercadorias e os produtos cadastrados.
+
+`IndiceProdutos` é um índice invertido em memória, montado uma única vez a
+partir de (id, nome) de todos os produtos: cada nome é normalizado por
+`normaliza_texto` e quebrado em palavras, e cada palavra aponta para os
+produtos que a contêm. As palavras pesam log(1 + N / df), de modo que "DE" ou
+"PECA", presentes em boa parte do catálogo, contam pouco e o modelo ou a
+medida ("M6X20") decidem.
+
+`melhor` devolve o produto mais parecido com uma descrição, pelo cosseno
+entre os conjuntos de palavras: peso das palavras em comum dividido pela média
+geométrica dos pesos da descrição e do nome, se a nota alcançar o limiar.
+Apenas os produtos que compartilham alguma palavra pouco frequente são
+avaliados, sem percorrer o catálogo inteiro; uma descrição feita só de
+palavras frequentes é ambígua e não tem candidatos.
+
+`cache_indices` guarda os índices no processo (cada worker do Odoo tem o seu),
+um por chave (banco, empresa, idioma), junto com a assinatura do catálogo a
+partir da qual foram montados; o índice só é montado de novo quando a
+assinatura muda.
+
+Não depende do Odoo.
+"""
+
+import math
+import threading
+from collections import OrderedDict, defaultdict
+
+from .normalizacao import normaliza_texto
+
+# Nota mínima para associar o produto automaticamente.
+LIMIAR = 0.5
+
+# Palavras presentes em mais que essa fração do catálogo (ou em mais que o
+# mínimo, nos catálogos pequenos) não geram candidatos, apenas somam na nota de
+# quem já é candidato.
+FRACAO_FREQUENTE = 0.05
+MINIMO_FREQUENTE = 50
+
+# Índices guardados por processo; o mais antigo é descartado.
+MAXIMO_INDICES = 4
+
+
+def palavras(texto):
+    return frozenset(normaliza_texto(texto).split())
+
+
+class IndiceProdutos:
+    def __init__(self, produtos):
+        """`produtos`: iterável de (id, nome)."""
+        self.palavras_produto = {}
+        self.produtos_palavra = defaultdict(list)
+        for produto_id, nome in produtos:
+            conjunto = palavras(nome)
+            if not conjunto:
+                continue
+            self.palavras_produto[produto_id] = conjunto
+            for palavra in conjunto:
+                self.produtos_palavra[palavra].append(produto_id)
+
+        total = len(self.palavras_produto)
+        self.peso_desconhecida = math.log(1 + total) if total else 1.0
+        self.pesos = {
+            palavra: math.log(1 + total / len(ids))
+            for palavra, ids in self.produtos_palavra.items()
+        }
+        self.normas = {
+            produto_id: self._peso(conjunto)
+            for produto_id, conjunto in self.palavras_produto.items()
+        }
+        self.limite_frequente = max(MINIMO_FREQUENTE, int(total * FRACAO_FREQUENTE))
+
+    def __len__(self):
+        return len(self.palavras_produto)
+
+    def _peso(self, conjunto):
+        return sum(self.pesos.get(p, self.peso_desconhecida) for p in conjunto)
+
+    def _ids_candidatos(self, conjunto):
+        ids = set()
+        for palavra in conjunto:
+            lista = self.produtos_palavra.get(palavra, ())
+            if len(lista) <= self.limite_frequente:
+                ids.update(lista)
+        return ids
+
+    def melhor(self, descricao, limiar=LIMIAR):
+        """Id do produto mais parecido com `descricao`, ou False."""
+        conjunto = palavras(descricao)
+        if not conjunto:
+            return False
+        norma = self._peso(conjunto)
+        # No empate fica o produto mais antigo (menor id).
+        nota, produto_id = max(
+            (
+                (
+                    self._peso(conjunto & self.palavras_produto[produto_id])
+                    / math.sqrt(norma * self.normas[produto_id]),
+                    -produto_id,
+                )
+                for produto_id in self._ids_candidatos(conjunto)
+            ),
+            default=(0.0, 0),
+        )
+        if produto_id and nota >= limiar:
+            return -produto_id
+        return False
+
+
+class CacheIndices:
+    def __init__(self, maximo=MAXIMO_INDICES):
+        self.maximo = maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def get(self, chave, assinatura, monta):
+        """
+        O valor guardado para `chave`, se foi montado com a mesma `assinatura`;
+        senão chama `monta()` e guarda o resultado.
+        """
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[0] == assinatura:
+                self._itens.move_to_end(chave)
+                return item[1]
+        valor = monta()
+        with self._lock:
+            self._itens[chave] = (assinatura, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+        return valor
+
+    def invalida(self):
+        with self._lock:
+            self._itens.clear()
+
+
+cache_indices = CacheIndices()
@@ -0,0 +1,599 @@
+# flake8: noqa: B950
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Leitura e conversão das declarações DUIMP (Portal Único Siscomex) em JSON.
+
+O arquivo pode conter uma DUIMP (um objeto) ou várias (uma lista de objetos),
+no formato da consulta de DUIMP do Portal Único. As declarações são lidas uma
+a uma por um parser JSON incremental (ijson, quando instalado; senão o
+decodificador da biblioteca padrão aplicado a cada elemento da lista), de
+modo que só a DUIMP em conversão fica em memória, como em
+`parser.iter_declaracoes`.
+
+`converte_duimp` produz exatamente as chaves de `conversao.converte_declaracao`
+(os campos que a DUIMP não tem ficam com None), e os modelos importam os dois
+formatos pelo mesmo caminho. Cada item da DUIMP vira uma adição com uma única
+mercadoria; seus acréscimos e deduções viram os valores da adição. Os números
+do JSON já vêm com casas decimais e as datas no formato ISO (AAAA-MM-DD).
+
+`MAPEAMENTOS_DUIMP` segue o modelo de `mapeamento.MAPEAMENTOS`: para cada
+registro, pares (campo, tipo, caminho no JSON), com o caminho separado por
+pontos, compilados em funções com um único literal de dicionário. Os campos
+devem existir na tabela da classe correspondente de `mapeamento`.
+"""
+
+import io
+import json
+import sys
+from datetime import datetime
+
+from .conversao import completa_acrescimo, completa_adicao, completa_deducao
+from .lista_declaracoes import (
+    Acrescimo,
+    Adicao,
+    DeclaracaoImportacao,
+    Deducao,
+    DocumentoInstrucaoDespacho,
+    Embalagem,
+    Mercadoria,
+    Pagamento,
+)
+from .mapeamento import (
+    FILHOS,
+    INTEIRO,
+    MAPEAMENTOS,
+    NUMERO_DI,
+    TEXTO,
+    c_numero_di,
+    entradas,
+    versao,
+)
+from .validacao import DeclaracaoInvalida
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+NUMERO = "numero"
+DATA_ISO = "data_iso"
+
+# Tamanho dos blocos lidos pelo decodificador da biblioteca padrão.
+TAMANHO_BLOCO = 2**16
+
+_VAZIO = {}
+
+
+def c_numero(valor):
+    return None if valor is None else float(valor)
+
+
+def c_inteiro(valor):
+    return None if valor is None else int(valor)
+
+
+def c_data_iso(valor):
+    if valor is None:
+        return None
+    return datetime.strptime(valor[:10], "%Y-%m-%d").date()
+
+
+EXPRESSOES = {
+    TEXTO: "{}",
+    NUMERO_DI: "c_numero_di({})",
+    NUMERO: "c_numero({})",
+    INTEIRO: "c_inteiro({})",
+    DATA_ISO: "c_data_iso({})",
+}
+
+_CONVERSORES = {
+    NUMERO_DI: c_numero_di,
+    NUMERO: c_numero,
+    INTEIRO: c_inteiro,
+    DATA_ISO: c_data_iso,
+}
+
+_ACRESCIMO_DEDUCAO = (
+    ("codigo", TEXTO, "codigo"),
+    ("denominacao", TEXTO, "denominacao"),
+    ("moeda_negociada_codigo", TEXTO, "moeda.codigo"),
+    ("moeda_negociada_nome", TEXTO, "moeda.nome"),
+    ("valor", NUMERO, "valorReais"),
+    ("valor_moeda_negociada", NUMERO, "valorMoedaNegociada"),
+)
+
+
+def _parceiro(prefixo, caminho):
+    return (
+        ("%s_nome" % prefixo, TEXTO, "%s.nome" % caminho),
+        ("%s_logradouro" % prefixo, TEXTO, "%s.endereco.logradouro" % caminho),
+        ("%s_numero" % prefixo, TEXTO, "%s.endereco.numero" % caminho),
+        ("%s_cidade" % prefixo, TEXTO, "%s.endereco.cidade" % caminho),
+        ("%s_estado" % prefixo, TEXTO, "%s.endereco.estado" % caminho),
+    )
+
+
+def _tributo(prefixo, caminho):
+    return (
+        ("%s_aliquota_ad_valorem" % prefixo, NUMERO, "tributos.%s.aliquota" % caminho),
+        ("%s_aliquota_valor_devido" % prefixo, NUMERO, "tributos.%s.valorDevido" % caminho),
+        ("%s_aliquota_valor_recolher" % prefixo, NUMERO, "tributos.%s.valorARecolher" % caminho),
+    )
+
+
+# Registros da DUIMP: (classe de `mapeamento` com as mesmas chaves, entradas).
+MAPEAMENTOS_DUIMP = {
+    "declaracao": (
+        DeclaracaoImportacao,
+        (
+            ("numero_di", NUMERO_DI, "identificacao.numero"),
+            ("sequencial_retificacao", TEXTO, "identificacao.versao"),
+            ("data_registro", DATA_ISO, "identificacao.dataRegistro"),
+            ("urf_despacho_codigo", TEXTO, "identificacao.unidadeDespacho.codigo"),
+            ("urf_despacho_nome", TEXTO, "identificacao.unidadeDespacho.nome"),
+            ("data_desembaraco", DATA_ISO, "situacao.dataDesembaraco"),
+            ("canal_selecao_parametrizada", TEXTO, "situacao.canal"),
+            ("importador_numero", TEXTO, "importador.ni"),
+            ("importador_nome", TEXTO, "importador.nome"),
+            ("importador_endereco_logradouro", TEXTO, "importador.endereco.logradouro"),
+            ("importador_endereco_numero", TEXTO, "importador.endereco.numero"),
+            ("importador_endereco_complemento", TEXTO, "importador.endereco.complemento"),
+            ("importador_endereco_bairro", TEXTO, "importador.endereco.bairro"),
+            ("importador_endereco_municipio", TEXTO, "importador.endereco.municipio"),
+            ("importador_endereco_uf", TEXTO, "importador.endereco.uf"),
+            ("importador_endereco_cep", TEXTO, "importador.endereco.cep"),
+            ("carga_data_chegada", DATA_ISO, "carga.dataChegada"),
+            ("carga_pais_procedencia_codigo", TEXTO, "carga.paisProcedencia.codigo"),
+            ("carga_pais_procedencia_nome", TEXTO, "carga.paisProcedencia.nome"),
+            ("carga_peso_bruto", NUMERO, "carga.pesoBruto"),
+            ("carga_peso_liquido", NUMERO, "carga.pesoLiquido"),
+            ("carga_urf_entrada_codigo", TEXTO, "carga.unidadeEntrada.codigo"),
+            ("carga_urf_entrada_nome", TEXTO, "carga.unidadeEntrada.nome"),
+            ("conhecimento_carga_id", TEXTO, "carga.identificacao"),
+            ("via_transporte_codigo", TEXTO, "carga.viaTransporte.codigo"),
+            ("via_transporte_nome", TEXTO, "carga.viaTransporte.nome"),
+            ("frete_moeda_negociada_codigo", TEXTO, "carga.frete.moeda.codigo"),
+            ("frete_moeda_negociada_nome", TEXTO, "carga.frete.moeda.nome"),
+            ("frete_total_moeda", NUMERO, "carga.frete.valorMoedaNegociada"),
+            ("frete_total_reais", NUMERO, "carga.frete.valorReais"),
+            ("seguro_moeda_negociada_codigo", TEXTO, "carga.seguro.moeda.codigo"),
+            ("seguro_moeda_negociada_nome", TEXTO, "carga.seguro.moeda.nome"),
+            ("seguro_total_moeda_negociada", NUMERO, "carga.seguro.valorMoedaNegociada"),
+            ("seguro_total_reais", NUMERO, "carga.seguro.valorReais"),
+            ("informacao_complementar", TEXTO, "informacoesComplementares"),
+        ),
+    ),
+    "item": (
+        Adicao,
+        (
+            ("numero_adicao", TEXTO, "numeroItem"),
+            ("condicao_venda_incoterm", TEXTO, "condicaoVenda.incoterm"),
+            ("condicao_venda_local", TEXTO, "condicaoVenda.local"),
+            ("condicao_venda_moeda_codigo", TEXTO, "condicaoVenda.moeda.codigo"),
+            ("condicao_venda_moeda_nome", TEXTO, "condicaoVenda.moeda.nome"),
+            ("condicao_venda_valor_moeda", NUMERO, "condicaoVenda.valorMoedaNegociada"),
+            ("condicao_venda_valor_reais", NUMERO, "condicaoVenda.valorReais"),
+            ("valor_total_condicao_venda", NUMERO, "condicaoVenda.valorMoedaNegociada"),
+            ("frete_moeda_negociada_codigo", TEXTO, "frete.moeda.codigo"),
+            ("frete_valor_moeda_negociada", NUMERO, "frete.valorMoedaNegociada"),
+            ("frete_valor_reais", NUMERO, "frete.valorReais"),
+            ("seguro_moeda_negociada_codigo", TEXTO, "seguro.moeda.codigo"),
+            ("seguro_valor_moeda_negociada", NUMERO, "seguro.valorMoedaNegociada"),
+            ("seguro_valor_reais", NUMERO, "seguro.valorReais"),
+            ("dados_mercadoria_codigo_ncm", TEXTO, "mercadoria.ncm"),
+            ("dados_mercadoria_condicao", TEXTO, "mercadoria.condicao"),
+            ("dados_mercadoria_peso_liquido", NUMERO, "mercadoria.pesoLiquido"),
+            ("dados_mercadoria_medida_estatistica_quantidade", NUMERO, "mercadoria.quantidadeEstatistica"),
+            ("dados_mercadoria_medida_estatistica_unidade", TEXTO, "mercadoria.unidadeEstatistica"),
+            ("pais_origem_mercadoria_codigo", TEXTO, "paisOrigem.codigo"),
+            ("pais_origem_mercadoria_nome", TEXTO, "paisOrigem.nome"),
+            ("pais_aquisicao_mercadoria_codigo", TEXTO, "exportador.endereco.pais.codigo"),
+            ("pais_aquisicao_mercadoria_nome", TEXTO, "exportador.endereco.pais.nome"),
+            ("fornecedor_complemento", TEXTO, "exportador.endereco.complemento"),
+        )
+        + _parceiro("fornecedor", "exportador")
+        + _parceiro("fabricante", "fabricante")
+        + _tributo("ii", "ii")
+        + _tributo("ipi", "ipi")
+        + _tributo("pis_pasep", "pis")
+        + _tributo("cofins", "cofins"),
+    ),
+    "mercadoria": (
+        Mercadoria,
+        (
+            ("numero_sequencial_item", INTEIRO, "numeroItem"),
+            ("descricao_mercadoria", TEXTO, "produto.descricao"),
+            ("quantidade", NUMERO, "mercadoria.quantidadeComercial"),
+            ("unidade_medida", TEXTO, "mercadoria.unidadeComercial"),
+            ("valor_unitario", NUMERO, "mercadoria.valorUnitarioMoedaNegociada"),
+        ),
+    ),
+    "acrescimo": (Acrescimo, _ACRESCIMO_DEDUCAO),
+    "deducao": (Deducao, _ACRESCIMO_DEDUCAO),
+    "documento": (
+        DocumentoInstrucaoDespacho,
+        (
+            ("codigo_tipo_documento_despacho", TEXTO, "tipo.codigo"),
+            ("nome_documento_despacho", TEXTO, "tipo.descricao"),
+            ("numero_documento_despacho", TEXTO, "numero"),
+        ),
+    ),
+    "embalagem": (
+        Embalagem,
+        (
+            ("codigo_tipo_embalagem", TEXTO, "tipo.codigo"),
+            ("nome_embalagem", TEXTO, "tipo.descricao"),
+            ("quantidade_volume", INTEIRO, "quantidade"),
+        ),
+    ),
+    "pagamento": (
+        Pagamento,
+        (
+            ("codigo_receita", TEXTO, "codigoReceita"),
+            ("banco_pagamento", TEXTO, "banco"),
+            ("agencia_pagamento", TEXTO, "agencia"),
+            ("conta_pagamento", TEXTO, "conta"),
+            ("data_pagamento", DATA_ISO, "dataPagamento"),
+            ("valor_receita", NUMERO, "valor"),
+            ("valor_multa", NUMERO, "valorMulta"),
+            ("valor_juros_encargos", NUMERO, "valorJuros"),
+        ),
+    ),
+}
+
+# Rótulos usados nas mensagens de erro, como em `validacao.REGRAS`.
+ROTULOS = {
+    "declaracao": "DUIMP",
+    "item": "item",
+    "mercadoria": "item",
+    "acrescimo": "acréscimo",
+    "deducao": "dedução",
+    "documento": "documento",
+    "embalagem": "embalagem",
+    "pagamento": "pagamento",
+}
+
+
+def _acesso(caminho):
+    """Expressão que lê `caminho`, com None para qualquer nível ausente."""
+    partes = caminho.split(".")
+    expressao = "obj"
+    for parte in partes[:-1]:
+        expressao = "(%s.get(%r) or _VAZIO)" % (expressao, parte)
+    return "%s.get(%r)" % (expressao, partes[-1])
+
+
+def compila_duimp(registro):
+    """
+    Gera a função que converte um objeto JSON do `registro` em dicionário, com
+    as chaves da classe correspondente de `mapeamento`, na mesma ordem.
+    """
+    classe, tabela = MAPEAMENTOS_DUIMP[registro]
+    campos = [campo for campo, _tipo, _origem in entradas(classe)]
+    mapeados = {campo: (tipo, caminho) for campo, tipo, caminho in tabela}
+    desconhecidos = set(mapeados) - set(campos)
+    if desconhecidos:
+        raise ValueError(
+            "%s não tem os campos %s" % (classe.__name__, ", ".join(sorted(desconhecidos)))
+        )
+
+    nome = "converte_duimp_%s" % registro
+    linhas = ["def %s(obj):" % nome, "    return {"]
+    for campo in campos:
+        if campo in mapeados:
+            tipo, caminho = mapeados[campo]
+            expressao = EXPRESSOES[tipo].format(_acesso(caminho))
+        else:
+            expressao = "None"
+        linhas.append("        %r: %s," % (campo, expressao))
+    linhas.append("    }")
+
+    namespace = {funcao.__name__: funcao for funcao in _CONVERSORES.values()}
+    namespace["_VAZIO"] = _VAZIO
+    exec(compile("\n".join(linhas), "<%s>" % nome, "exec"), namespace)
+    funcao = namespace[nome]
+    funcao.__module__ = __name__
+    return funcao
+
+
+CONVERSORES = {registro: compila_duimp(registro) for registro in MAPEAMENTOS_DUIMP}
+
+# Versão das tabelas do XML e da DUIMP, usada na chave do cache de declarações.
+VERSAO_MAPEAMENTO = versao(MAPEAMENTOS, FILHOS, MAPEAMENTOS_DUIMP)
+
+
+def _erros_registro(registro, obj, posicao, erros):
+    """Detalha por que `obj` não pôde ser convertido."""
+    if not isinstance(obj, dict):
+        erros.append("%s: registro não é um objeto JSON" % posicao)
+        return
+    invalidos = set()
+    for _campo, tipo, caminho in MAPEAMENTOS_DUIMP[registro][1]:
+        valor = obj
+        partes = caminho.split(".")
+        for indice, parte in enumerate(partes):
+            # Objeto ausente: o campo fica vazio, como na conversão.
+            if valor is None:
+                break
+            if not isinstance(valor, dict):
+                pai = ".".join(partes[:indice])
+                if pai not in invalidos:
+                    invalidos.add(pai)
+                    erros.append("%s: campo %s não é um objeto" % (posicao, pai))
+                valor = None
+                break
+            valor = valor.get(parte)
+        if valor is None or tipo == TEXTO:
+            continue
+        try:
+            _CONVERSORES[tipo](valor)
+        except (TypeError, ValueError):
+            descricao = "data inválida" if tipo == DATA_ISO else "valor não numérico"
+            erros.append("%s: campo %s com %s (%r)" % (posicao, caminho, descricao, valor))
+
+
+def _converte(registro, obj, posicao, erros):
+    try:
+        return CONVERSORES[registro](obj)
+    except (AttributeError, TypeError, ValueError):
+        _erros_registro(registro, obj, posicao, erros)
+        return None
+
+
+def _lista(obj, chave, posicao, erros):
+    valor = obj.get(chave) if isinstance(obj, dict) else None
+    if valor is None:
+        return []
+    if not isinstance(valor, list):
+        erros.append("%s: campo %s não é uma lista" % (posicao, chave))
+        return []
+    return valor
+
+
+def _filhos(registro, objetos, posicao, erros, completa=None):
+    resultado = []
+    for numero, obj in enumerate(objetos, 1):
+        dados = _converte(
+            registro, obj, "%s, %s %d" % (posicao, ROTULOS[registro], numero), erros
+        )
+        if dados is not None:
+            resultado.append(completa(dados) if completa else dados)
+    return resultado
+
+
+def converte_duimp(duimp, numero=1, erros=None):
+    """
+    Converte uma DUIMP (objeto JSON já lido) no dicionário de
+    `conversao.converte_declaracao`. Problemas são acrescentados a `erros`,
+    com a posição de cada um; sem a lista, levanta `DeclaracaoInvalida`.
+    """
+    levanta = erros is None
+    erros = [] if levanta else erros
+    posicao = "%s %d" % (ROTULOS["declaracao"], numero)
+
+    dados = _converte("declaracao", duimp, posicao, erros)
+    if dados is None:
+        if levanta:
+            raise DeclaracaoInvalida(erros)
+        return None
+    if not dados["numero_di"]:
+        erros.append("%s: campo identificacao.numero ausente" % posicao)
+
+    carga = duimp.get("carga")
+    adicoes = []
+    for numero_item, item in enumerate(_lista(duimp, "itens", posicao, erros), 1):
+        posicao_item = "%s, item %d" % (posicao, numero_item)
+        if not isinstance(item, dict):
+            erros.append("%s: registro não é um objeto JSON" % posicao_item)
+            continue
+        adicao = _converte("item", item, posicao_item, erros)
+        mercadoria = _converte("mercadoria", item, posicao_item, erros)
+        if adicao is None or mercadoria is None:
+            continue
+        adicao["numero_di"] = dados["numero_di"]
+        valores = _filhos(
+            "acrescimo",
+            _lista(item, "acrescimos", posicao_item, erros),
+            posicao_item,
+            erros,
+            completa_acrescimo,
+        ) + _filhos(
+            "deducao",
+            _lista(item, "deducoes", posicao_item, erros),
+            posicao_item,
+            erros,
+            completa_deducao,
+        )
+        adicoes.append(completa_adicao(adicao, [mercadoria], valores))
+
+    dados["total_adicoes"] = len(adicoes)
+    dados["di_adicao_ids"] = adicoes
+    dados["di_despacho_ids"] = _filhos(
+        "documento", _lista(duimp, "documentos", posicao, erros), posicao, erros
+    )
+    dados["di_pagamento_ids"] = _filhos(
+        "pagamento", _lista(duimp, "pagamentos", posicao, erros), posicao, erros
+    )
+    dados["di_armazem_ids"] = []
+    dados["di_embalagem_ids"] = _filhos(
+        "embalagem", _lista(carga, "embalagens", posicao, erros), posicao, erros
+    )
+    dados["di_declaracao_ee_ids"] = []
+
+    if levanta and erros:
+        raise DeclaracaoInvalida(erros)
+    return dados
+
+
+def _primeiro_caractere(stream):
+    inicio = stream.read(64)
+    stream.seek(0)
+    return inicio.lstrip(b"\xef\xbb\xbf \t\r\n")[:1]
+
+
+def eh_duimp(source):
+    """Indica se `source` (caminho, bytes ou fluxo binário) é um arquivo JSON."""
+    if isinstance(source, bytes):
+        return source.lstrip(b"\xef\xbb\xbf \t\r\n")[:1] in (b"{", b"[")
+    if isinstance(source, str):
+        with open(source, "rb") as stream:
+            return _primeiro_caractere(stream) in (b"{", b"[")
+    return _primeiro_caractere(source) in (b"{", b"[")
+
+
+def _itens_padrao(stream):
+    """
+    Elementos de uma lista JSON no topo do arquivo, decodificados um a um com
+    `json.JSONDecoder.raw_decode` à medida que os blocos são lidos.
+    """
+    leitor = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    try:
+        yield from _decodifica_itens(leitor)
+    finally:
+        # Sem o detach, o wrapper fecharia o fluxo, que ainda será relido.
+        leitor.detach()
+
+
+def _decodifica_itens(leitor):
+    decoder = json.JSONDecoder()
+    buffer = ""
+    posicao = 0
+    tamanho = TAMANHO_BLOCO
+    aberta = fim = False
+    while not fim:
+        bloco = leitor.read(tamanho)
+        fim = not bloco
+        buffer = buffer[posicao:] + bloco
+        posicao = 0
+        while True:
+            separadores = " \t\r\n," if aberta else " \t\r\n"
+            while posicao < len(buffer) and buffer[posicao] in separadores:
+                posicao += 1
+            if posicao == len(buffer):
+                break
+            if not aberta:
+                if buffer[posicao] != "[":
+                    raise ValueError("esperada uma lista de DUIMPs")
+                aberta = True
+                posicao += 1
+                continue
+            if buffer[posicao] == "]":
+                return
+            try:
+                item, final = decoder.raw_decode(buffer, posicao)
+            except json.JSONDecodeError:
+                if fim:
+                    raise
+                # Elemento incompleto: lê um bloco do tamanho do que já está
+                # no buffer, para que cada DUIMP seja decodificada poucas vezes.
+                tamanho = max(tamanho, len(buffer) - posicao)
+                break
+            # Um número no fim do bloco pode continuar no bloco seguinte.
+            if final == len(buffer) and not fim:
+                break
+            posicao = final
+            tamanho = TAMANHO_BLOCO
+            yield item
+    raise ValueError("lista de DUIMPs não terminada")
+
+
+class _Objeto(dict):
+    """
+    Objeto JSON lido pelo ijson. As chaves são internadas, como faz o
+    decodificador da biblioteca padrão: os itens de uma DUIMP repetem as mesmas
+    chaves, que assim ocupam memória uma única vez.
+    """
+
+    __slots__ = ()
+
+    def __setitem__(self, chave, valor, _intern=sys.intern, _set=dict.__setitem__):
+        _set(self, _intern(chave), valor)
+
+
+def _abre(source):
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, str):
+        return open(source, "rb")
+    return source
+
+
+def iter_duimps(source):
+    """
+    Gera as DUIMPs de `source` (caminho, bytes ou fluxo binário) como objetos
+    JSON, uma por vez.
+    """
+    stream = _abre(source)
+    try:
+        lista = _primeiro_caractere(stream) == b"["
+        if ijson is not None:
+            yield from ijson.items(
+                stream, "item" if lista else "", use_float=True, map_type=_Objeto
+            )
+        elif lista:
+            yield from _itens_padrao(stream)
+        else:
+            leitor = io.TextIOWrapper(stream, encoding="utf-8-sig")
+            try:
+                duimp = json.load(leitor)
+            finally:
+                leitor.detach()
+            yield duimp
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def _erros_json():
+    if ijson is None:  # pragma: no cover
+        return (ValueError,)
+    return (ValueError, ijson.JSONError)
+
+
+def iter_arquivo_duimp(stream):
+    """
+    Confere todas as DUIMPs do fluxo binário `stream`, levantando
+    `DeclaracaoInvalida` com todos os erros encontrados, e retorna um gerador
+    das declarações convertidas, uma por vez, relendo o arquivo do início.
+
+    Como na leitura do XML (`validacao.verifica_declaracoes` seguida de
+    `parser.iter_declaracoes`), o arquivo é percorrido duas vezes: nada é
+    gravado de um arquivo com erros, e só a DUIMP em conversão fica em
+    memória, ao custo de converter cada uma duas vezes.
+    """
+    erros = []
+    try:
+        for numero, duimp in enumerate(iter_duimps(stream), 1):
+            converte_duimp(duimp, numero, erros)
+    except _erros_json() as erro:
+        erros.append("JSON mal formado: %s" % erro)
+    if erros:
+        raise DeclaracaoInvalida(erros)
+    stream.seek(0)
+    return (
+        converte_duimp(duimp, numero)
+        for numero, duimp in enumerate(iter_duimps(stream), 1)
+    )
+
+
+def converte_arquivo_duimp(source):
+    """
+    Lê e converte todas as DUIMPs de `source`, levantando `DeclaracaoInvalida`
+    com todos os erros encontrados. Como `conversao.converte_arquivo`, retorna
+    uma lista, e nada é devolvido de um arquivo com erros. Usada pelos
+    processos de leitura e pelo script de conversão, que precisam da lista
+    inteira; a importação no próprio processo usa `iter_arquivo_duimp`.
+    """
+    erros = []
+    declaracoes = []
+    try:
+        for numero, duimp in enumerate(iter_duimps(source), 1):
+            dados = converte_duimp(duimp, numero, erros)
+            if dados is not None and not erros:
+                declaracoes.append(dados)
+    except _erros_json() as erro:
+        erros.append("JSON mal formado: %s" % erro)
+    if erros:
+        raise DeclaracaoInvalida(erros)
+    return declaracoes
@@ -0,0 +1,124 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Exportação das declarações convertidas em linhas planas (JSON Lines ou CSV).
+
+`linhas` percorre os dicionários de `conversao.converte_declaracao` e gera uma
+linha por registro do nível pedido (declaração, adição, mercadoria, acréscimo
+ou dedução, despacho, pagamento, armazém, embalagem ou declaração
+estrangeira), apenas com os campos escalares e precedida das chaves do
+registro pai (`numero_di` e, abaixo da adição, `numero_adicao`). No nível "completo" cada declaração vai inteira, com os
+filhos aninhados, e só pode ser gravada em JSON Lines.
+
+Não depende do Odoo: é usado pelo script `scripts/converte_declaracoes.py`.
+"""
+
+import csv
+import json
+from datetime import date
+
+NIVEIS = (
+    "completo",
+    "declaracao",
+    "adicao",
+    "mercadoria",
+    "valor",
+    "despacho",
+    "pagamento",
+    "armazem",
+    "embalagem",
+    "declaracao_ee",
+)
+
+FORMATOS = ("jsonl", "csv")
+
+_FILHOS_ADICAO = {
+    "mercadoria": "di_adicao_mercadoria_ids",
+    "valor": "di_adicao_valor_ids",
+}
+_FILHOS_DECLARACAO = {
+    "despacho": "di_despacho_ids",
+    "pagamento": "di_pagamento_ids",
+    "armazem": "di_armazem_ids",
+    "embalagem": "di_embalagem_ids",
+    "declaracao_ee": "di_declaracao_ee_ids",
+}
+
+
+def _escalares(dados, chaves=None):
+    linha = dict(chaves or {})
+    linha.update((k, v) for k, v in dados.items() if not isinstance(v, list))
+    return linha
+
+
+def linhas(declaracao, nivel="mercadoria"):
+    """Linhas do `nivel` pedido para uma declaração convertida."""
+    if nivel == "completo":
+        yield declaracao
+        return
+    if nivel == "declaracao":
+        yield _escalares(declaracao)
+        return
+
+    chaves = {"numero_di": declaracao["numero_di"]}
+    if nivel in _FILHOS_DECLARACAO:
+        for dados in declaracao[_FILHOS_DECLARACAO[nivel]]:
+            yield _escalares(dados, chaves)
+        return
+
+    for adicao in declaracao["di_adicao_ids"]:
+        if nivel == "adicao":
+            yield _escalares(adicao, chaves)
+            continue
+        chaves_adicao = dict(chaves, numero_adicao=adicao["numero_adicao"])
+        for dados in adicao[_FILHOS_ADICAO[nivel]]:
+            yield _escalares(dados, chaves_adicao)
+
+
+def _json_padrao(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    # Tipos do xsdata (XmlPeriod...) vão como no XML, assim como no Odoo.
+    return str(valor)
+
+
+class EscritorJsonl:
+    def __init__(self, saida):
+        self.saida = saida
+
+    def escreve(self, linha):
+        self.saida.write(
+            json.dumps(linha, ensure_ascii=False, default=_json_padrao) + "\n"
+        )
+
+
+def _celula(valor):
+    # False é o "vazio" dos dicionários de valores do Odoo.
+    if valor is False or valor is None:
+        return ""
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+class EscritorCsv:
+    """
+    As colunas são as chaves da primeira linha; todos os registros de um nível
+    são gerados pelo mesmo mapeamento e têm as mesmas chaves.
+    """
+
+    def __init__(self, saida):
+        self.saida = saida
+        self.writer = None
+
+    def escreve(self, linha):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.saida, fieldnames=list(linha))
+            self.writer.writeheader()
+        self.writer.writerow({k: _celula(v) for k, v in linha.items()})
+
+
+def escritor(formato, saida):
+    if formato == "csv":
+        return EscritorCsv(saida)
+    return EscritorJsonl(saida)
@@ -1,9 +1,28 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import List, Optional, Union
 
 from xsdata.models.datatype import XmlPeriod
 
 
+def slotted(cls):
+    """
+    Recria a dataclass com `__slots__`, sem o `__dict__` por instância.
+
+    Equivale a `dataclass(slots=True)` (Python 3.10+): os valores padrão já
+    estão no `__init__` gerado, então os atributos de classe podem ser
+    removidos para dar lugar aos slots.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {k: v for k, v in cls.__dict__.items() if k not in names}
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = names
+    new_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    new_cls.__qualname__ = cls.__qualname__
+    return new_cls
+
+
+@slotted
 @dataclass
 class Acrescimo:
     class Meta:
@@ -58,6 +77,7 @@ class Acrescimo:
     )
 
 
+@slotted
 @dataclass
 class Armazem:
     class Meta:
@@ -73,6 +93,7 @@ class Armazem:
     )
 
 
+@slotted
 @dataclass
 class DeclaracaoEe:
     class Meta:
@@ -104,6 +125,7 @@ class DeclaracaoEe:
     )
 
 
+@slotted
 @dataclass
 class Deducao:
     class Meta:
@@ -158,6 +180,7 @@ class Deducao:
     )
 
 
+@slotted
 @dataclass
 class DocumentoInstrucaoDespacho:
     class Meta:
@@ -189,6 +212,7 @@ class DocumentoInstrucaoDespacho:
     )
 
 
+@slotted
 @dataclass
 class Embalagem:
     class Meta:
@@ -220,6 +244,7 @@ class Embalagem:
     )
 
 
+@slotted
 @dataclass
 class Mercadoria:
     class Meta:
@@ -266,6 +291,7 @@ class Mercadoria:
     )
 
 
+@slotted
 @dataclass
 class Pagamento:
     class Meta:
@@ -361,6 +387,7 @@ class Pagamento:
     )
 
 
+@slotted
 @dataclass
 class Adicao:
     class Meta:
@@ -1357,6 +1384,7 @@ class Adicao:
     )
 
 
+@slotted
 @dataclass
 class Icms:
     class Meta:
@@ -1455,6 +1483,7 @@ class Icms:
 
 
 
+@slotted
 @dataclass
 class DeclaracaoImportacao:
     class Meta:
@@ -1467,11 +1496,11 @@ class DeclaracaoImportacao:
             "min_occurs": 1,
         },
     )
-    armazem: Optional[Armazem] = field(
-        default=None,
+    armazem: List[Armazem] = field(
+        default_factory=list,
         metadata={
             "type": "Element",
-            "required": True,
+            "min_occurs": 1,
         },
     )
     armazenamento_recinto_aduaneiro_codigo: Optional[int] = field(
@@ -1668,12 +1697,11 @@ class DeclaracaoImportacao:
         },
     
     )
-    declaracao_ee: Optional[DeclaracaoEe] = field(
-        default=None,
+    declaracao_ee: List[DeclaracaoEe] = field(
+        default_factory=list,
         metadata={
             "name": "declaracaoEe",
             "type": "Element",
-            "required": True,
         },
     )
     documento_chegada_carga_codigo_tipo: Optional[int] = field(
@@ -1708,11 +1736,11 @@ class DeclaracaoImportacao:
             "min_occurs": 1,
         },
     )
-    embalagem: Optional[Embalagem] = field(
-        default=None,
+    embalagem: List[Embalagem] = field(
+        default_factory=list,
         metadata={
             "type": "Element",
-            "required": True,
+            "min_occurs": 1,
         },
     )
     frete_collect: Optional[str] = field(
@@ -2149,14 +2177,15 @@ class DeclaracaoImportacao:
         },
     )
 
+@slotted
 @dataclass
 class ListaDeclaracoes:
-    declaracao_importacao: Optional[DeclaracaoImportacao] = field(
-        default=None,
+    declaracao_importacao: List[DeclaracaoImportacao] = field(
+        default_factory=list,
         metadata={
             "name": "declaracaoImportacao",
             "type": "Element",
-            "required": True,
+            "min_occurs": 1,
         },
     )
 
@@ -0,0 +1,478 @@
+# flake8: noqa: B950
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Mapeamento declarativo entre os bindings do XML e os campos dos modelos.
+
+`MAPEAMENTOS` lista, para cada classe de `lista_declaracoes`, os campos do
+dicionário gerado na importação. Cada entrada pode ser:
+
+* `"campo"`: texto copiado do atributo de mesmo nome;
+* `("campo", tipo)`: atributo de mesmo nome convertido por `tipo`;
+* `("campo", tipo, "origem")`: atributo `origem` (que pode atravessar um
+  elemento filho, como `"icms.uf_icms"`) convertido por `tipo`.
+
+O tipo é `TEXTO`, `STR`, `INTEIRO`, `DATA` (AAAAMMDD), `NUMERO_DI` ou um dos
+divisores `D2`...`D7`, para os números com casas decimais implícitas do
+SISCOMEX.
+
+`compila` transforma a tabela de uma classe em uma função com um único
+literal de dicionário, gerada uma vez por processo, que custa o mesmo que o
+código escrito à mão, e `compila_lote` converte listas de objetos decodificando
+as colunas numéricas em lote (`numerico`). Incluir um campo novo na importação é acrescentar uma
+linha aqui: a validação (`validacao.REGRAS`) é derivada da mesma tabela.
+"""
+
+import hashlib
+from dataclasses import fields
+from datetime import datetime
+from operator import attrgetter
+
+from . import numerico
+
+from .lista_declaracoes import (
+    Acrescimo,
+    Adicao,
+    Armazem,
+    DeclaracaoEe,
+    DeclaracaoImportacao,
+    Deducao,
+    DocumentoInstrucaoDespacho,
+    Embalagem,
+    Mercadoria,
+    Pagamento,
+)
+
+D7 = 10**7
+D5 = 10**5
+D4 = 10**4
+D3 = 10**3
+D2 = 10**2
+
+TEXTO = "texto"
+STR = "str"
+INTEIRO = "inteiro"
+DATA = "data"
+NUMERO_DI = "numero_di"
+
+EXPRESSOES = {
+    TEXTO: "{}",
+    STR: "str({})",
+    INTEIRO: "int({})",
+    DATA: "c_data({})",
+    NUMERO_DI: "c_numero_di({})",
+}
+
+
+def c_data(data):
+    """
+    Data AAAAMMDD do SISCOMEX. A validação (`validacao`) usa esta mesma função,
+    de modo que o que passa na validação é exatamente o que a conversão aceita.
+    """
+    return datetime.strptime(str(data).strip(), "%Y%m%d").date()
+
+
+def c_numero_di(numero):
+    """
+    Número da declaração sempre como texto, o tipo do campo `numero_di` dos
+    modelos: o binding do XML lê `numeroDI` como inteiro, e na DUIMP o número
+    já vem como texto.
+    """
+    return None if numero is None else str(numero).strip()
+
+
+MAPEAMENTOS = {
+    Mercadoria: (
+        ("numero_sequencial_item", INTEIRO),
+        "descricao_mercadoria",
+        ("quantidade", D5),
+        "unidade_medida",
+        ("valor_unitario", D7),
+    ),
+    Acrescimo: (
+        ("codigo", TEXTO, "codigo_acrescimo"),
+        "denominacao",
+        "moeda_negociada_codigo",
+        "moeda_negociada_nome",
+        ("valor", D2, "valor_reais"),
+        ("valor_moeda_negociada", D2),
+    ),
+    Deducao: (
+        ("codigo", TEXTO, "codigo_deducao"),
+        "denominacao",
+        "moeda_negociada_codigo",
+        "moeda_negociada_nome",
+        ("valor", D2, "valor_reais"),
+        ("valor_moeda_negociada", D2),
+    ),
+    Adicao: (
+        ("valor_total_condicao_venda", D2),
+        "cide_valor_aliquota_especifica",
+        "cide_valor_devido",
+        "cide_valor_recolher",
+        "codigo_relacao_comprador_vendedor",
+        "codigo_vinculo_comprador_vendedor",
+        "cofins_aliquota_ad_valorem",
+        "cofins_aliquota_especifica_quantidade_unidade",
+        "cofins_aliquota_especifica_valor",
+        "cofins_aliquota_reduzida",
+        "cofins_aliquota_valor_devido",
+        "cofins_aliquota_valor_recolher",
+        "condicao_venda_incoterm",
+        "condicao_venda_local",
+        "condicao_venda_metodo_valoracao_codigo",
+        "condicao_venda_metodo_valoracao_nome",
+        "condicao_venda_moeda_codigo",
+        "condicao_venda_moeda_nome",
+        ("condicao_venda_valor_moeda", D2),
+        ("condicao_venda_valor_reais", D2),
+        "dados_cambiais_cobertura_cambial_codigo",
+        "dados_cambiais_cobertura_cambial_nome",
+        "dados_cambiais_instituicao_financiadora_codigo",
+        "dados_cambiais_instituicao_financiadora_nome",
+        "dados_cambiais_motivo_sem_cobertura_codigo",
+        "dados_cambiais_motivo_sem_cobertura_nome",
+        "dados_cambiais_valor_real_cambio",
+        "dados_carga_pais_procedencia_codigo",
+        "dados_carga_urf_entrada_codigo",
+        "dados_carga_via_transporte_codigo",
+        "dados_mercadoria_aplicacao",
+        "dados_mercadoria_codigo_naladi_ncca",
+        "dados_mercadoria_codigo_naladi_sh",
+        "dados_mercadoria_codigo_ncm",
+        "dados_mercadoria_condicao",
+        "dados_mercadoria_medida_estatistica_quantidade",
+        "dados_mercadoria_medida_estatistica_unidade",
+        "dados_mercadoria_nome_ncm",
+        "dados_mercadoria_peso_liquido",
+        "dcr_coeficiente_reducao",
+        "dcr_identificacao",
+        "dcr_valor_devido",
+        "dcr_valor_dolar",
+        "dcr_valor_real",
+        "dcr_valor_recolher",
+        "fabricante_cidade",
+        "fabricante_estado",
+        "fabricante_logradouro",
+        "fabricante_nome",
+        "fabricante_numero",
+        "fornecedor_cidade",
+        "fornecedor_complemento",
+        "fornecedor_estado",
+        "fornecedor_logradouro",
+        "fornecedor_nome",
+        "fornecedor_numero",
+        "frete_moeda_negociada_codigo",
+        ("frete_valor_moeda_negociada", D2),
+        ("frete_valor_reais", D2),
+        "ii_acordo_tarifario_aladi_codigo",
+        "ii_acordo_tarifario_aladi_nome",
+        "ii_acordo_tarifario_ato_legal_ano",
+        "ii_acordo_tarifario_ato_legal_codigo",
+        "ii_acordo_tarifario_ato_legal_ex",
+        "ii_acordo_tarifario_ato_legal_numero",
+        "ii_acordo_tarifario_ato_legal_orgao_emissor",
+        "ii_acordo_tarifario_tipo_codigo",
+        "ii_acordo_tarifario_tipo_nome",
+        "ii_aliquota_acordo",
+        "ii_aliquota_ad_valorem",
+        "ii_aliquota_percentual_reducao",
+        "ii_aliquota_reduzida",
+        "ii_aliquota_valor_calculado",
+        "ii_aliquota_valor_devido",
+        "ii_aliquota_valor_recolher",
+        "ii_aliquota_valor_reduzido",
+        "ii_base_calculo",
+        "ii_fundamento_legal_codigo",
+        "ii_motivo_admissao_temporaria_codigo",
+        "ii_regime_tributacao_codigo",
+        "ii_regime_tributacao_nome",
+        "ipi_aliquota_ad_valorem",
+        "ipi_aliquota_especifica_capacidade_recipciente",
+        "ipi_aliquota_especifica_quantidade_unidade_medida",
+        "ipi_aliquota_especifica_tipo_recipiente_codigo",
+        "ipi_aliquota_especifica_valor_unidade_medida",
+        "ipi_aliquota_nota_complementar_tipi",
+        "ipi_aliquota_reduzida",
+        "ipi_aliquota_valor_devido",
+        "ipi_aliquota_valor_recolher",
+        "ipi_regime_tributacao_codigo",
+        "ipi_regime_tributacao_nome",
+        "numero_adicao",
+        ("numero_di", NUMERO_DI),
+        "numero_li",
+        "pais_aquisicao_mercadoria_codigo",
+        "pais_aquisicao_mercadoria_nome",
+        "pais_origem_mercadoria_codigo",
+        "pais_origem_mercadoria_nome",
+        "pis_cofins_base_calculo_aliquota_icms",
+        "pis_cofins_base_calculo_fundamento_legal_codigo",
+        "pis_cofins_base_calculo_percentual_reducao",
+        "pis_cofins_base_calculo_valor",
+        "pis_cofins_fundamento_legal_reducao_codigo",
+        "pis_cofins_regime_tributacao_codigo",
+        "pis_cofins_regime_tributacao_nome",
+        "pis_pasep_aliquota_ad_valorem",
+        "pis_pasep_aliquota_especifica_quantidade_unidade",
+        "pis_pasep_aliquota_especifica_valor",
+        "pis_pasep_aliquota_reduzida",
+        "pis_pasep_aliquota_valor_devido",
+        "pis_pasep_aliquota_valor_recolher",
+        "relacao_comprador_vendedor",
+        "seguro_moeda_negociada_codigo",
+        ("seguro_valor_moeda_negociada", D2),
+        ("seguro_valor_reais", D2),
+        "sequencial_retificacao",
+        "valor_multa_arecolher",
+        "valor_multa_arecolher_ajustado",
+        ("valor_reais_frete_internacional", D2),
+        ("valor_reais_seguro_internacional", D2),
+        "vinculo_comprador_vendedor",
+    ),
+    DocumentoInstrucaoDespacho: (
+        "codigo_tipo_documento_despacho",
+        "nome_documento_despacho",
+        "numero_documento_despacho",
+    ),
+    Armazem: ("nome_armazem",),
+    Embalagem: (
+        "codigo_tipo_embalagem",
+        "nome_embalagem",
+        ("quantidade_volume", INTEIRO),
+    ),
+    DeclaracaoEe: (
+        ("faixa_inicial", STR),
+        ("faixa_final", STR),
+        "numero_declaracao_estrangeira",
+    ),
+    Pagamento: (
+        "agencia_pagamento",
+        "banco_pagamento",
+        "codigo_receita",
+        "codigo_tipo_pagamento",
+        "conta_pagamento",
+        ("data_pagamento", DATA),
+        "nome_tipo_pagamento",
+        "numero_retificacao",
+        ("valor_juros_encargos", D2),
+        ("valor_multa", D2),
+        ("valor_receita", D2),
+    ),
+    DeclaracaoImportacao: (
+        ("numero_di", NUMERO_DI),
+        ("data_registro", DATA),
+        ("data_desembaraco", DATA),
+        ("carga_data_chegada", DATA),
+        "armazenamento_recinto_aduaneiro_codigo",
+        "armazenamento_recinto_aduaneiro_nome",
+        "armazenamento_setor",
+        "canal_selecao_parametrizada",
+        "caracterizacao_operacao_codigo_tipo",
+        "caracterizacao_operacao_descricao_tipo",
+        "carga_numero_agente",
+        "carga_pais_procedencia_codigo",
+        "carga_pais_procedencia_nome",
+        ("carga_peso_bruto", D7),
+        ("carga_peso_liquido", D7),
+        "carga_urf_entrada_codigo",
+        "carga_urf_entrada_nome",
+        ("conhecimento_carga_embarque_data", DATA),
+        "conhecimento_carga_embarque_local",
+        "conhecimento_carga_id",
+        "conhecimento_carga_tipo_codigo",
+        "conhecimento_carga_tipo_nome",
+        "conhecimento_carga_utilizacao",
+        "conhecimento_carga_utilizacao_nome",
+        "documento_chegada_carga_codigo_tipo",
+        "documento_chegada_carga_nome",
+        "documento_chegada_carga_numero",
+        "frete_moeda_negociada_codigo",
+        "frete_moeda_negociada_nome",
+        ("frete_collect", D2),
+        ("frete_em_territorio_nacional", D2),
+        ("frete_prepaid", D2),
+        ("frete_total_dolares", D2),
+        ("frete_total_moeda", D2),
+        ("frete_total_reais", D2),
+        ("icms", STR),
+        ("agencia_icms", TEXTO, "icms.agencia_icms"),
+        ("banco_icms", TEXTO, "icms.banco_icms"),
+        ("codigo_tipo_recolhimento_icms", TEXTO, "icms.codigo_tipo_recolhimento_icms"),
+        ("cpf_responsavel_registro", TEXTO, "icms.cpf_responsavel_registro"),
+        ("data_pagamento_icms", TEXTO, "icms.data_pagamento_icms"),
+        ("data_registro_icms", TEXTO, "icms.data_registro_icms"),
+        ("hora_registro_icms", TEXTO, "icms.hora_registro_icms"),
+        ("nome_tipo_recolhimento_icms", TEXTO, "icms.nome_tipo_recolhimento_icms"),
+        ("numero_sequencial_icms", TEXTO, "icms.numero_sequencial_icms"),
+        ("uf_icms", TEXTO, "icms.uf_icms"),
+        ("valor_total_icms", TEXTO, "icms.valor_total_icms"),
+        "importador_codigo_tipo",
+        "importador_cpf_representante_legal",
+        "importador_endereco_bairro",
+        "importador_endereco_cep",
+        "importador_endereco_complemento",
+        "importador_endereco_logradouro",
+        "importador_endereco_municipio",
+        "importador_endereco_numero",
+        "importador_endereco_uf",
+        "importador_nome",
+        "importador_nome_representante_legal",
+        "importador_numero",
+        "importador_numero_telefone",
+        "informacao_complementar",
+        ("local_descarga_total_dolares", D2),
+        ("local_descarga_total_reais", D2),
+        ("local_embarque_total_dolares", D2),
+        ("local_embarque_total_reais", D2),
+        "modalidade_despacho_codigo",
+        "modalidade_despacho_nome",
+        "operacao_fundap",
+        "seguro_moeda_negociada_codigo",
+        "seguro_moeda_negociada_nome",
+        ("seguro_total_dolares", D2),
+        ("seguro_total_moeda_negociada", D2),
+        ("seguro_total_reais", D2),
+        "sequencial_retificacao",
+        "situacao_entrega_carga",
+        "tipo_declaracao_codigo",
+        "tipo_declaracao_nome",
+        ("total_adicoes", D2),
+        "urf_despacho_codigo",
+        "urf_despacho_nome",
+        ("valor_total_multa_arecolher_ajustado", D2),
+        "via_transporte_codigo",
+        "via_transporte_multimodal",
+        "via_transporte_nome",
+        "via_transporte_nome_transportador",
+        "via_transporte_numero_veiculo",
+        "via_transporte_pais_transportador_codigo",
+    ),
+}
+
+# Elementos filhos convertidos à parte, em `conversao`.
+FILHOS = {
+    DeclaracaoImportacao: (
+        "adicao",
+        "armazem",
+        "declaracao_ee",
+        "documento_instrucao_despacho",
+        "embalagem",
+        "pagamento",
+    ),
+    Adicao: ("mercadoria", "acrescimo", "deducao"),
+}
+
+
+def versao(*tabelas):
+    """
+    Identificador das tabelas de mapeamento: muda sempre que uma entrada é
+    incluída, removida ou alterada. Usado na chave do cache de declarações
+    convertidas.
+    """
+    texto = repr(
+        [
+            sorted(
+                (getattr(chave, "__name__", chave), repr(valor))
+                for chave, valor in tabela.items()
+            )
+            for tabela in tabelas
+        ]
+    )
+    return hashlib.sha1(texto.encode()).hexdigest()[:12]
+
+
+def entradas(classe):
+    """Entradas de `classe` normalizadas como (campo, tipo, origem)."""
+    resultado = []
+    for entrada in MAPEAMENTOS[classe]:
+        if isinstance(entrada, str):
+            entrada = (entrada, TEXTO, entrada)
+        elif len(entrada) == 2:
+            entrada = (entrada[0], entrada[1], entrada[0])
+        resultado.append(entrada)
+    return tuple(resultado)
+
+
+def _expressao(classe, tipo, origem):
+    partes = origem.split(".")
+    nomes = {f.name for f in fields(classe)}
+    if partes[0] not in nomes or not all(p.isidentifier() for p in partes):
+        raise ValueError("%s não tem o atributo %s" % (classe.__name__, origem))
+    acesso = "obj." + origem
+    if isinstance(tipo, int):
+        return "int(%s) / %d" % (acesso, tipo)
+    return EXPRESSOES[tipo].format(acesso)
+
+
+def _literal(classe, colunas, recuo):
+    """Linhas do literal de dicionário; campos em `colunas` vêm das variáveis v0, v1..."""
+    linhas = []
+    for campo, tipo, origem in entradas(classe):
+        if campo in colunas:
+            expressao = "v%d" % colunas.index(campo)
+        else:
+            expressao = _expressao(classe, tipo, origem)
+        linhas.append("%s%r: %s," % (" " * recuo, campo, expressao))
+    return linhas
+
+
+def _gera(nome, linhas):
+    namespace = {"c_data": c_data, "c_numero_di": c_numero_di}
+    exec(compile("\n".join(linhas), "<%s>" % nome, "exec"), namespace)
+    funcao = namespace[nome]
+    funcao.__module__ = __name__
+    return funcao
+
+
+def compila(classe):
+    """Gera a função que converte um objeto de `classe` em dicionário."""
+    nome = "converte_%s" % classe.__name__
+    return _gera(
+        nome,
+        ["def %s(obj):" % nome, "    return {"] + _literal(classe, [], 8) + ["    }"],
+    )
+
+
+def compila_lote(classe):
+    """
+    Gera a função que converte uma lista de objetos de `classe`.
+
+    As colunas numéricas diretas (inteiros e valores com escala) de listas
+    grandes são decodificadas de uma vez por `numerico.decodifica_coluna` e
+    entram prontas no literal de cada dicionário; listas pequenas, ou sem
+    NumPy disponível, usam a função de `compila`.
+    """
+    unitario = compila(classe)
+    colunas = [
+        (campo, attrgetter(origem), None if tipo == INTEIRO else tipo)
+        for campo, tipo, origem in entradas(classe)
+        if (tipo == INTEIRO or isinstance(tipo, int)) and "." not in origem
+    ]
+    if not colunas:
+        return lambda objetos: [unitario(obj) for obj in objetos]
+
+    nome = "converte_lote_%s" % classe.__name__
+    variaveis = ", ".join("v%d" % i for i in range(len(colunas)))
+    montagem = _gera(
+        nome,
+        ["def %s(objetos, %s):" % (nome, variaveis), "    return ["]
+        + ["        {"]
+        + _literal(classe, [campo for campo, _g, _e in colunas], 12)
+        + ["        }"]
+        + ["        for obj, %s in zip(objetos, %s)" % (variaveis, variaveis)]
+        + ["    ]"],
+    )
+
+    def converte_lote(objetos):
+        if not numerico.disponivel() or len(objetos) < numerico.MINIMO_VETORIZADO:
+            return [unitario(obj) for obj in objetos]
+        return montagem(
+            objetos,
+            *(
+                numerico.decodifica_coluna(list(map(getter, objetos)), escala)
+                for _campo, getter, escala in colunas
+            )
+        )
+
+    converte_lote.__name__ = nome
+    return converte_lote
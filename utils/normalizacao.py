@@ -0,0 +1,24 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Normalização dos nomes e descrições que chegam nas declarações.
+
+O mesmo fornecedor aparece como "Acme Ltda.", "ACME LTDA" ou "Açme  Ltda"
+conforme o despachante. `normaliza_texto` remove acentos, pontuação e espaços
+repetidos e converte para maiúsculas, gerando a chave usada para encontrar o
+registro já cadastrado.
+"""
+
+import re
+import unicodedata
+
+_NAO_ALFANUMERICO = re.compile(r"[\W_]+")
+
+
+def normaliza_texto(texto):
+    """Chave de comparação de `texto`, ou "" para texto vazio."""
+    if not texto:
+        return ""
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(" ", texto).strip().upper()
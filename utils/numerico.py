@@ -0,0 +1,87 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Decodificação em lote dos números de ponto fixo do SISCOMEX.
+
+Valores e quantidades chegam como inteiros com zeros à esquerda e largura fixa
+("000000000012345" com D2 é 123.45). Em vez de `int(texto) / escala` para cada
+valor, `decodifica_coluna` recebe a coluna inteira (todas as quantidades das
+mercadorias de uma declaração, por exemplo), junta os textos em um único
+buffer e converte os dígitos com NumPy, como uma matriz N x largura.
+
+O resultado é idêntico ao caminho escalar: com até 15 dígitos o inteiro é
+representado exatamente em float64 e a divisão por uma potência de dez é a
+mesma divisão em ponto flutuante que o Python faz em `int / int`. Colunas que
+não se encaixam nessas condições (larguras diferentes, sinais, espaços, mais
+de 15 dígitos) ou pequenas demais para compensar seguem pelo caminho escalar,
+que também é o único usado quando o NumPy não está instalado.
+"""
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# Dígitos que um float64 representa sem arredondamento (10**15 < 2**53).
+LARGURA_MAXIMA = 15
+
+# Abaixo disso a montagem dos arrays custa mais que o int() de cada valor.
+MINIMO_VETORIZADO = 128
+
+_POTENCIAS = {}
+
+
+def disponivel():
+    return numpy is not None
+
+
+def _potencias(largura):
+    potencias = _POTENCIAS.get(largura)
+    if potencias is None:
+        potencias = _POTENCIAS[largura] = 10 ** numpy.arange(
+            largura - 1, -1, -1, dtype=numpy.int64
+        )
+    return potencias
+
+
+def decodifica_escalar(textos, escala=None):
+    """Caminho de referência: `int(texto) / escala`, ou `int(texto)` sem escala."""
+    if escala is None:
+        return [int(texto) for texto in textos]
+    return [int(texto) / escala for texto in textos]
+
+
+def _decodifica_numpy(textos, escala):
+    """Retorna a coluna decodificada, ou None se ela não for de largura fixa."""
+    try:
+        buffer = "".join(textos).encode("ascii")
+    except (TypeError, UnicodeEncodeError):
+        return None
+    larguras = set(map(len, textos))
+    if len(larguras) != 1:
+        return None
+    largura = larguras.pop()
+    if not 0 < largura <= LARGURA_MAXIMA:
+        return None
+
+    # uint8: qualquer byte fora de "0".."9" vira um valor maior que 9.
+    digitos = numpy.frombuffer(buffer, dtype=numpy.uint8).reshape(-1, largura) - 48
+    if (digitos > 9).any():
+        return None
+
+    inteiros = digitos @ _potencias(largura)
+    if escala is None:
+        return inteiros.tolist()
+    return (inteiros / escala).tolist()
+
+
+def decodifica_coluna(textos, escala=None):
+    """
+    Converte uma lista de textos numéricos do SISCOMEX com a semântica de
+    `int(texto) / escala` (ou `int(texto)` quando `escala` é None).
+    """
+    if numpy is not None and len(textos) >= MINIMO_VETORIZADO:
+        valores = _decodifica_numpy(textos, escala)
+        if valores is not None:
+            return valores
+    return decodifica_escalar(textos, escala)
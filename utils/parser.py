@@ -0,0 +1,139 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Leitura incremental dos arquivos XML do SISCOMEX.
+
+Os arquivos "lista" enviados pelos despachantes podem conter dezenas de
+declarações, cada uma com centenas de adições. Em vez de materializar o
+documento inteiro em um `ListaDeclaracoes`, `iter_declaracoes` percorre o
+arquivo em um único passo (iterparse) e entrega uma `DeclaracaoImportacao`
+por vez, descartando a subárvore XML assim que ela é convertida. O consumo
+de memória fica limitado ao tamanho da maior declaração do arquivo.
+
+Os metadados de binding das ~2.100 linhas de `lista_declaracoes` são montados
+uma única vez por processo (`get_xml_context`) e compartilhados por todos os
+parsers criados em `get_parser`, evitando que cada importação pague o custo de
+inspecionar novamente todas as classes.
+
+A leitura pode ser feita com lxml (padrão, mais rápida) ou apenas com a
+biblioteca padrão (`xml.etree`), usada automaticamente quando o lxml não está
+disponível. A escolha é feita por empresa em `res.company.di_xml_handler`.
+"""
+
+import io
+from functools import lru_cache
+from xml.etree import ElementTree
+
+from xsdata.formats.dataclass.context import XmlContext
+from xsdata.formats.dataclass.parsers import XmlParser
+from xsdata.formats.dataclass.parsers.handlers import XmlEventHandler
+
+from .lista_declaracoes import DeclaracaoImportacao, ListaDeclaracoes
+
+try:
+    from lxml import etree
+    from xsdata.formats.dataclass.parsers.handlers import LxmlEventHandler
+except ImportError:  # pragma: no cover
+    etree = None
+    LxmlEventHandler = None
+
+DECLARACAO_TAG = DeclaracaoImportacao.Meta.name
+
+HANDLER_LXML = "lxml"
+HANDLER_NATIVE = "native"
+
+HANDLERS = {HANDLER_NATIVE: XmlEventHandler}
+if LxmlEventHandler is not None:
+    HANDLERS[HANDLER_LXML] = LxmlEventHandler
+
+DEFAULT_HANDLER = HANDLER_LXML if HANDLER_LXML in HANDLERS else HANDLER_NATIVE
+
+
+def resolve_handler(handler=None):
+    """Retorna o nome do handler a usar, caindo para `xml.etree` sem lxml."""
+    if handler in HANDLERS:
+        return handler
+    return DEFAULT_HANDLER
+
+
+@lru_cache(maxsize=None)
+def get_xml_context():
+    """Retorna o XmlContext do processo, já aquecido para `ListaDeclaracoes`."""
+    context = XmlContext()
+    context.build_recursive(ListaDeclaracoes)
+    return context
+
+
+def get_parser(handler=None):
+    """
+    Cria um XmlParser que reaproveita o contexto compartilhado.
+
+    O parser em si é barato e guarda estado por leitura (ns_map), por isso
+    é criado a cada chamada; apenas o contexto é global.
+    """
+    return XmlParser(
+        context=get_xml_context(), handler=HANDLERS[resolve_handler(handler)]
+    )
+
+
+def _iter_elementos_native(source):
+    pilha = []
+    for event, element in ElementTree.iterparse(source, events=("start", "end")):
+        if event == "start":
+            pilha.append(element)
+            continue
+
+        pilha.pop()
+        if element.tag == DECLARACAO_TAG:
+            yield element
+
+            element.clear()
+            if pilha:
+                pilha[-1].remove(element)
+
+
+def _iter_elementos_lxml(source):
+    context = etree.iterparse(
+        source,
+        events=("end",),
+        tag=DECLARACAO_TAG,
+        remove_comments=True,
+        resolve_entities=False,
+        no_network=True,
+    )
+    for _event, element in context:
+        yield element
+
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+ELEMENT_ITERATORS = {
+    HANDLER_NATIVE: _iter_elementos_native,
+    HANDLER_LXML: _iter_elementos_lxml,
+}
+
+
+def iter_declaracoes(source, handler=None, parser=None):
+    """
+    Gera as declarações de importação contidas em `source`, uma de cada vez.
+
+    `source` pode ser um caminho, bytes ou qualquer objeto com `read()` que
+    retorne bytes. O conteúdo nunca deve ser decodificado antes: o encoding é
+    o declarado no prólogo XML (UTF-8 na ausência dele), o que permite ler os
+    arquivos exportados em ISO-8859-1 sem conversão.
+
+    Cada elemento `declaracaoImportacao` é convertido assim que seu fechamento
+    é lido e, em seguida, removido da árvore para que o próximo não acumule
+    memória. `handler` escolhe entre "lxml" e "native"; um `parser` informado
+    deve ter sido criado com o mesmo handler.
+    """
+    handler = resolve_handler(handler)
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    if parser is None:
+        parser = get_parser(handler)
+
+    for element in ELEMENT_ITERATORS[handler](source):
+        yield parser.parse(element, DeclaracaoImportacao)
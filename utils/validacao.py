@@ -0,0 +1,249 @@
+# Copyright 2024 KMEE
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""
+Validação prévia dos arquivos XML de declaração.
+
+Antes de qualquer conversão ou gravação, `valida_declaracoes` percorre o
+arquivo uma única vez e confere os campos que a conversão trata como número
+ou data na tabela de `mapeamento`: se estão presentes e se têm o formato do
+SISCOMEX (inteiros com casas decimais implícitas e datas AAAAMMDD). Todos os problemas encontrados são
+devolvidos juntos, com a posição de cada um no arquivo, em vez de a
+importação parar no primeiro `int()` que falhar, depois de já ter buscado e
+criado parceiros e produtos.
+
+No mesmo passo, cada elemento da declaração é conferido com os bindings de
+`lista_declaracoes` (`ESTRUTURA`): elementos desconhecidos ou fora do lugar, e
+elementos únicos repetidos, que o xsdata rejeitaria no meio da importação, são
+relatados junto com os demais erros.
+
+A leitura é incremental como em `parser.iter_declaracoes`: cada elemento é
+descartado assim que fecha e apenas os textos dos filhos diretos do registro
+em validação ficam em memória.
+"""
+
+import io
+import typing
+from collections import namedtuple
+from dataclasses import fields, is_dataclass
+from xml.etree import ElementTree
+
+from .lista_declaracoes import (
+    Acrescimo,
+    Adicao,
+    DeclaracaoImportacao,
+    Deducao,
+    Embalagem,
+    Mercadoria,
+    Pagamento,
+)
+from .mapeamento import DATA, INTEIRO, c_data, entradas
+from .parser import DECLARACAO_TAG, HANDLER_LXML, etree, resolve_handler
+
+Regra = namedtuple("Regra", ["rotulo", "numeros", "datas", "obrigatorios"])
+
+
+def _regra(rotulo, classe):
+    """Monta a regra de `classe` a partir da tabela de `mapeamento`."""
+    nomes = {f.name: f.metadata.get("name", f.name) for f in fields(classe)}
+    numeros, datas, filhos = [], [], []
+    for _campo, tipo, origem in entradas(classe):
+        if "." in origem:
+            filhos.append(nomes[origem.split(".")[0]])
+        elif tipo == DATA:
+            datas.append(nomes[origem])
+        elif tipo == INTEIRO or isinstance(tipo, int):
+            numeros.append(nomes[origem])
+    obrigatorios = tuple(numeros + datas + sorted(set(filhos)))
+    return Regra(rotulo, tuple(numeros), tuple(datas), obrigatorios)
+
+
+# Registros conferidos, pela tag do elemento: os campos que `conversao` lê
+# como número ou data e os elementos filhos que ela acessa diretamente.
+REGRAS = {
+    DECLARACAO_TAG: _regra("declaração", DeclaracaoImportacao),
+    "adicao": _regra("adição", Adicao),
+    "mercadoria": _regra("mercadoria", Mercadoria),
+    "acrescimo": _regra("acréscimo", Acrescimo),
+    "deducao": _regra("dedução", Deducao),
+    "pagamento": _regra("pagamento", Pagamento),
+    "embalagem": _regra("embalagem", Embalagem),
+}
+
+# Onde cada registro pode aparecer: filhos diretos do registro pai.
+FILHOS = {
+    None: frozenset([DECLARACAO_TAG]),
+    DECLARACAO_TAG: frozenset(["adicao", "embalagem", "pagamento"]),
+    "adicao": frozenset(["mercadoria", "acrescimo", "deducao"]),
+}
+
+
+def _tipo(hint):
+    """(tipo, é lista) a partir da anotação de um campo do binding."""
+    origem = getattr(hint, "__origin__", None)
+    if origem in (list, typing.List):
+        return hint.__args__[0], True
+    if origem is typing.Union:
+        return [a for a in hint.__args__ if a is not type(None)][0], False
+    return hint, False
+
+
+def _estrutura(classe, estrutura):
+    filhos = estrutura[classe] = {}
+    tipos = typing.get_type_hints(classe)
+    for f in fields(classe):
+        tipo, lista = _tipo(tipos[f.name])
+        if not is_dataclass(tipo):
+            tipo = None
+        filhos[f.metadata.get("name", f.name)] = (tipo, lista)
+        if tipo is not None and tipo not in estrutura:
+            _estrutura(tipo, estrutura)
+    return estrutura
+
+
+# Elementos aceitos dentro de cada classe do binding: {classe: {tag: (classe do
+# elemento, ou None para um campo simples, é lista)}}.
+ESTRUTURA = _estrutura(DeclaracaoImportacao, {})
+
+
+class DeclaracaoInvalida(ValueError):
+    """Erros de validação de um arquivo, na ordem em que aparecem."""
+
+    def __init__(self, erros):
+        super().__init__(erros)
+        self.erros = erros
+
+    def __str__(self):
+        return "\n".join(self.erros)
+
+
+def _numero_invalido(texto):
+    try:
+        int(texto)
+    except ValueError:
+        return True
+    return False
+
+
+def _data_invalida(texto):
+    try:
+        c_data(texto)
+    except ValueError:
+        return True
+    return False
+
+
+def _confere(regra, valores, posicao, erros):
+    for tag in regra.obrigatorios:
+        if tag not in valores:
+            erros.append("%s: campo %s ausente" % (posicao, tag))
+    for tag in regra.numeros:
+        texto = valores.get(tag)
+        if texto is not None and _numero_invalido(texto):
+            erros.append("%s: campo %s não numérico (%r)" % (posicao, tag, texto))
+    for tag in regra.datas:
+        texto = valores.get(tag)
+        if texto is not None and _data_invalida(texto):
+            erros.append("%s: campo %s com data inválida (%r)" % (posicao, tag, texto))
+
+
+def _confere_elemento(pai, tag, tag_pai, posicao, erros):
+    """
+    Confere `tag` entre os filhos esperados `pai` e retorna o que se espera
+    dentro dela, ou None quando o conteúdo não deve ser conferido.
+    """
+    if pai is None:
+        return None
+    filhos, vistos = pai
+    if tag not in filhos:
+        erros.append("%s: elemento %s não previsto em %s" % (posicao, tag, tag_pai))
+        return None
+    classe, lista = filhos[tag]
+    vistos[tag] = vistos.get(tag, 0) + 1
+    if vistos[tag] == 2 and not lista:
+        erros.append("%s: elemento %s repetido em %s" % (posicao, tag, tag_pai))
+    return (ESTRUTURA[classe] if classe else {}, {})
+
+
+def _iterparse(source, handler):
+    if resolve_handler(handler) == HANDLER_LXML:
+        return etree.iterparse(
+            source,
+            events=("start", "end"),
+            remove_comments=True,
+            resolve_entities=False,
+            no_network=True,
+        )
+    return ElementTree.iterparse(source, events=("start", "end"))
+
+
+def _erros_sintaxe():
+    if etree is None:  # pragma: no cover
+        return (ElementTree.ParseError,)
+    return (ElementTree.ParseError, etree.XMLSyntaxError)
+
+
+def valida_declaracoes(source, handler=None):
+    """
+    Confere o arquivo `source` (caminho, bytes ou fluxo binário) e retorna a
+    lista de erros encontrados, vazia quando o arquivo pode ser importado.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    erros = []
+    pilha = []
+    # Registros abertos: [tag, profundidade, textos dos filhos, posição,
+    # contagem dos registros filhos].
+    registros = [[None, -1, {}, "", {}]]
+    # Para cada elemento aberto: (filhos esperados, contagem dos filhos já
+    # lidos), ou None fora das declarações e dentro de elementos desconhecidos.
+    esperados = []
+    try:
+        for event, element in _iterparse(source, handler):
+            atual = registros[-1]
+            if event == "start":
+                if atual[0] is None:
+                    esperado = (
+                        (ESTRUTURA[DeclaracaoImportacao], {})
+                        if element.tag == DECLARACAO_TAG
+                        else None
+                    )
+                else:
+                    esperado = _confere_elemento(
+                        esperados[-1],
+                        element.tag,
+                        pilha[-1].tag,
+                        atual[3].capitalize(),
+                        erros,
+                    )
+                esperados.append(esperado)
+                if element.tag in FILHOS.get(atual[0], ()):
+                    contagem = atual[4].get(element.tag, 0) + 1
+                    atual[4][element.tag] = contagem
+                    rotulo = "%s %d" % (REGRAS[element.tag].rotulo, contagem)
+                    posicao = "%s, %s" % (atual[3], rotulo) if atual[3] else rotulo
+                    registros.append([element.tag, len(pilha), {}, posicao, {}])
+                pilha.append(element)
+                continue
+
+            pilha.pop()
+            esperados.pop()
+            if len(pilha) == atual[1] and element.tag == atual[0]:
+                registros.pop()
+                _confere(REGRAS[atual[0]], atual[2], atual[3].capitalize(), erros)
+            elif len(pilha) == atual[1] + 1:
+                atual[2][element.tag] = element.text or ""
+
+            element.clear()
+            if pilha:
+                pilha[-1].remove(element)
+    except _erros_sintaxe() as erro:
+        erros.append("XML mal formado: %s" % erro)
+    return erros
+
+
+def verifica_declaracoes(source, handler=None):
+    """Como `valida_declaracoes`, mas levanta `DeclaracaoInvalida` se houver erros."""
+    erros = valida_declaracoes(source, handler)
+    if erros:
+        raise DeclaracaoInvalida(erros)
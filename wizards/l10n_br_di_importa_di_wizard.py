@@ -1,7 +1,17 @@
 # Copyright 2024 KMEE
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from odoo import fields, models
+import base64
+import os
+import zipfile
+
+from odoo import _, fields, models
+
+# Assinatura do início de um arquivo ZIP.
+ZIP_MAGIC = b"PK\x03\x04"
+
+# Membros do ZIP importados: XML de DI e JSON de DUIMP.
+EXTENSOES = (".xml", ".json")
 
 
 class L10nBrImportaDiWizard(models.TransientModel):
@@ -9,16 +19,133 @@ class L10nBrImportaDiWizard(models.TransientModel):
     _name = "declaracao_importacao.importa_di.wizard"
     _description = "Wizard de Importação de Declaração Importação"
 
-    arquivo_declaracao = fields.Binary()
+    arquivo_declaracao = fields.Binary(
+        attachment=True,
+        help="Para arquivos grandes, prefira o campo Arquivos, que envia o "
+        "arquivo sem codificá-lo em base64.",
+    )
 
-    def doit(self):
-        result_ids = []
+    arquivo_ids = fields.Many2many(
+        "ir.attachment",
+        string="Arquivos",
+        help="Arquivos XML de DI, JSON de DUIMP ou ZIP com esses arquivos, "
+        "importados em um único lote.",
+    )
+
+    previa = fields.Text(string="Pré-visualização", readonly=True)
+
+    def _anexo_arquivo_declaracao(self):
+        return (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_id", "=", self.id),
+                    ("res_field", "=", "arquivo_declaracao"),
+                ],
+                limit=1,
+            )
+        )
 
+    def _expande_zip(self, stream):
+        """
+        Cria um anexo para cada XML ou JSON do ZIP, copiando o conteúdo em blocos para
+        o filestore. Os anexos ficam vinculados ao assistente e são removidos
+        com ele.
+        """
+        attachment_model = self.env["ir.attachment"]
+        with zipfile.ZipFile(stream) as arquivo_zip:
+            for info in arquivo_zip.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(EXTENSOES):
+                    continue
+                with arquivo_zip.open(info) as membro:
+                    yield attachment_model._cria_de_arquivo(
+                        os.path.basename(info.filename),
+                        membro,
+                        {"res_model": self._name, "res_id": self.id},
+                    )
+
+    def _le_zip(self, stream):
+        """Conteúdo em base64 de cada XML ou JSON do ZIP, sem criar anexos."""
+        with zipfile.ZipFile(stream) as arquivo_zip:
+            for info in arquivo_zip.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(EXTENSOES):
+                    continue
+                yield os.path.basename(info.filename), base64.b64encode(
+                    arquivo_zip.read(info)
+                )
+
+    def _iter_arquivos(self, previa=False):
+        """
+        Anexos a importar, com os ZIPs expandidos. Com `previa`, gera pares
+        (nome, arquivo) e lê os XMLs dos ZIPs em memória, sem gravar anexos.
+        """
+        declaracao_model = self.env["declaracao_importacao.declaracao"]
         for wizard in self:
-            declaration = self.env["declaracao_importacao.declaracao"].importa_declaracao(
-                wizard.arquivo_declaracao
+            anexos = wizard._anexo_arquivo_declaracao() | wizard.arquivo_ids
+            for attachment in anexos:
+                with declaracao_model._abre_arquivo_declaracao(attachment) as stream:
+                    if stream.read(len(ZIP_MAGIC)) == ZIP_MAGIC:
+                        stream.seek(0)
+                        if previa:
+                            yield from wizard._le_zip(stream)
+                        else:
+                            yield from wizard._expande_zip(stream)
+                        continue
+                yield (attachment.name, attachment) if previa else attachment
+
+    def _formata_previa(self, nome, resumo):
+        linhas = [nome]
+        if resumo["ja_importadas"]:
+            linhas.append(_("  Arquivo já importado; a importação não criará registros."))
+        for declaracao in resumo["declaracoes"]:
+            linhas.append(
+                _(
+                    "  DI %(numero)s: %(adicoes)d adição(ões), %(mercadorias)d "
+                    "mercadoria(s), subtotal R$ %(subtotal).2f, outros R$ "
+                    "%(outros).2f, total R$ %(total).2f"
+                )
+                % {
+                    "numero": declaracao["numero_di"],
+                    "adicoes": declaracao["adicoes"],
+                    "mercadorias": declaracao["mercadorias"],
+                    "subtotal": declaracao["valor_subtotal"],
+                    "outros": declaracao["valor_outros"],
+                    "total": declaracao["valor_total"],
+                }
             )
-            result_ids.append(declaration.id)
+        for chave, titulo in (
+            ("parceiros_novos", _("Parceiros que serão criados")),
+            ("produtos_nao_encontrados", _("Produtos não encontrados")),
+            ("moedas_nao_encontradas", _("Moedas não encontradas")),
+        ):
+            if resumo[chave]:
+                linhas.append("  %s:" % titulo)
+                linhas.extend("    - %s" % item for item in resumo[chave])
+        return "\n".join(linhas)
+
+    def action_previa(self):
+        """Mostra o que a importação faria, sem gravar declarações."""
+        self.ensure_one()
+        declaracao_model = self.env["declaracao_importacao.declaracao"]
+        textos = [
+            self._formata_previa(nome, declaracao_model.previa_declaracao(arquivo))
+            for nome, arquivo in self._iter_arquivos(previa=True)
+        ]
+        self.previa = "\n\n".join(textos) or _("Nenhum arquivo informado")
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": self.id,
+            "view_mode": "form",
+            "target": "new",
+        }
+
+    def doit(self):
+        declarations = self.env["declaracao_importacao.declaracao"].importa_lote(
+            self._iter_arquivos()
+        )
         action = self.env.ref("declaracao_importacao.l10n_br_di_declaracao_act_window").read([])[0]
-        action["domain"] = [("id", "in", result_ids)]
+        action["domain"] = [("id", "in", declarations.ids)]
         return action